@@ -7,15 +7,15 @@ from renderlib.core import renderer_present
 from renderlib.core import renderer_shutdown
 from renderlib.error import error_print_traceback
 from renderlib.font import Font
-from renderlib.image import Image
 from renderlib.light import Light
+from renderlib.loader import AssetLoader
 from renderlib.material import Material
 from renderlib.mesh import Mesh
 from renderlib.mesh import MeshProps
 from renderlib.quad import Quad
 from renderlib.quad import QuadProps
 from renderlib.scene import Scene
-from renderlib.text import Text
+from renderlib.text import TextLine
 from renderlib.text import TextProps
 from renderlib.texture import Texture
 from time import time
@@ -103,21 +103,19 @@ class Demo:
         sdl.SDL_Quit()
 
     def load_resources(self):
-        self.mesh = Mesh.from_file('tests/data/zombie.mesh')
-        self.animation = AnimationInstance(self.mesh.animations[0])
-        self.image = Image.from_file('tests/data/zombie.jpg')
-        self.texture = Texture.from_image(self.image, Texture.TextureType.texture_2d)
-
-        self.terrain_mesh = Mesh.from_file('tests/data/plane.mesh')
-        self.grass_img = Image.from_file('tests/data/grass.jpg')
-        self.terrain_texture = Texture.from_image(self.grass_img, Texture.TextureType.texture_2d)
-
-        self.font = Font.from_file('tests/data/courier.ttf', 16)
-        self.text = Text(self.font)
+        batch = AssetLoader().load({
+            'mesh': ('mesh', 'tests/data/zombie.mesh'),
+            'texture': ('texture', 'tests/data/zombie.jpg', Texture.TextureType.texture_2d),
+            'terrain_mesh': ('mesh', 'tests/data/plane.mesh'),
+            'terrain_texture': ('texture', 'tests/data/grass.jpg', Texture.TextureType.texture_2d),
+            'font': ('font', 'tests/data/courier.ttf', 16),
+            'btn_texture': ('texture', 'tests/data/close_btn.png', Texture.TextureType.texture_rectangle),
+        })
+        for name, asset in batch.result().items():
+            setattr(self, name, asset)
 
+        self.animation = AnimationInstance(self.mesh.animations[0])
         self.btn = Quad(38, 36)
-        self.btn_img = Image.from_file('tests/data/close_btn.png')
-        self.btn_texture = Texture.from_image(self.btn_img, Texture.TextureType.texture_rectangle)
 
         self.material = Material()
         self.material.texture = self.texture
@@ -147,9 +145,9 @@ class Demo:
         self.text_props = TextProps()
         self.text_props.color = Vec(0.5, 1.0, 0.5, 1.0)
         self.text_props.opacity = 1.0
-        text_obj = self.ui_scene.add_text(self.text, self.text_props)
-        text_obj.position.x = -self.width / 2 + 10
-        text_obj.position.y = self.height / 2 - 10
+        self.text = TextLine(self.font, self.text_props)
+        self.text.position = (-self.width / 2 + 10, self.height / 2 - 10, 0)
+        self.ui_scene.add_text_line(self.text)
 
         self.btn_props = QuadProps()
         self.btn_props.texture = self.btn_texture
@@ -180,9 +178,14 @@ class Demo:
         return True
 
     def update_stats(self, fps, render_time):
-        self.text.string = 'FPS: {fps}, render time: {time:.2f}ms'.format(
-            fps=int(fps),
-            time=render_time * 1000)
+        stats = self.scene.frame_stats
+        self.text.string = (
+            'FPS: {fps}, render time: {time:.2f}ms, '
+            'draw calls: {draws}, triangles: {triangles}'.format(
+                fps=int(fps),
+                time=render_time * 1000,
+                draws=stats.draw_calls if stats else 0,
+                triangles=stats.triangles if stats else 0))
 
     def render(self):
         self.scene.render(self.camera, self.light)
@@ -1,8 +1,107 @@
 from _renderlib import lib
+from renderlib.posetable import PoseTable
+from renderlib.trace import traced
+from renderlib.workers import get_executor
+import os
 
 class Animation:
-    def __init__(self, animptr):
+    def __init__(self, animptr, mesh=None, index=None):
         self._ptr = animptr
+        self._mesh = mesh
+        self._index = index
+
+    def _bound_mesh(self):
+        mesh = self._mesh() if self._mesh else None
+        if mesh is None:
+            raise RuntimeError('animation is not bound to a mesh')
+        return mesh
+
+    def _data(self):
+        """Returns source data of the mesh and of the animation."""
+        data = self._bound_mesh()._require_mesh_data()
+        index = self._index
+        if data.skeleton is None or not 0 <= index < len(data.animations):
+            raise RuntimeError('animation data is not available')
+        return data, data.animations[index]
+
+    @property
+    def bounds(self):
+        """Conservative bounds of the animated mesh, see
+        :meth:`renderlib.mesh.Mesh.animation_bounds`."""
+        return self._bound_mesh().animation_bounds(self._index)
+
+    def bake(self, sample_rate=30.0, quantize=False, cache=False,
+            cache_dir=None):
+        """Bakes the animation into a table of poses sampled at a fixed rate.
+
+        With caching enabled and the mesh loaded from a file, the table is
+        saved as `<mesh file name>.<animation index>.<rate>hz[.q].poses` in
+        the cache directory and loaded from there by later calls with the same
+        parameters, as long as it's not older than the mesh file. Requires
+        NumPy.
+
+        :param sample_rate: Samples per second of animation time.
+        :type sample_rate: float
+
+        :param quantize: Whether to store quantized joint transforms instead
+            of matrices.
+        :type quantize: bool
+
+        :param cache: Whether to use a pose table file.
+        :type cache: bool
+
+        :param cache_dir: Directory of pose table files, by default the
+            directory of the mesh file.
+        :type cache_dir: str
+
+        :rtype: :class:`renderlib.posetable.PoseTable`
+        """
+        source = self._bound_mesh()._geometry_source
+        path = None
+        if cache and isinstance(source, str):
+            path = os.path.join(
+                cache_dir or os.path.dirname(source),
+                '{}.{}.{:g}hz{}.poses'.format(
+                    os.path.basename(source),
+                    self._index,
+                    sample_rate,
+                    '.q' if quantize else ''))
+            try:
+                if os.path.getmtime(path) >= os.path.getmtime(source):
+                    table = PoseTable.load(path)
+                    if (table.quantized == quantize and
+                            abs(table.sample_rate - sample_rate) < 1e-3):
+                        return table
+            except (OSError, RuntimeError):
+                pass
+
+        table = PoseTable.bake(*self._data(), sample_rate, quantize)
+        if path:
+            try:
+                table.save(path)
+            except OSError:
+                pass
+        return table
+
+    def bake_report(self, sample_rates=(10, 15, 30, 60)):
+        """Compares memory use and pose lookup time of pose tables baked at
+        given rates, both plain and quantized, against keyframe interpolation
+        done by :meth:`AnimationInstance.play`.
+
+        Requires NumPy.
+
+        :param sample_rates: Sample rates to try.
+        :type sample_rates: sequence
+
+        :rtype: list of :class:`renderlib.posetable.BakeReport`
+        """
+        mesh, animation = self._data()
+        instance = AnimationInstance(self)
+        return [
+            PoseTable.bake(mesh, animation, rate, quantize).report(instance)
+            for rate in sample_rates
+            for quantize in (False, True)
+        ]
 
 
 class AnimationInstance:
@@ -16,4 +115,277 @@ class AnimationInstance:
 
     def play(self, dt):
         if not lib.animation_instance_play(self._ptr, dt):
-            raise RuntimeError('animation instance playback failed')
\ No newline at end of file
+            raise RuntimeError('animation instance playback failed')
+
+
+class AnimationGroup:
+    """A set of animation instances played together.
+
+    Playing a group calls the C library directly for each instance, without
+    per-instance Python method calls and error checks. With threading enabled
+    instances are split into chunks played in parallel on a thread pool; the C
+    library releases the GIL, so pose evaluation of different instances runs
+    on multiple cores.
+
+    :param threaded: Whether to spread playback over a thread pool.
+    :type threaded: bool
+
+    :param executor: Executor to use when threaded, by default the shared pool
+        from :func:`renderlib.workers.get_executor`.
+    :type executor: :class:`concurrent.futures.Executor`
+
+    :param chunk_size: Number of instances played by one pool task.
+    :type chunk_size: int
+    """
+
+    def __init__(self, threaded=False, executor=None, chunk_size=64):
+        self.threaded = threaded
+        self.chunk_size = chunk_size
+        self._executor = executor
+        self._instances = []
+        self._ptrs = []
+        self._time_scales = []
+
+    def __len__(self):
+        return len(self._instances)
+
+    def __iter__(self):
+        return iter(self._instances)
+
+    def add(self, instance, time_scale=1.0):
+        """Adds an animation instance to the group.
+
+        :param instance: Animation instance.
+        :type instance: :class:`AnimationInstance`
+
+        :param time_scale: Factor applied to time delta when playing the
+            instance.
+        :type time_scale: float
+        """
+        self._instances.append(instance)
+        self._ptrs.append(instance._ptr)
+        self._time_scales.append(time_scale)
+
+    def remove(self, instance):
+        i = self._instances.index(instance)
+        del self._instances[i]
+        del self._ptrs[i]
+        del self._time_scales[i]
+
+    def get_time_scale(self, instance):
+        return self._time_scales[self._instances.index(instance)]
+
+    def set_time_scale(self, instance, time_scale):
+        self._time_scales[self._instances.index(instance)] = time_scale
+
+    def _play_range(self, dt, start, end):
+        play = lib.animation_instance_play
+        failed = 0
+        ptrs = self._ptrs[start:end]
+        time_scales = self._time_scales[start:end]
+        for ptr, scale in zip(ptrs, time_scales):
+            if not play(ptr, dt * scale):
+                failed += 1
+        return failed
+
+    @traced('AnimationGroup.play', 'animation')
+    def play(self, dt):
+        """Advances all instances.
+
+        :param dt: Time delta, scaled by each instance time scale.
+        :type dt: float
+        """
+        count = len(self._ptrs)
+        if not self.threaded or count <= self.chunk_size:
+            failed = self._play_range(dt, 0, count)
+        else:
+            executor = self._executor or get_executor()
+            size = self.chunk_size
+            futures = [
+                executor.submit(self._play_range, dt, start, start + size)
+                for start in range(0, count, size)
+            ]
+            failed = sum(f.result() for f in futures)
+        if failed:
+            raise RuntimeError(
+                'playback of {} animation instances failed'.format(failed))
+
+
+class AnimationLOD:
+    """Animation update rate policy based on distance from the viewer.
+
+    :param levels: `(distance, rate)` pairs sorted by distance: animations at
+        least `distance` away are updated `rate` times per second. Closer ones
+        are updated on every frame.
+    :type levels: sequence
+    """
+
+    def __init__(self, levels):
+        self.levels = sorted(levels)
+
+    def interval(self, distance):
+        """Returns minimum time between updates of an animation.
+
+        :param distance: Distance from the viewer.
+        :type distance: float
+
+        :rtype: float
+        """
+        interval = 0.0
+        for level_distance, rate in self.levels:
+            if distance < level_distance:
+                break
+            interval = 1.0 / rate
+        return interval
+
+
+class AnimationTrack:
+    """Playback of an animation on a set of meshes, see
+    :meth:`AnimationScheduler.add`.
+
+    :attr:`distance` is the distance from the viewer, used for choosing update
+    rate.
+    """
+
+    def __init__(self, animation, props, time_scale):
+        self.animation = animation
+        self.props = props
+        self.time_scale = time_scale
+        self.distance = 0.0
+        self._pose = None
+
+    @property
+    def time(self):
+        """Animation time of the track."""
+        return self._pose.time
+
+
+class _SharedPose:
+    def __init__(self, animation, time, time_scale):
+        self.instance = AnimationInstance(animation)
+        if time:
+            self.instance.play(time)
+        self.animation = animation
+        self.time = time
+        self.time_scale = time_scale
+        self.pending = 0.0
+        self.tracks = []
+
+
+class AnimationScheduler:
+    """Plays animations of many meshes, sharing poses and reducing update rate
+    of distant ones.
+
+    Tracks of the same animation playing with the same time scale at the same
+    quantized time share a single animation instance, which is evaluated once
+    per update and assigned to :attr:`renderlib.mesh.MeshProps.animation` of
+    each track, so the renderer uses the shared pose. Such tracks stay in
+    lockstep until they are removed or their time scale changes.
+
+    With a LOD policy, an instance is played only once the time elapsed since
+    its last update reaches the interval chosen for the nearest of its tracks,
+    then it catches up in one step.
+
+    :param lod: Update rate policy, by default every instance is updated on
+        every frame.
+    :type lod: :class:`AnimationLOD`
+
+    :param quantum: Time step within which tracks are considered to play at
+        the same time.
+    :type quantum: float
+    """
+
+    def __init__(self, lod=None, quantum=1 / 60):
+        self.lod = lod
+        self.quantum = quantum
+        self._poses = []
+
+    @property
+    def instance_count(self):
+        """Number of animation instances evaluated for all tracks."""
+        return len(self._poses)
+
+    def _attach(self, track, time):
+        slot = round(time / self.quantum)
+        for pose in self._poses:
+            if (pose.animation is track.animation and
+                    pose.time_scale == track.time_scale and
+                    round(pose.time / self.quantum) == slot):
+                break
+        else:
+            pose = _SharedPose(track.animation, time, track.time_scale)
+            self._poses.append(pose)
+        pose.tracks.append(track)
+        track._pose = pose
+        for props in track.props:
+            props.animation = pose.instance
+
+    def _detach(self, track):
+        pose = track._pose
+        pose.tracks.remove(track)
+        if not pose.tracks:
+            self._poses.remove(pose)
+        track._pose = None
+
+    def add(self, animation, props, time=0.0, time_scale=1.0):
+        """Starts playing an animation on meshes.
+
+        :param animation: Animation to play.
+        :type animation: :class:`Animation`
+
+        :param props: Properties of meshes to animate.
+        :type props: sequence of :class:`renderlib.mesh.MeshProps`
+
+        :param time: Initial animation time.
+        :type time: float
+
+        :param time_scale: Factor applied to time delta when playing.
+        :type time_scale: float
+
+        :rtype: :class:`AnimationTrack`
+        """
+        track = AnimationTrack(animation, list(props), time_scale)
+        self._attach(track, time)
+        return track
+
+    def remove(self, track):
+        self._detach(track)
+
+    def set_time_scale(self, track, time_scale):
+        """Changes playback speed of a track.
+
+        The track stops sharing its pose with others.
+
+        :param track: Animation track.
+        :type track: :class:`AnimationTrack`
+
+        :param time_scale: Factor applied to time delta when playing.
+        :type time_scale: float
+        """
+        time = track.time
+        self._detach(track)
+        track.time_scale = time_scale
+        self._attach(track, time)
+
+    @traced('AnimationScheduler.update', 'animation')
+    def update(self, dt):
+        """Advances all tracks.
+
+        :param dt: Time delta.
+        :type dt: float
+
+        :returns: Number of animation instances played.
+        :rtype: int
+        """
+        played = 0
+        for pose in self._poses:
+            pose.time += dt * pose.time_scale
+            pose.pending += dt
+            if self.lod:
+                distance = min(track.distance for track in pose.tracks)
+                if pose.pending < self.lod.interval(distance):
+                    continue
+            pose.instance.play(pose.pending * pose.time_scale)
+            pose.pending = 0.0
+            played += 1
+        return played
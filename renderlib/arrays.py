@@ -0,0 +1,222 @@
+"""Helpers for passing Python sequences and buffers to the C library."""
+from _renderlib import ffi
+from matlib.vec import Vec
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#: Buffer protocol format codes accepted for C scalar types.
+FORMATS = {
+    'float': 'f',
+    'uint8_t': 'B',
+    'uint32_t': 'IL',
+}
+
+
+def _check_format(fmt, ctype):
+    byteorder = {'<': 'little', '>': 'big', '!': 'big'}
+    if fmt[:1] in byteorder:
+        if byteorder[fmt[0]] != sys.byteorder:
+            return False
+        fmt = fmt[1:]
+    elif fmt[:1] in ('@', '='):
+        fmt = fmt[1:]
+    return len(fmt) == 1 and fmt in FORMATS[ctype]
+
+
+def as_cdata(ctype, width, data):
+    """Converts a sequence or a buffer into a C array suitable for passing to
+    the library.
+
+    Lists and tuples are copied into a newly allocated array, while objects
+    supporting the buffer protocol (NumPy arrays, `array.array`, `memoryview`,
+    etc) are passed by reference with no copy. Buffers must be C-contiguous,
+    have an item type matching `ctype` and either be flat or have the last
+    dimension equal to `width`.
+
+    :param ctype: C scalar type name, one of `FORMATS` keys.
+    :type ctype: str
+
+    :param width: Number of scalars per element (e.g. 3 for positions).
+    :type width: int
+
+    :param data: Source data or `None`.
+    :type data: list, tuple or buffer
+
+    :returns: A tuple of C array (or `ffi.NULL` if there's no data) and number
+        of elements in it.
+    :rtype: (cdata, int)
+    """
+    if data is None:
+        return ffi.NULL, 0
+
+    decl = '{}[][{}]'.format(ctype, width) if width > 1 else '{}[]'.format(ctype)
+
+    if isinstance(data, (list, tuple)):
+        if not data:
+            return ffi.NULL, 0
+        return ffi.new(decl, data), len(data)
+
+    try:
+        view = memoryview(data)
+    except TypeError:
+        raise RuntimeError(
+            'expected a list, tuple or buffer, got {}'.format(
+                type(data).__name__))
+
+    if not view.c_contiguous:
+        raise RuntimeError('buffer is not C-contiguous')
+    if not _check_format(view.format, ctype) or \
+            view.itemsize != ffi.sizeof(ctype):
+        raise RuntimeError(
+            'buffer format "{}" does not match {}'.format(view.format, ctype))
+    if width > 1 and view.ndim > 1 and \
+            (view.ndim != 2 or view.shape[1] != width):
+        raise RuntimeError(
+            'buffer shape {} does not match (N, {})'.format(view.shape, width))
+
+    scalars = view.nbytes // view.itemsize
+    if scalars % width:
+        raise RuntimeError(
+            'buffer size {} is not a multiple of {}'.format(scalars, width))
+    if not scalars:
+        return ffi.NULL, 0
+
+    return ffi.from_buffer(decl, view), scalars // width
+
+
+def require_numpy(feature):
+    """Returns `numpy` module or raises an error mentioning the feature which
+    needs it if it's not installed.
+
+    :param feature: Human-readable name of the feature.
+    :type feature: str
+
+    :returns: NumPy module.
+    :rtype: module
+    """
+    if numpy is None:
+        raise RuntimeError('{} requires numpy to be installed'.format(feature))
+    return numpy
+
+
+def as_ndarray(dtype, width, data):
+    """Returns a 2D NumPy array of given data with `width` columns.
+
+    Typed buffers, like NumPy arrays of any type and layout, are converted to
+    `dtype` by value and only copied when they don't already match it.
+    Untyped byte buffers (`bytes`, `bytearray` and other buffers of format
+    `B`) are reinterpreted as `dtype` values.
+
+    :param dtype: NumPy data type.
+    :type dtype: str
+
+    :param width: Number of columns.
+    :type width: int
+
+    :param data: Source data.
+    :type data: list, tuple or buffer
+
+    :returns: Array of shape (N, width).
+    :rtype: :class:`numpy.ndarray`
+    """
+    np = require_numpy('array conversion')
+    if isinstance(data, (list, tuple, np.ndarray)):
+        arr = np.ascontiguousarray(data, dtype=dtype)
+    else:
+        try:
+            view = memoryview(data)
+        except TypeError:
+            raise RuntimeError(
+                'expected a list, tuple or buffer, got {}'.format(
+                    type(data).__name__))
+        if view.format in ('B', '@B', '=B', '<B', '>B') and view.c_contiguous:
+            arr = np.frombuffer(view.cast('B'), dtype=dtype)
+        else:
+            arr = np.ascontiguousarray(np.asarray(view), dtype=dtype)
+    if arr.size % width:
+        raise RuntimeError(
+            'data size {} is not a multiple of {}'.format(arr.size, width))
+    return arr.reshape(-1, width)
+
+
+def mat_to_ndarray(m):
+    """Converts a matrix into a 4x4 NumPy array.
+
+    The conversion relies only on matrix-vector multiplication, so the result
+    doesn't depend on matlib memory layout: `m * v` equals `a @ v`.
+
+    :param m: Matrix.
+    :type m: :class:`matlib.mat.Mat`
+
+    :rtype: :class:`numpy.ndarray`
+    """
+    np = require_numpy('matrix conversion')
+    columns = [
+        m * Vec(1, 0, 0, 0),
+        m * Vec(0, 1, 0, 0),
+        m * Vec(0, 0, 1, 0),
+        m * Vec(0, 0, 0, 1),
+    ]
+    return np.array([[c.x, c.y, c.z, c.w] for c in columns]).T
+
+
+def struct_view(np, cdata, struct, fields):
+    """Returns a NumPy structured view of float fields of a native array of
+    structures, so that writing to it changes the native data.
+
+    :param np: NumPy module.
+    :type np: module
+
+    :param cdata: Native array of structures.
+    :type cdata: cdata
+
+    :param struct: Structure type, e.g. `'struct QuadProps'`.
+    :type struct: str
+
+    :param fields: Field names and numbers of floats in them.
+    :type fields: list of (str, int)
+
+    :rtype: :class:`numpy.ndarray`
+    """
+    return np.frombuffer(ffi.buffer(cdata), dtype=np.dtype({
+        'names': [name for name, _ in fields],
+        'formats': [
+            ('f4', size) if size > 1 else 'f4'
+            for _, size in fields
+        ],
+        'offsets': [ffi.offsetof(struct, name) for name, _ in fields],
+        'itemsize': ffi.sizeof(struct),
+    }))
+
+
+def sync_positions(np, positions, synced, objects):
+    """Copies positions which changed since the last call to native objects.
+
+    :param np: NumPy module.
+    :type np: module
+
+    :param positions: Positions, float32 array of shape (N, 3).
+    :type positions: :class:`numpy.ndarray`
+
+    :param synced: Positions copied by the last call, updated in place.
+    :type synced: :class:`numpy.ndarray`
+
+    :param objects: Native objects, `None` for ones to skip.
+    :type objects: list of cdata
+    """
+    changed = np.flatnonzero((positions != synced).any(axis=1))
+    if not len(changed):
+        return
+    src = ffi.from_buffer('float[]', positions)
+    size = 3 * ffi.sizeof('float')
+    for i in changed.tolist():
+        if objects[i] is not None:
+            ffi.memmove(
+                ffi.addressof(objects[i], 'position'),
+                src + 3 * i,
+                size)
+    synced[changed] = positions[changed]
@@ -0,0 +1,320 @@
+"""Texture atlases.
+
+This is an offline packing tool: :meth:`Atlas.build` decodes source images in
+Python and should run as a build step, while :meth:`Atlas.load` only reads the
+saved layout and lets the native :class:`renderlib.image.Image` decoder handle
+the pages.
+
+Native quads always map the whole texture, so atlas regions can't be drawn
+with :class:`renderlib.quad.Quad` and don't reduce texture binds there; UV
+rectangles are meant for custom shaders and meshes that sample the pages.
+"""
+from collections import namedtuple
+from renderlib import png
+from renderlib.image import Image
+from renderlib.texture import Texture
+import json
+import os
+
+#: Placement of an image within atlas pages, in pixels.
+Region = namedtuple('Region', ['page', 'x', 'y', 'width', 'height'])
+
+#: Atlas region: page texture and normalized UV rectangle
+#: `(left, top, right, bottom)` for shaders that sample the page.
+AtlasRegion = namedtuple('AtlasRegion', ['texture', 'uv', 'width', 'height'])
+
+
+class SkylinePacker:
+    """Bottom-left skyline rectangle packer.
+
+    :param width: Bin width.
+    :type width: int
+
+    :param height: Bin height.
+    :type height: int
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # skyline segments as [x, y, width] lists, sorted by x
+        self._skyline = [[0, 0, width]]
+
+    def _fit(self, i, w, h):
+        x, y, _ = self._skyline[i]
+        if x + w > self.width:
+            return None
+        remaining = w
+        while remaining > 0:
+            y = max(y, self._skyline[i][1])
+            if y + h > self.height:
+                return None
+            remaining -= self._skyline[i][2]
+            i += 1
+        return y
+
+    def insert(self, w, h):
+        """Finds a place for a rectangle and marks it as used.
+
+        :param w: Rectangle width.
+        :type w: int
+
+        :param h: Rectangle height.
+        :type h: int
+
+        :returns: Top-left corner of the rectangle or `None` if it doesn't fit.
+        :rtype: (int, int)
+        """
+        best = best_key = None
+        for i, segment in enumerate(self._skyline):
+            y = self._fit(i, w, h)
+            if y is not None:
+                key = (y + h, segment[2])
+                if best_key is None or key < best_key:
+                    best, best_key = (i, segment[0], y), key
+        if best is None:
+            return None
+
+        i, x, y = best
+        self._skyline.insert(i, [x, y + h, w])
+
+        # cut off segments covered by the new one
+        j = i + 1
+        while j < len(self._skyline):
+            segment = self._skyline[j]
+            overlap = x + w - segment[0]
+            if overlap <= 0:
+                break
+            if segment[2] <= overlap:
+                del self._skyline[j]
+                continue
+            segment[0] += overlap
+            segment[2] -= overlap
+            break
+
+        # merge neighbours at the same height
+        j = 0
+        while j < len(self._skyline) - 1:
+            if self._skyline[j][1] == self._skyline[j + 1][1]:
+                self._skyline[j][2] += self._skyline.pop(j + 1)[2]
+            else:
+                j += 1
+
+        return x, y
+
+
+class AtlasLayout:
+    """Placement of named images on atlas pages.
+
+    :param page_size: Page width and height.
+    :type page_size: (int, int)
+
+    :param regions: Image regions keyed by name.
+    :type regions: dict
+    """
+
+    def __init__(self, page_size, regions):
+        self.page_size = tuple(page_size)
+        self.regions = regions
+
+    @property
+    def page_count(self):
+        return max((r.page for r in self.regions.values()), default=-1) + 1
+
+    def uv(self, name):
+        """Returns normalized UV rectangle of an image.
+
+        :param name: Image name.
+        :type name: str
+
+        :returns: A `(left, top, right, bottom)` tuple.
+        :rtype: (float, float, float, float)
+        """
+        r = self.regions[name]
+        pw, ph = self.page_size
+        return (r.x / pw, r.y / ph, (r.x + r.width) / pw, (r.y + r.height) / ph)
+
+    @classmethod
+    def pack(cls, sizes, page_size=(1024, 1024), padding=1):
+        """Packs images of given sizes into as few pages as possible.
+
+        :param sizes: Image `(width, height)` tuples keyed by name.
+        :type sizes: dict
+
+        :param page_size: Page width and height.
+        :type page_size: (int, int)
+
+        :param padding: Gap in pixels between images.
+        :type padding: int
+
+        :rtype: :class:`AtlasLayout`
+        """
+        packers = []
+        regions = {}
+        # tallest first gives the tightest skylines
+        for name, (w, h) in sorted(
+                sizes.items(), key=lambda i: (-i[1][1], -i[1][0], i[0])):
+            for page, packer in enumerate(packers):
+                pos = packer.insert(w + padding, h + padding)
+                if pos:
+                    break
+            else:
+                packers.append(SkylinePacker(*page_size))
+                page = len(packers) - 1
+                pos = packers[page].insert(w + padding, h + padding)
+                if not pos:
+                    raise RuntimeError(
+                        'image "{}" does not fit into atlas page'.format(name))
+            regions[name] = Region(page, pos[0], pos[1], w, h)
+        return cls(page_size, regions)
+
+    def to_dict(self):
+        return {
+            'page_size': list(self.page_size),
+            'regions': {
+                name: list(region) for name, region in self.regions.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(
+            d['page_size'],
+            {name: Region(*r) for name, r in d['regions'].items()})
+
+
+class Atlas:
+    """A set of images packed into a few large textures.
+
+    Textures are created on first access, which must happen on the thread
+    owning the OpenGL context.
+
+    :param layout: Atlas layout.
+    :type layout: :class:`AtlasLayout`
+
+    :param pages: PNG-encoded page images.
+    :type pages: list
+
+    :param tex_type: Type of page textures.
+    :type tex_type: :class:`renderlib.texture.Texture.TextureType`
+    """
+
+    def __init__(self, layout, pages, tex_type=Texture.TextureType.texture_2d):
+        self.layout = layout
+        self._pages = pages
+        self._tex_type = tex_type
+        self._textures = None
+
+    @property
+    def textures(self):
+        """Page textures."""
+        if self._textures is None:
+            self._textures = [
+                Texture.from_image(
+                    Image.from_buffer(page, Image.Codec.PNG),
+                    self._tex_type)
+                for page in self._pages
+            ]
+        return self._textures
+
+    def region(self, name):
+        """Returns texture and UV rectangle of an image.
+
+        Quads can't sample a part of a texture, so the UV rectangle must be
+        applied by a custom shader or mesh texture coordinates.
+
+        :param name: Image name.
+        :type name: str
+
+        :rtype: :class:`AtlasRegion`
+        """
+        r = self.layout.regions[name]
+        uv = self.layout.uv(name)
+        if self._tex_type == Texture.TextureType.texture_rectangle:
+            pw, ph = self.layout.page_size
+            uv = (uv[0] * pw, uv[1] * ph, uv[2] * pw, uv[3] * ph)
+        return AtlasRegion(self.textures[r.page], uv, r.width, r.height)
+
+    @classmethod
+    def build(cls, sources, page_size=(1024, 1024), padding=1,
+            tex_type=Texture.TextureType.texture_2d):
+        """Packs PNG images into a new atlas.
+
+        :param sources: PNG file names or encoded data keyed by image name.
+        :type sources: dict
+
+        :param page_size: Page width and height.
+        :type page_size: (int, int)
+
+        :param padding: Gap in pixels between images.
+        :type padding: int
+
+        :param tex_type: Type of page textures.
+        :type tex_type: :class:`renderlib.texture.Texture.TextureType`
+
+        :rtype: :class:`Atlas`
+        """
+        images = {}
+        for name, src in sources.items():
+            if isinstance(src, str):
+                with open(src, 'rb') as fp:
+                    src = fp.read()
+            images[name] = png.decode(src)
+
+        layout = AtlasLayout.pack(
+            {name: img[:2] for name, img in images.items()},
+            page_size,
+            padding)
+
+        pw, ph = layout.page_size
+        pages = [bytearray(pw * ph * 4) for _ in range(layout.page_count)]
+        for name, (w, h, pixels) in images.items():
+            r = layout.regions[name]
+            page = pages[r.page]
+            for row in range(h):
+                offset = ((r.y + row) * pw + r.x) * 4
+                page[offset:offset + w * 4] = pixels[row * w * 4:(row + 1) * w * 4]
+
+        return cls(layout, [png.encode(pw, ph, page) for page in pages], tex_type)
+
+    def save(self, filename):
+        """Saves the atlas layout as JSON file along with page images.
+
+        Pages are written next to the layout file as `<name>.<page>.png`.
+
+        :param filename: Layout file name.
+        :type filename: str
+        """
+        stem = os.path.splitext(filename)[0]
+        page_files = []
+        for i, page in enumerate(self._pages):
+            page_file = '{}.{}.png'.format(stem, i)
+            with open(page_file, 'wb') as fp:
+                fp.write(page)
+            page_files.append(os.path.basename(page_file))
+
+        d = self.layout.to_dict()
+        d['pages'] = page_files
+        with open(filename, 'w') as fp:
+            json.dump(d, fp, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, filename, tex_type=Texture.TextureType.texture_2d):
+        """Loads an atlas saved by :meth:`save`, without re-packing it.
+
+        :param filename: Layout file name.
+        :type filename: str
+
+        :param tex_type: Type of page textures.
+        :type tex_type: :class:`renderlib.texture.Texture.TextureType`
+
+        :rtype: :class:`Atlas`
+        """
+        with open(filename) as fp:
+            d = json.load(fp)
+        pages = []
+        for page_file in d['pages']:
+            path = os.path.join(os.path.dirname(filename), page_file)
+            with open(path, 'rb') as fp:
+                pages.append(fp.read())
+        return cls(AtlasLayout.from_dict(d), pages, tex_type)
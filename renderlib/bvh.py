@@ -0,0 +1,224 @@
+"""Bounding volume hierarchy."""
+from renderlib.arrays import require_numpy
+
+
+def expand_ranges(starts, counts):
+    """Concatenates integer ranges `[start, start + count)` into one array.
+
+    :param starts: Range starts.
+    :type starts: :class:`numpy.ndarray`
+
+    :param counts: Range lengths.
+    :type counts: :class:`numpy.ndarray`
+
+    :rtype: :class:`numpy.ndarray`
+    """
+    np = require_numpy('BVH')
+    counts = np.asarray(counts, dtype='int64')
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(0, dtype='int64')
+    ends = np.cumsum(counts)
+    shift = np.repeat(np.asarray(starts, dtype='int64') - (ends - counts), counts)
+    return np.arange(total, dtype='int64') + shift
+
+
+def _spread_bits(v):
+    # inserts two zero bits after each of the lower 10 bits
+    v = (v | (v << 16)) & 0x030000FF
+    v = (v | (v << 8)) & 0x0300F00F
+    v = (v | (v << 4)) & 0x030C30C3
+    v = (v | (v << 2)) & 0x09249249
+    return v
+
+
+def morton_codes(points):
+    """Computes 30-bit Morton codes of points within their bounding box.
+
+    :param points: Points, shape (N, 3).
+    :type points: :class:`numpy.ndarray`
+
+    :rtype: :class:`numpy.ndarray`
+    """
+    np = require_numpy('BVH')
+    lo = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - lo, 1e-12)
+    q = ((points - lo) / extent * 1023).astype('uint64')
+    return (
+        (_spread_bits(q[:, 0]) << 2) |
+        (_spread_bits(q[:, 1]) << 1) |
+        _spread_bits(q[:, 2]))
+
+
+class BVH:
+    """Bounding volume hierarchy over axis-aligned boxes.
+
+    Primitives are sorted along a Morton curve and the tree is built by
+    splitting sorted ranges in halves, so construction is a handful of
+    vectorized operations per tree level. The tree is stored as flat arrays,
+    each node covering a contiguous range of :attr:`order`, the sorted
+    primitive indices. Refitting and queries process a whole tree level at
+    once.
+
+    Requires NumPy.
+
+    :param mins: Primitive box minimums, shape (N, 3).
+    :type mins: :class:`numpy.ndarray`
+
+    :param maxs: Primitive box maximums, shape (N, 3).
+    :type maxs: :class:`numpy.ndarray`
+
+    :param leaf_size: Maximum number of primitives in a leaf.
+    :type leaf_size: int
+    """
+
+    def __init__(self, mins, maxs, leaf_size=4):
+        np = require_numpy('BVH')
+        mins = np.asarray(mins, dtype='float64')
+        maxs = np.asarray(maxs, dtype='float64')
+        n = len(mins)
+        if n:
+            self.order = np.argsort(
+                morton_codes((mins + maxs) * 0.5), kind='stable')
+        else:
+            self.order = np.zeros(0, dtype='int64')
+
+        starts, counts, lefts, rights, levels = [], [], [], [], []
+        level_starts = np.zeros(1, dtype='int64')
+        level_counts = np.array([n], dtype='int64')
+        next_id = 0
+        while len(level_starts):
+            ids = np.arange(next_id, next_id + len(level_starts))
+            next_id += len(ids)
+            inner = level_counts > leaf_size
+            n_inner = int(inner.sum())
+            left = np.full(len(ids), -1, dtype='int64')
+            right = np.full(len(ids), -1, dtype='int64')
+            left[inner] = next_id + np.arange(n_inner)
+            right[inner] = next_id + n_inner + np.arange(n_inner)
+            starts.append(level_starts)
+            counts.append(level_counts)
+            lefts.append(left)
+            rights.append(right)
+            levels.append(ids)
+
+            half = level_counts[inner] // 2
+            level_starts, level_counts = (
+                np.concatenate([level_starts[inner], level_starts[inner] + half]),
+                np.concatenate([half, level_counts[inner] - half]))
+
+        self.starts = np.concatenate(starts)
+        self.counts = np.concatenate(counts)
+        self.lefts = np.concatenate(lefts)
+        self.rights = np.concatenate(rights)
+        self._levels = levels
+        leaves = np.flatnonzero(self.lefts < 0)
+        self._leaves = leaves[np.argsort(self.starts[leaves], kind='stable')]
+        self.refit(mins, maxs)
+
+    def __len__(self):
+        return len(self.order)
+
+    def refit(self, mins, maxs):
+        """Updates node bounds for moved primitives, keeping tree topology.
+
+        Tree quality degrades as primitives move far from their original
+        places, at some point it's better to build a new tree.
+
+        :param mins: Primitive box minimums, shape (N, 3).
+        :type mins: :class:`numpy.ndarray`
+
+        :param maxs: Primitive box maximums, shape (N, 3).
+        :type maxs: :class:`numpy.ndarray`
+        """
+        np = require_numpy('BVH')
+        self.node_mins = np.zeros((len(self.starts), 3))
+        self.node_maxs = np.zeros((len(self.starts), 3))
+        if not len(self.order):
+            return
+
+        # leaves partition the sorted primitives, reduce each of them at once
+        starts = self.starts[self._leaves]
+        self.node_mins[self._leaves] = np.minimum.reduceat(
+            np.asarray(mins)[self.order], starts)
+        self.node_maxs[self._leaves] = np.maximum.reduceat(
+            np.asarray(maxs)[self.order], starts)
+
+        # then merge children into parents level by level, bottom-up
+        for ids in reversed(self._levels):
+            ids = ids[self.lefts[ids] >= 0]
+            left, right = self.lefts[ids], self.rights[ids]
+            self.node_mins[ids] = np.minimum(self.node_mins[left], self.node_mins[right])
+            self.node_maxs[ids] = np.maximum(self.node_maxs[left], self.node_maxs[right])
+
+    def query(self, classify):
+        """Collects primitives in nodes accepted by a classifier.
+
+        :param classify: Function taking arrays of node box minimums and
+            maximums and returning an integer array with 0 for boxes to reject,
+            1 for boxes to descend into and 2 for boxes to accept entirely.
+        :type classify: callable
+
+        :returns: A tuple of primitive indices which are fully accepted and of
+            candidate primitives from partially accepted leaves, which need to
+            be checked individually.
+        :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`)
+        """
+        np = require_numpy('BVH')
+        accepted = []
+        candidates = []
+        frontier = np.zeros(1 if len(self.order) else 0, dtype='int64')
+        while len(frontier):
+            result = classify(self.node_mins[frontier], self.node_maxs[frontier])
+            accepted.append(frontier[result == 2])
+            partial = frontier[result == 1]
+            is_leaf = self.lefts[partial] < 0
+            candidates.append(partial[is_leaf])
+            inner = partial[~is_leaf]
+            frontier = np.concatenate([self.lefts[inner], self.rights[inner]])
+
+        def collect(nodes):
+            nodes = np.concatenate(nodes) if nodes else np.zeros(0, 'int64')
+            return self.order[expand_ranges(self.starts[nodes], self.counts[nodes])]
+
+        return collect(accepted), collect(candidates)
+
+    def query_many(self, count, test):
+        """Collects candidate primitives for many queries at once.
+
+        Traversal runs over `(query, node)` pairs, so all queries descend one
+        tree level per step.
+
+        :param count: Number of queries.
+        :type count: int
+
+        :param test: Function taking an array of query indices and arrays of
+            node box minimums and maximums and returning a boolean array,
+            telling which query-node pairs to descend into.
+        :type test: callable
+
+        :returns: Query indices and primitive indices of candidate pairs found
+            in leaves passing the test.
+        :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`)
+        """
+        np = require_numpy('BVH')
+        queries = np.arange(count if len(self.order) else 0, dtype='int64')
+        nodes = np.zeros(len(queries), dtype='int64')
+        found_queries = [np.zeros(0, dtype='int64')]
+        found_nodes = [np.zeros(0, dtype='int64')]
+        while len(queries):
+            passed = test(queries, self.node_mins[nodes], self.node_maxs[nodes])
+            queries, nodes = queries[passed], nodes[passed]
+            is_leaf = self.lefts[nodes] < 0
+            found_queries.append(queries[is_leaf])
+            found_nodes.append(nodes[is_leaf])
+            queries, nodes = queries[~is_leaf], nodes[~is_leaf]
+            queries = np.concatenate([queries, queries])
+            nodes = np.concatenate([self.lefts[nodes], self.rights[nodes]])
+
+        queries = np.concatenate(found_queries)
+        nodes = np.concatenate(found_nodes)
+        counts = self.counts[nodes]
+        return (
+            np.repeat(queries, counts),
+            self.order[expand_ranges(self.starts[nodes], counts)])
@@ -0,0 +1,268 @@
+"""Shared resource caches."""
+from collections import namedtuple
+from collections import OrderedDict
+from renderlib.font import Font
+from renderlib.mesh import Mesh
+from renderlib.text import Text
+import mmap
+import os
+import threading
+import weakref
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'bytes_read', 'entries'])
+
+FontCacheStats = namedtuple('FontCacheStats', [
+    'hits',
+    'misses',
+    'bytes_read',
+    'entries',
+    'files',
+    'texture_bytes',
+])
+
+#: Printable ASCII characters.
+ASCII = ''.join(chr(c) for c in range(32, 127))
+
+
+class MeshCache:
+    """Cache of meshes loaded from files.
+
+    Meshes are keyed by real path and modification time of the file, so an
+    updated file is loaded again. The cache holds only weak references, a
+    mesh is freed as soon as the last user drops it. Returned meshes are
+    shared, thus their transform must not be modified by the users.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meshes = weakref.WeakValueDictionary()
+        self._hits = self._misses = self._bytes_read = 0
+
+    def get(self, filename, data=None):
+        """Returns a mesh for given file, loading it if necessary.
+
+        :param filename: Path to mesh file.
+        :type filename: str
+
+        :param data: File contents if already read, e.g. on a worker thread.
+        :type data: bytes
+
+        :returns: Shared mesh instance.
+        :rtype: :class:`renderlib.mesh.Mesh`
+        """
+        path = os.path.realpath(filename)
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            raise RuntimeError('failed to load mesh from file')
+
+        with self._lock:
+            mesh = self._meshes.get(key)
+            if mesh is not None:
+                self._hits += 1
+                return mesh
+
+        # load outside of the lock so that different files can be loaded
+        # concurrently; the mesh doesn't reference the mapped data, which is
+        # only passed to the C library
+        try:
+            if data is not None:
+                size = len(data)
+                mesh = Mesh.from_buffer(data)
+            else:
+                with open(path, 'rb') as fp, \
+                        mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) \
+                        as data:
+                    size = len(data)
+                    mesh = Mesh.from_buffer(data)
+        except (OSError, ValueError, BufferError):
+            raise RuntimeError('failed to load mesh from file')
+        mesh._geometry_source = path
+
+        with self._lock:
+            self._misses += 1
+            self._bytes_read += size
+            # another thread could have loaded the same file meanwhile
+            return self._meshes.setdefault(key, mesh)
+
+    def clear(self):
+        """Forgets all cached meshes and resets the statistics."""
+        with self._lock:
+            self._meshes.clear()
+            self._hits = self._misses = self._bytes_read = 0
+
+    @property
+    def stats(self):
+        """Cache statistics.
+
+        :rtype: :class:`CacheStats`
+        """
+        with self._lock:
+            return CacheStats(
+                self._hits,
+                self._misses,
+                self._bytes_read,
+                len(self._meshes))
+
+
+#: Process-wide mesh cache.
+mesh_cache = MeshCache()
+
+
+class _FontFile:
+    """Memory-mapped font file shared by fonts of different sizes."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as fp:
+            self.data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class FontCache:
+    """Cache of fonts loaded from files.
+
+    Fonts are keyed by real path and modification time of the file and point
+    size. Fonts of all sizes of a file are loaded from a single memory-mapped
+    buffer. Like :class:`MeshCache`, the cache references fonts weakly, but in
+    addition it keeps the recently used ones alive within a budget of glyph
+    texture memory, evicting least recently used fonts over it. The C library
+    doesn't expose glyph textures, so their size is estimated as one byte per
+    pixel of a point size square per glyph, counting printable ASCII glyphs and
+    those pre-warmed with :meth:`prewarm`.
+
+    :param budget: Glyph texture memory budget in bytes.
+    :type budget: int
+    """
+
+    def __init__(self, budget=16 * 1024 * 1024):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._fonts = weakref.WeakValueDictionary()
+        self._files = weakref.WeakValueDictionary()
+        self._glyphs = {}
+        self._recent = OrderedDict()
+        self._evicted = []
+        self._hits = self._misses = self._bytes_read = 0
+
+    def _key(self, filename, ptsize):
+        path = os.path.realpath(filename)
+        try:
+            return (path, os.stat(path).st_mtime_ns, ptsize)
+        except OSError:
+            raise RuntimeError('failed to load font from file')
+
+    def _texture_bytes(self, key):
+        return len(self._glyphs.get(key, ASCII)) * key[2] * key[2]
+
+    def _touch(self, key, font):
+        # keeps the font alive and evicts least recently used ones over budget
+        self._recent[key] = font
+        self._recent.move_to_end(key)
+        total = sum(self._texture_bytes(k) for k in self._recent)
+        while total > self.budget and len(self._recent) > 1:
+            old, _ = self._recent.popitem(last=False)
+            total -= self._texture_bytes(old)
+            self._evicted.append((old[0], old[2]))
+
+    def get(self, filename, ptsize):
+        """Returns a font for given file and size, loading it if necessary.
+
+        :param filename: Path to font file.
+        :type filename: str
+
+        :param ptsize: Point size.
+        :type ptsize: int
+
+        :returns: Shared font instance.
+        :rtype: :class:`renderlib.font.Font`
+        """
+        key = self._key(filename, ptsize)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._hits += 1
+                self._touch(key, font)
+                return font
+            self._misses += 1
+
+            # fonts are small, loading under the lock keeps file sharing simple
+            file = self._files.get(key[:2])
+            try:
+                if file is None:
+                    file = _FontFile(key[0])
+                    self._bytes_read += len(file.data)
+                    self._files[key[:2]] = file
+                font = Font.from_buffer(file.data, ptsize)
+            except (OSError, ValueError):
+                raise RuntimeError('failed to load font from file')
+            font._file = file
+            self._fonts[key] = font
+            self._touch(key, font)
+            return font
+
+    def prewarm(self, filename, ptsize, chars=ASCII):
+        """Loads a font and renders given characters, so that their glyphs
+        are ready when first displayed.
+
+        Must be called on the thread owning the OpenGL context.
+
+        :param filename: Path to font file.
+        :type filename: str
+
+        :param ptsize: Point size.
+        :type ptsize: int
+
+        :param chars: Characters to render.
+        :type chars: str
+
+        :rtype: :class:`renderlib.font.Font`
+        """
+        font = self.get(filename, ptsize)
+        Text(font, ''.join(sorted(set(chars))))
+        key = self._key(filename, ptsize)
+        with self._lock:
+            self._glyphs[key] = set(self._glyphs.get(key, ASCII)) | set(chars)
+            if key in self._recent:
+                self._touch(key, font)
+        return font
+
+    def evicted(self):
+        """Returns and forgets `(path, ptsize)` pairs of fonts evicted since the
+        last call.
+
+        Evicted fonts are freed once their last user drops them.
+
+        :rtype: list
+        """
+        with self._lock:
+            evicted, self._evicted = self._evicted, []
+            return evicted
+
+    def clear(self):
+        """Forgets all cached fonts and resets the statistics."""
+        with self._lock:
+            self._fonts.clear()
+            self._files.clear()
+            self._glyphs.clear()
+            self._recent.clear()
+            self._evicted = []
+            self._hits = self._misses = self._bytes_read = 0
+
+    @property
+    def stats(self):
+        """Cache statistics; texture memory counts fonts kept alive by the
+        cache.
+
+        :rtype: :class:`FontCacheStats`
+        """
+        with self._lock:
+            return FontCacheStats(
+                self._hits,
+                self._misses,
+                self._bytes_read,
+                len(self._fonts),
+                len(self._files),
+                sum(self._texture_bytes(k) for k in self._recent))
+
+
+#: Process-wide font cache.
+font_cache = FontCache()
@@ -4,6 +4,9 @@ from _renderlib import lib
 from abc import ABC
 from matlib.mat import Mat
 from matlib.vec import Vec
+from renderlib.arrays import mat_to_ndarray
+from renderlib.arrays import require_numpy
+from renderlib.frustum import Frustum
 
 
 class Camera(ABC):
@@ -14,6 +17,48 @@ class Camera(ABC):
         self._view.ident()
         self._projection = Mat(ptr=ffi.addressof(self._ptr, 'projection'))
         self._projection.ident()
+        self._matrices_key = None
+        self._clip = Vec(0, 0, 0, 1)
+
+    def _update_matrices(self):
+        """Updates cached camera matrices if camera data has changed.
+
+        The cache is keyed by raw camera data, so in-place changes of
+        :attr:`view`, :attr:`projection` or :attr:`position` invalidate it as
+        well as assignments.
+        """
+        key = bytes(ffi.buffer(self._ptr))
+        if key != self._matrices_key:
+            view = Mat()
+            projection = Mat()
+            lib.camera_get_matrices(self._ptr, view._ptr, projection._ptr)
+            self._view_projection = projection * view
+            self._inverse_view_projection = self._view_projection.inverse()
+            self._inverse_view_projection_array = None
+            self._frustum = None
+            self._matrices_key = key
+
+    def _inverse_view_projection_ndarray(self):
+        self._update_matrices()
+        if self._inverse_view_projection_array is None:
+            self._inverse_view_projection_array = mat_to_ndarray(
+                self._inverse_view_projection)
+        return self._inverse_view_projection_array
+
+    @property
+    def frustum(self):
+        """View frustum in world coordinates.
+
+        Planes are extracted from camera matrices on first access and cached
+        until the camera changes. Requires NumPy.
+
+        :rtype: :class:`renderlib.frustum.Frustum`
+        """
+        self._update_matrices()
+        if self._frustum is None:
+            self._frustum = Frustum.from_matrix(
+                mat_to_ndarray(self._view_projection))
+        return self._frustum
 
     @property
     def position(self):
@@ -75,19 +120,14 @@ class Camera(ABC):
         :returns: Unprojected point in world coordinates.
         :rtype: :class:`matlib.Vec`
         """
-        view = Mat()
-        projection = Mat()
-        lib.camera_get_matrices(self._ptr, view._ptr, projection._ptr)
-
-        x_ndc = 2.0 * vx / vw - 1.0
-        y_ndc = 1.0 - (2.0 * vy) / vh
-        z_ndc = 2 * vz - 1
-        w_ndc = 1.0
-        v_clip = Vec(x_ndc, y_ndc, z_ndc, w_ndc)
-
-        m = (projection * view).inverse()
-
-        out = m * v_clip
+        self._update_matrices()
+        clip = self._clip
+        clip.x = 2.0 * vx / vw - 1.0
+        clip.y = 1.0 - (2.0 * vy) / vh
+        clip.z = 2 * vz - 1
+        clip.w = 1.0
+
+        out = self._inverse_view_projection * clip
         out.w = 1.0 / out.w
         out.x *= out.w
         out.y *= out.w
@@ -120,6 +160,64 @@ class Camera(ABC):
         ray.norm()
         return p1, ray
 
+    def unproject_many(self, points, vw, vh):
+        """Unprojects many points in viewport coordinates into world
+        coordinates at once.
+
+        Requires NumPy.
+
+        :param points: Viewport X, Y and Z coordinates, Z in range [0, 1],
+            shape (N, 3).
+        :type points: :class:`numpy.ndarray` or sequence
+
+        :param vw: Viewport width.
+        :type vw: float
+
+        :param vh: Viewport height.
+        :type vh: float
+
+        :returns: Unprojected points in world coordinates, shape (N, 3).
+        :rtype: :class:`numpy.ndarray`
+        """
+        np = require_numpy('batched unprojection')
+        points = np.asarray(points, dtype='float64').reshape(-1, 3)
+        clip = np.empty((len(points), 4))
+        clip[:, 0] = 2.0 * points[:, 0] / vw - 1.0
+        clip[:, 1] = 1.0 - (2.0 * points[:, 1]) / vh
+        clip[:, 2] = 2.0 * points[:, 2] - 1.0
+        clip[:, 3] = 1.0
+        out = clip @ self._inverse_view_projection_ndarray().T
+        return out[:, :3] / out[:, 3:]
+
+    def trace_rays(self, points, vw, vh):
+        """Traces rays from many viewport points "into the screen" at once.
+
+        Requires NumPy.
+
+        :param points: Viewport X and Y coordinates, shape (N, 2).
+        :type points: :class:`numpy.ndarray` or sequence
+
+        :param vw: Viewport width.
+        :type vw: float
+
+        :param vh: Viewport height.
+        :type vh: float
+
+        :returns: Arrays of ray origins and normalized directions, shape (N, 3)
+            each.
+        :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`)
+        """
+        np = require_numpy('batched unprojection')
+        points = np.asarray(points, dtype='float64').reshape(-1, 2)
+        near = np.zeros((len(points), 3))
+        near[:, :2] = points
+        far = near.copy()
+        far[:, 2] = 1.0
+        origins = self.unproject_many(near, vw, vh)
+        directions = self.unproject_many(far, vw, vh) - origins
+        directions /= np.linalg.norm(directions, axis=1)[:, None]
+        return origins, directions
+
 
 class OrthographicCamera(Camera):
     def __init__(self, left, right, top, bottom, near, far):
@@ -1,23 +1,163 @@
 """Font wrappers"""
+from _renderlib import ffi
 from _renderlib import lib
+from renderlib.ttf import FontMetrics
+import re
 
 class Font:
-    def __init__(self, ptr):
+    def __init__(self, ptr, ptsize=None, source=None):
         self._ptr = ptr
+        self._ptsize = ptsize
+        self._source = source
+        self._buffer = None
+        self._metrics = None
 
     def __del__(self):
         lib.font_free(self._ptr)
 
+    @property
+    def ptsize(self):
+        return self._ptsize
+
     @classmethod
     def from_file(cls, filename, ptsize):
         ptr = lib.font_from_file(filename.encode('utf8'), ptsize)
         if not ptr:
             raise RuntimeError('failed to load font from file')
-        return Font(ptr)
+        return Font(ptr, ptsize, filename)
 
     @classmethod
     def from_buffer(cls, buf, ptsize):
-        ptr = lib.font_from_buffer(buf, len(buf), ptsize)
+        """Loads a font from a buffer.
+
+        The buffer is referenced by the font until it's freed, so it can be
+        a memory-mapped file shared by fonts of different sizes.
+
+        :param buf: Font file contents.
+        :type buf: buffer
+
+        :param ptsize: Point size.
+        :type ptsize: int
+
+        :rtype: :class:`Font`
+        """
+        data = ffi.from_buffer(buf)
+        ptr = lib.font_from_buffer(data, len(data), ptsize)
         if not ptr:
             raise RuntimeError('failed to load font from buffer')
-        return Font(ptr)
\ No newline at end of file
+        font = Font(ptr, ptsize, buf)
+        font._buffer = data
+        return font
+
+    @property
+    def metrics(self):
+        """Glyph metrics of the font, read from its source data on first
+        access.
+
+        :rtype: :class:`renderlib.ttf.FontMetrics`
+        """
+        if self._metrics is None:
+            src = self._source
+            if src is None or self._ptsize is None:
+                raise RuntimeError('font source data is not available')
+            if isinstance(src, str):
+                with open(src, 'rb') as fp:
+                    src = fp.read()
+            self._metrics = FontMetrics(src, self._ptsize)
+        return self._metrics
+
+    def measure(self, string):
+        """Measures a string using glyph metrics only, without creating any
+        text or OpenGL resources.
+
+        Lines are separated by newlines.
+
+        :param string: String to measure.
+        :type string: str
+
+        :returns: Width and height in pixels.
+        :rtype: (int, int)
+        """
+        metrics = self.metrics
+        lines = string.split('\n')
+        return (
+            max(metrics.width(line) for line in lines),
+            metrics.line_height * len(lines))
+
+    def measure_many(self, strings):
+        """Measures many strings, see :meth:`measure`.
+
+        :param strings: Strings to measure.
+        :type strings: iterable
+
+        :returns: Width and height of each string.
+        :rtype: list
+        """
+        measure = self.measure
+        return [measure(s) for s in strings]
+
+    def _fit(self, line, width):
+        # number of leading characters fitting into width
+        widths = self.metrics.prefix_widths(line)
+        n = 0
+        while n < len(line) and widths[n + 1] <= width:
+            n += 1
+        return n
+
+    def wrap(self, string, width):
+        """Breaks a string into lines not wider than given width.
+
+        Lines are broken at spaces, words wider than a line are broken at
+        characters.
+
+        :param string: String to wrap.
+        :type string: str
+
+        :param width: Maximum line width in pixels.
+        :type width: int
+
+        :returns: Lines.
+        :rtype: list
+        """
+        metrics = self.metrics
+        lines = []
+        for paragraph in string.split('\n'):
+            line = ''
+            for word in re.findall(r'\S+\s*', paragraph):
+                if line and metrics.width((line + word).rstrip()) > width:
+                    lines.append(line.rstrip())
+                    line = ''
+                line += word
+                while len(line) > 1 and metrics.width(line.rstrip()) > width:
+                    n = max(self._fit(line, width), 1)
+                    lines.append(line[:n])
+                    line = line[n:]
+            lines.append(line.rstrip())
+        return lines
+
+    def truncate(self, string, width, ellipsis='...'):
+        """Shortens a single line string to given width, appending an
+        ellipsis if it was cut.
+
+        :param string: String to truncate.
+        :type string: str
+
+        :param width: Maximum width in pixels.
+        :type width: int
+
+        :param ellipsis: String appended to truncated strings.
+        :type ellipsis: str
+
+        :rtype: str
+        """
+        metrics = self.metrics
+        if metrics.width(string) <= width:
+            return string
+        if metrics.width(ellipsis) > width:
+            return ''
+        # widths are rounded once per line, so the shortened string is
+        # measured along with the ellipsis
+        n = self._fit(string, width)
+        while n and metrics.width(string[:n].rstrip() + ellipsis) > width:
+            n -= 1
+        return string[:n].rstrip() + ellipsis
@@ -0,0 +1,106 @@
+"""View frustum."""
+from renderlib.arrays import require_numpy
+
+#: Box classification results, see :meth:`Frustum.classify_aabbs`.
+OUTSIDE = 0
+INTERSECTING = 1
+INSIDE = 2
+
+
+class Frustum:
+    """View frustum represented by six planes.
+
+    Requires NumPy.
+
+    :param planes: Plane equations `(a, b, c, d)` with normals pointing
+        inside, shape (6, 4), in left, right, bottom, top, near, far order.
+    :type planes: :class:`numpy.ndarray`
+    """
+
+    def __init__(self, planes):
+        self.planes = planes
+
+    @classmethod
+    def from_matrix(cls, m):
+        """Extracts frustum planes from a view-projection matrix.
+
+        :param m: Matrix mapping world coordinates to clip space, with
+            `clip = m @ (x, y, z, 1)`.
+        :type m: :class:`numpy.ndarray`
+
+        :rtype: :class:`Frustum`
+        """
+        np = require_numpy('frustum')
+        m = np.asarray(m, dtype='float64')
+        planes = np.array([
+            m[3] + m[0],
+            m[3] - m[0],
+            m[3] + m[1],
+            m[3] - m[1],
+            m[3] + m[2],
+            m[3] - m[2],
+        ])
+        planes /= np.linalg.norm(planes[:, :3], axis=1)[:, None]
+        return cls(planes)
+
+    def test_spheres(self, centers, radii):
+        """Tests which spheres are at least partially inside the frustum.
+
+        :param centers: Sphere centers, shape (N, 3).
+        :type centers: :class:`numpy.ndarray`
+
+        :param radii: Sphere radii, shape (N,).
+        :type radii: :class:`numpy.ndarray`
+
+        :rtype: :class:`numpy.ndarray` of bool
+        """
+        np = require_numpy('frustum')
+        distances = np.asarray(centers) @ self.planes[:, :3].T + self.planes[:, 3]
+        return (distances >= -np.asarray(radii)[:, None]).all(axis=1)
+
+    def test_aabbs(self, mins, maxs):
+        """Tests which axis-aligned boxes are at least partially inside the
+        frustum.
+
+        The test is conservative, see :meth:`classify_aabbs`.
+
+        :param mins: Box minimums, shape (N, 3).
+        :type mins: :class:`numpy.ndarray`
+
+        :param maxs: Box maximums, shape (N, 3).
+        :type maxs: :class:`numpy.ndarray`
+
+        :rtype: :class:`numpy.ndarray` of bool
+        """
+        return self.classify_aabbs(mins, maxs) != OUTSIDE
+
+    def classify_aabbs(self, mins, maxs):
+        """Classifies axis-aligned boxes against the frustum.
+
+        The test is conservative: boxes near frustum corners can be reported as
+        intersecting while being outside.
+
+        :param mins: Box minimums, shape (N, 3).
+        :type mins: :class:`numpy.ndarray`
+
+        :param maxs: Box maximums, shape (N, 3).
+        :type maxs: :class:`numpy.ndarray`
+
+        :returns: :data:`OUTSIDE`, :data:`INTERSECTING` or :data:`INSIDE` for
+            each box.
+        :rtype: :class:`numpy.ndarray` of int
+        """
+        np = require_numpy('frustum')
+        mins = np.asarray(mins)[:, None, :]
+        maxs = np.asarray(maxs)[:, None, :]
+        normals = self.planes[None, :, :3]
+        positive = normals >= 0
+        # the box corners farthest along and against each plane normal
+        far = np.where(positive, maxs, mins)
+        near = np.where(positive, mins, maxs)
+        far_dist = (far * normals).sum(axis=2) + self.planes[:, 3]
+        near_dist = (near * normals).sum(axis=2) + self.planes[:, 3]
+        result = np.full(len(far_dist), INTERSECTING)
+        result[(near_dist >= 0).all(axis=1)] = INSIDE
+        result[(far_dist < 0).any(axis=1)] = OUTSIDE
+        return result
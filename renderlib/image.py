@@ -1,6 +1,8 @@
 """Image wrappers"""
 from enum import IntEnum
 from _renderlib import lib
+from renderlib.workers import get_executor
+import asyncio
 
 class Image:
 
@@ -26,6 +28,16 @@ class Image:
     def height(self):
         return self._ptr.height
 
+    @property
+    def format(self):
+        return Image.Format(self._ptr.format)
+
+    @property
+    def nbytes(self):
+        """Size of decoded pixel data in bytes."""
+        bpp = 4 if self._ptr.format == lib.IMAGE_FORMAT_RGBA else 3
+        return self._ptr.width * self._ptr.height * bpp
+
     @classmethod
     def from_file(cls, filename):
         ptr = lib.image_from_file(filename.encode('utf8'))
@@ -38,4 +50,41 @@ class Image:
         ptr = lib.image_from_buffer(buf, len(buf), codec)
         if not ptr:
             raise RuntimeError('failed to load image from buffer')
-        return Image(ptr)
\ No newline at end of file
+        return Image(ptr)
+
+    @classmethod
+    async def load_async(cls, filename, executor=None):
+        """Loads an image from file in a worker thread.
+
+        :param filename: Path to image file.
+        :type filename: str
+
+        :param executor: Executor to decode the image in, by default the shared
+            pool from :func:`renderlib.workers.get_executor`.
+        :type executor: :class:`concurrent.futures.Executor`
+
+        :rtype: :class:`Image`
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor or get_executor(), cls.from_file, filename)
+
+    @classmethod
+    async def decode_async(cls, buf, codec, executor=None):
+        """Decodes an image from buffer in a worker thread.
+
+        :param buf: Encoded image data.
+        :type buf: bytes
+
+        :param codec: Image codec.
+        :type codec: :class:`Image.Codec`
+
+        :param executor: Executor to decode the image in, by default the shared
+            pool from :func:`renderlib.workers.get_executor`.
+        :type executor: :class:`concurrent.futures.Executor`
+
+        :rtype: :class:`Image`
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor or get_executor(), cls.from_buffer, buf, codec)
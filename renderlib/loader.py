@@ -0,0 +1,162 @@
+"""Parallel asset loading."""
+from concurrent.futures import wait
+from renderlib.font import Font
+from renderlib.image import Image
+from renderlib.mesh import Mesh
+from renderlib.texture import Texture
+from renderlib.trace import span
+from renderlib.workers import get_executor
+
+
+class AssetBatch:
+    """A set of assets being loaded by :class:`AssetLoader`."""
+
+    def __init__(self, loader, manifest, futures):
+        self._loader = loader
+        self._manifest = manifest
+        self._futures = futures
+
+    @property
+    def futures(self):
+        """Futures of CPU-side loading results, keyed by asset name.
+
+        Mesh and font futures resolve to file contents and texture futures to
+        decoded :class:`renderlib.image.Image` objects; meshes, fonts and
+        textures are created by :meth:`result`.
+
+        :rtype: dict
+        """
+        return self._futures
+
+    @property
+    def progress(self):
+        """Number of completed and total assets.
+
+        :rtype: (int, int)
+        """
+        done = sum(1 for f in self._futures.values() if f.done())
+        return done, len(self._futures)
+
+    def done(self):
+        """Returns whether all CPU-side loading is completed.
+
+        :rtype: bool
+        """
+        return all(f.done() for f in self._futures.values())
+
+    def result(self, timeout=None):
+        """Waits for loading to complete and returns the assets.
+
+        Meshes, fonts and textures are created here, thus this method must be
+        called from the thread owning the OpenGL context.
+
+        :param timeout: Maximum time in seconds to wait or `None` to wait
+            indefinitely.
+        :type timeout: float
+
+        :returns: Loaded assets keyed by name.
+        :rtype: dict
+        """
+        _, pending = wait(self._futures.values(), timeout)
+        if pending:
+            raise TimeoutError('{} assets not loaded'.format(len(pending)))
+
+        return {
+            name: self._loader._create(future.result(), *self._manifest[name])
+            for name, future in self._futures.items()
+        }
+
+
+def _read_file(filename):
+    try:
+        with open(filename, 'rb') as fp:
+            return fp.read()
+    except OSError:
+        raise RuntimeError('failed to read file "{}"'.format(filename))
+
+
+def _load(kind, reader, filename):
+    with span('load ' + kind, 'asset', filename=filename):
+        return reader(filename)
+
+
+class AssetLoader:
+    """Loads meshes, images, fonts and textures in a thread pool.
+
+    A manifest maps asset names to specification tuples of form
+    `(kind, filename, *args)`:
+
+    * `('mesh', filename)`
+    * `('image', filename)`
+    * `('font', filename, ptsize)`
+    * `('texture', filename, tex_type)`
+
+    The pool only reads files and decodes images. Meshes, fonts and textures
+    own OpenGL resources, so they are created on the calling thread by
+    :meth:`AssetBatch.result`.
+
+    :param executor: Executor to use, by default the shared pool from
+        :func:`renderlib.workers.get_executor`.
+    :type executor: :class:`concurrent.futures.Executor`
+
+    :param mesh_cache: Cache to load meshes through.
+    :type mesh_cache: :class:`renderlib.cache.MeshCache`
+    """
+
+    def __init__(self, executor=None, mesh_cache=None):
+        self._executor = executor or get_executor()
+        self._mesh_cache = mesh_cache
+        self._readers = {
+            'mesh': _read_file,
+            'image': Image.from_file,
+            'font': _read_file,
+            'texture': Image.from_file,
+        }
+
+    def _create(self, result, kind, filename, *args):
+        """Creates an asset from the result of its reader."""
+        if kind == 'mesh':
+            if self._mesh_cache:
+                return self._mesh_cache.get(filename, result)
+            mesh = Mesh.from_buffer(result)
+            mesh._geometry_source = filename
+            return mesh
+        if kind == 'font':
+            return Font.from_buffer(result, *args)
+        if kind == 'texture':
+            return Texture.from_image(result, *args)
+        return result
+
+    def submit(self, kind, filename, *args):
+        """Schedules loading of a single asset.
+
+        :param kind: Asset kind.
+        :type kind: str
+
+        :param filename: Path to asset file.
+        :type filename: str
+
+        :returns: Future of CPU-side loading result; other specification
+            arguments are only used by :meth:`AssetBatch.result`.
+        :rtype: :class:`concurrent.futures.Future`
+        """
+        try:
+            reader = self._readers[kind]
+        except KeyError:
+            raise RuntimeError('unknown asset kind "{}"'.format(kind))
+        return self._executor.submit(_load, kind, reader, filename)
+
+    def load(self, manifest):
+        """Schedules loading of all assets in given manifest.
+
+        :param manifest: Asset specifications keyed by name.
+        :type manifest: dict
+
+        :returns: The batch of assets being loaded.
+        :rtype: :class:`AssetBatch`
+        """
+        futures = {
+            name: self.submit(*spec)
+            for name, spec in manifest.items()
+        }
+        return AssetBatch(self, manifest, futures)
@@ -2,34 +2,163 @@
 from _renderlib import ffi
 from _renderlib import lib
 from renderlib.animation import Animation
+from renderlib.arrays import as_cdata
+from renderlib.arrays import as_ndarray
+from renderlib.arrays import mat_to_ndarray
+from renderlib.arrays import require_numpy
+from renderlib.meshfile import MeshData
+from renderlib.meshfile import read_mesh_file
+from renderlib.picking import TriangleBVH
+from renderlib.skinning import animated_aabb
+from renderlib.stats import MESH_VERTEX_SIZE
+from renderlib.stats import record_upload
 from matlib.mat import Mat
+from collections import namedtuple
+import weakref
+
+#: Bounding volumes: axis-aligned box minimum and maximum, sphere center and
+#: radius.
+Bounds = namedtuple('Bounds', ['min', 'max', 'center', 'radius'])
+
+
+def _transform_bounds(m, lo, hi, radius):
+    np = require_numpy('mesh bounds')
+    corners = np.array([
+        (x, y, z, 1.0)
+        for x in (lo[0], hi[0])
+        for y in (lo[1], hi[1])
+        for z in (lo[2], hi[2])
+    ]) @ m.T
+    center = m @ np.append((lo + hi) * 0.5, 1.0)
+    return Bounds(
+        corners[:, :3].min(axis=0),
+        corners[:, :3].max(axis=0),
+        center[:3],
+        radius * float(np.linalg.norm(m[:3, :3], 2)))
+
+
+def _bind_bounds(positions):
+    """Returns box minimum, maximum and bounding sphere radius of vertex
+    positions."""
+    np = require_numpy('mesh bounds')
+    lo, hi = positions.min(axis=0), positions.max(axis=0)
+    radius = np.linalg.norm(positions - (lo + hi) * 0.5, axis=1).max()
+    return lo.astype('float64'), hi.astype('float64'), float(radius)
+
+
+def validate_mesh_data(vertices, indices, normals=None, uvs=None,
+        joint_weights=None, tolerance=1e-3):
+    """Checks mesh data for values which would make the mesh invalid.
+
+    All checks are done as batched NumPy operations, so this is cheap even for
+    meshes with millions of vertices.
+
+    :param vertices: Vertex positions.
+    :type vertices: list or buffer of float triplets
+
+    :param indices: Triangle vertex indices.
+    :type indices: list or buffer of uint32
+
+    :param normals: Vertex normals.
+    :type normals: list or buffer of float triplets
+
+    :param uvs: Vertex texture coordinates.
+    :type uvs: list or buffer of float pairs
+
+    :param joint_weights: Vertex joint weights.
+    :type joint_weights: list or buffer of uint8 quadruplets
+
+    :param tolerance: Allowed deviation of squared normal length from 1.
+    :type tolerance: float
+
+    :raises RuntimeError: On the first failed check, the message includes the
+        offending element index.
+    """
+    np = require_numpy('mesh data validation')
+
+    def first(mask):
+        return int(np.flatnonzero(mask)[0])
+
+    v = as_ndarray('float32', 3, vertices)
+    bad = ~np.isfinite(v).all(axis=1)
+    if bad.any():
+        raise RuntimeError('non-finite vertex #{}'.format(first(bad)))
+
+    i = as_ndarray('uint32', 1, indices).ravel()
+    bad = i >= len(v)
+    if bad.any():
+        raise RuntimeError('index #{} out of range: {} >= {}'.format(
+            first(bad), i[first(bad)], len(v)))
+
+    if normals is not None and len(normals):
+        n = as_ndarray('float32', 3, normals)
+        bad = ~(np.abs(np.einsum('ij,ij->i', n, n) - 1.0) <= tolerance)
+        if bad.any():
+            raise RuntimeError('non-normalized normal #{}'.format(first(bad)))
+
+    if uvs is not None and len(uvs):
+        uv = as_ndarray('float32', 2, uvs)
+        bad = ~np.isfinite(uv).all(axis=1)
+        if bad.any():
+            raise RuntimeError('non-finite UV #{}'.format(first(bad)))
+
+    if joint_weights is not None and len(joint_weights):
+        w = as_ndarray('uint8', 4, joint_weights)
+        # quantized weights may be off by one due to rounding
+        bad = np.abs(w.sum(axis=1, dtype='int32') - 255) > 1
+        if bad.any():
+            raise RuntimeError(
+                'joint weights of vertex #{} do not sum to 255'.format(
+                    first(bad)))
 
 
 class Mesh:
+    """Mesh uploaded to the GPU.
+
+    Meshes created from vertex data compute their bounds right away and don't
+    keep the data, unless `pickable` is set, in which case a copy of vertex
+    positions and indices is kept for :meth:`renderlib.scene.Scene.pick`.
+    Meshes loaded from a file or from `bytes` read their bounds and picking
+    data from it on first use.
+
+    :param pickable: Whether to keep positions and indices for picking.
+    :type pickable: bool
+    """
+
     def __init__(self, vertices=None, indices=None, normals=None, uvs=None,
-            joint_ids=None, joint_weights=None, ptr=None):
+            joint_ids=None, joint_weights=None, ptr=None, validate=False,
+            pickable=False):
         self._ptr = None
+        self._geometry_source = None
+        self._raw_bind_bounds = None
+        self._raw_anim_bounds = {}
+        self._transform_key = self._transform_matrix_cache = None
+        self._radius = self._radius_key = None
+        self._triangles = None
         if not ptr:
             # check constraints
-            if not vertices or not indices:
+            if vertices is None or indices is None:
                 raise RuntimeError('vertex and index data is required')
-            if len(vertices) < 3 or len(indices) % 3:
+
+            vdata, vcount = as_cdata('float', 3, vertices)
+            idata, icount = as_cdata('uint32_t', 1, indices)
+            ndata, ncount = as_cdata('float', 3, normals)
+            udata, ucount = as_cdata('float', 2, uvs)
+            jidata, jicount = as_cdata('uint8_t', 4, joint_ids)
+            jwdata, jwcount = as_cdata('uint8_t', 4, joint_weights)
+
+            if vcount < 3 or icount % 3:
                 raise RuntimeError('invalid vertex and/or index data')
-            if normals and len(normals) != len(vertices):
+            if ncount and ncount != vcount:
                 raise RuntimeError('invalid index data')
-            if uvs and len(uvs) != len(vertices):
+            if ucount and ucount != vcount:
                 raise RuntimeError('invalid UV data')
-            if any([joint_ids, joint_weights]):
-                if not all([joint_ids, joint_weights]) or \
-                        len(joint_ids) != len(joint_weights):
+            if jicount or jwcount:
+                if not (jicount and jwcount) or jicount != jwcount:
                     raise RuntimeError('inconsistent joint data')
-
-            vdata = ffi.new('float[][3]', vertices)
-            idata = ffi.new('uint32_t[]', indices)
-            udata = ffi.new('float[][2]', uvs) if uvs else ffi.NULL
-            ndata = ffi.new('float[][3]', normals) if normals else ffi.NULL
-            jidata = ffi.new('uint8_t[][4]', joint_ids) if joint_ids else ffi.NULL
-            jwdata = ffi.new('uint8_t[][4]', joint_weights) if joint_weights else ffi.NULL
+            if validate:
+                validate_mesh_data(
+                    vertices, indices, normals, uvs, joint_weights)
 
             ptr = lib.mesh_new(
                 vdata,
@@ -37,15 +166,22 @@ class Mesh:
                 udata,
                 jidata,
                 jwdata,
-                len(vertices),
+                vcount,
                 idata,
-                len(indices))
+                icount)
             if not ptr:
                 raise RuntimeError('failed to create mesh')
+            self._set_geometry(vertices, indices, pickable)
 
         self._ptr = ptr
+        record_upload(
+            ptr.vertex_count * MESH_VERTEX_SIZE +
+            ptr.index_count * ffi.sizeof('uint32_t'))
         self._animations = [
-            Animation(animptr=ffi.addressof(self._ptr.animations, i))
+            Animation(
+                animptr=ffi.addressof(self._ptr.animations, i),
+                mesh=weakref.ref(self),
+                index=i)
             for i in range(self._ptr.anim_count)
         ]
         self._transform = Mat(ptr=ffi.addressof(self._ptr, 'transform'))
@@ -58,14 +194,143 @@ class Mesh:
         ptr = lib.mesh_from_file(filename.encode('utf8'))
         if not ptr:
             raise RuntimeError('failed to load mesh from file')
-        return Mesh(ptr=ptr)
+        mesh = Mesh(ptr=ptr)
+        mesh._geometry_source = filename
+        return mesh
 
     @classmethod
     def from_buffer(cls, buf):
-        ptr = lib.mesh_from_buffer(buf, len(buf))
+        with ffi.from_buffer(buf) as data:
+            ptr = lib.mesh_from_buffer(data, len(data))
         if not ptr:
             raise RuntimeError('failed to load mesh from buffer')
-        return Mesh(ptr=ptr)
+        mesh = Mesh(ptr=ptr)
+        if isinstance(buf, bytes):
+            mesh._geometry_source = buf
+        return mesh
+
+    def _set_geometry(self, vertices, indices, pickable):
+        """Computes bounds from vertex data and, for pickable meshes, keeps a
+        copy of positions and indices, so later changes to the given buffers
+        don't affect the mesh. Without NumPy neither is available."""
+        try:
+            positions = as_ndarray('float32', 3, vertices)
+        except RuntimeError:
+            return
+        self._raw_bind_bounds = _bind_bounds(positions)
+        if pickable:
+            self._geometry_source = MeshData(
+                positions.copy(),
+                as_ndarray('uint32', 1, indices).ravel().copy())
+
+    def _mesh_data(self):
+        """Returns source data of the mesh or `None` if it's not available."""
+        src = self._geometry_source
+        if src is None or isinstance(src, MeshData):
+            return src
+        if isinstance(src, str):
+            with open(src, 'rb') as fp:
+                src = fp.read()
+        return read_mesh_file(src)
+
+    def _require_mesh_data(self):
+        data = self._mesh_data()
+        if data is None:
+            raise RuntimeError('mesh source data is not available')
+        return data
+
+    def _raw_bounds(self):
+        """Returns bind pose box minimum, maximum and bounding sphere radius,
+        not taking the transform into account."""
+        if self._raw_bind_bounds is None:
+            src = self._geometry_source
+            if isinstance(src, str):
+                with open(src, 'rb') as fp:
+                    src = fp.read()
+            elif src is None:
+                raise RuntimeError('mesh source data is not available')
+            self._raw_bind_bounds = _bind_bounds(
+                read_mesh_file(src, geometry_only=True).positions)
+        return self._raw_bind_bounds
+
+    def _raw_animation_bounds(self, index):
+        """Returns animated box minimum, maximum and bounding sphere radius,
+        not taking the transform into account."""
+        if index not in self._raw_anim_bounds:
+            np = require_numpy('mesh bounds')
+            data = self._require_mesh_data()
+            if not 0 <= index < len(data.animations):
+                raise RuntimeError('animation data is not available')
+            lo, hi = animated_aabb(data, data.animations[index])
+            self._raw_anim_bounds[index] = (
+                lo, hi, float(np.linalg.norm(hi - lo)) * 0.5)
+        return self._raw_anim_bounds[index]
+
+    def _triangle_bvh(self):
+        """Returns bind pose triangles prepared for ray queries, not taking the
+        transform into account."""
+        if self._triangles is None:
+            data = self._require_mesh_data()
+            self._triangles = TriangleBVH(data.positions, data.indices)
+        return self._triangles
+
+    def _transform_matrix(self):
+        key = bytes(ffi.buffer(self._transform._ptr, ffi.sizeof('Mat')))
+        if self._transform_key != key:
+            self._transform_matrix_cache = mat_to_ndarray(self._transform)
+            self._transform_key = key
+        return self._transform_matrix_cache
+
+    @property
+    def bounds(self):
+        """Bounding box and sphere of the mesh in bind pose, with mesh transform
+        applied.
+
+        Computed when the mesh is created from vertex data, or on first
+        access from the mesh file, and cached; a change of mesh transform only
+        transforms the cached volumes. Requires NumPy.
+
+        :rtype: :class:`Bounds`
+        """
+        return _transform_bounds(self._transform_matrix(), *self._raw_bounds())
+
+    def animation_bounds(self, index):
+        """Conservative bounding box and sphere of the mesh through all
+        keyframes of an animation, with mesh transform applied.
+
+        Computed on first access and cached. Requires NumPy.
+
+        :param index: Animation index.
+        :type index: int
+
+        :rtype: :class:`Bounds`
+        """
+        return _transform_bounds(
+            self._transform_matrix(),
+            *self._raw_animation_bounds(index))
+
+    def _bounding_radius(self):
+        """Returns radius of a sphere centered at the origin of mesh space,
+        which encloses the mesh in bind pose and all animations, or `None` if
+        it's unknown."""
+        m = self._transform_matrix()
+        if self._radius_key is not self._transform_matrix_cache:
+            np = require_numpy('mesh bounds')
+            try:
+                boxes = [self._raw_bounds()] + [
+                    self._raw_animation_bounds(i)
+                    for i in range(len(self._animations))
+                ]
+            except RuntimeError:
+                self._radius = None
+            else:
+                self._radius = 0.0
+                for bounds in (_transform_bounds(m, *box) for box in boxes):
+                    # the farthest corner of the box from the origin
+                    far = np.maximum(np.abs(bounds.min), np.abs(bounds.max))
+                    self._radius = max(self._radius, float(np.linalg.norm(far)))
+            self._radius_key = self._transform_matrix_cache
+        return self._radius
 
     @property
     def animations(self):
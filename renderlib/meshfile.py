@@ -0,0 +1,214 @@
+"""Reader of renderlib mesh files.
+
+The C library loads mesh files on its own, this module gives Python code access
+to the same data (vertex positions, skeleton, animations) for computations
+like bounding volumes or ray picking.
+
+Mesh file layout (version 1, little-endian):
+
+* header: version (u8), vertex attribute flags (u16), vertex count (u32),
+  index count (u32), joint count (u8), animation count (u16), transform
+  matrix (16 floats, row-major);
+* interleaved vertices: position (3 floats), normal (3 floats, flag 0x2),
+  UV (2 floats, flag 0x4), joint IDs (4 u8) and weights (4 u8, flag 0x8);
+* indices (u32);
+* joints: ID (u8), parent ID (u8, 255 for root), inverse bind matrix
+  (16 floats, row-major);
+* animations: duration (float), speed (float), keyframe count (u32),
+  keyframe timestamps (floats), then for each keyframe and joint a pose of
+  joint ID (u8), translation (3 floats), rotation quaternion (4 floats,
+  w first) and scale (3 floats).
+"""
+from renderlib.arrays import require_numpy
+import struct
+
+#: Vertex attribute flags and sizes: positions, normals, UVs and joint IDs
+#: with weights.
+ATTRIBUTES = ((0x1, 12), (0x2, 12), (0x4, 8), (0x8, 8))
+
+HEADER = struct.Struct('<BHIIBH16f')
+ANIMATION_HEADER = struct.Struct('<ffI')
+
+#: Joint ID denoting no parent or unused joint slot.
+NO_JOINT = 255
+
+
+class Skeleton:
+    """Joint hierarchy.
+
+    :param parents: Parent joint indices, -1 for roots.
+    :type parents: :class:`numpy.ndarray`
+
+    :param inverse_binds: Inverse bind matrices, shape (J, 4, 4).
+    :type inverse_binds: :class:`numpy.ndarray`
+    """
+
+    def __init__(self, parents, inverse_binds):
+        self.parents = parents
+        self.inverse_binds = inverse_binds
+
+    def __len__(self):
+        return len(self.parents)
+
+
+class AnimationData:
+    """Keyframed skeletal animation.
+
+    :param duration: Animation duration.
+    :type duration: float
+
+    :param speed: Playback speed factor.
+    :type speed: float
+
+    :param times: Keyframe timestamps, shape (K,).
+    :type times: :class:`numpy.ndarray`
+
+    :param translations: Joint translations, shape (K, J, 3).
+    :type translations: :class:`numpy.ndarray`
+
+    :param rotations: Joint rotations as `(w, x, y, z)` quaternions, shape
+        (K, J, 4).
+    :type rotations: :class:`numpy.ndarray`
+
+    :param scales: Joint scales, shape (K, J, 3).
+    :type scales: :class:`numpy.ndarray`
+    """
+
+    def __init__(self, duration, speed, times, translations, rotations, scales):
+        self.duration = duration
+        self.speed = speed
+        self.times = times
+        self.translations = translations
+        self.rotations = rotations
+        self.scales = scales
+
+
+class MeshData:
+    """Mesh geometry and, optionally, skinning data.
+
+    :param positions: Vertex positions, shape (N, 3).
+    :type positions: :class:`numpy.ndarray`
+
+    :param indices: Triangle vertex indices, shape (M,).
+    :type indices: :class:`numpy.ndarray`
+
+    :param joint_ids: Vertex joint indices, shape (N, 4).
+    :type joint_ids: :class:`numpy.ndarray`
+
+    :param joint_weights: Vertex joint weights, shape (N, 4), summing up to
+        255.
+    :type joint_weights: :class:`numpy.ndarray`
+
+    :param skeleton: Joint hierarchy.
+    :type skeleton: :class:`Skeleton`
+
+    :param animations: Skeletal animations.
+    :type animations: list of :class:`AnimationData`
+    """
+
+    def __init__(self, positions, indices, joint_ids=None, joint_weights=None,
+            skeleton=None, animations=()):
+        self.positions = positions
+        self.indices = indices
+        self.joint_ids = joint_ids
+        self.joint_weights = joint_weights
+        self.skeleton = skeleton
+        self.animations = list(animations)
+
+
+def read_mesh_file(data, geometry_only=False):
+    """Reads mesh file data.
+
+    Vertex data arrays are views into given buffer.
+
+    :param data: Mesh file contents.
+    :type data: buffer
+
+    :param geometry_only: Whether to skip skeleton and animation data.
+    :type geometry_only: bool
+
+    :rtype: :class:`MeshData`
+    """
+    np = require_numpy('mesh file reading')
+    data = memoryview(data).cast('B')
+    try:
+        header = HEADER.unpack_from(data)
+    except struct.error:
+        raise RuntimeError('invalid mesh data')
+    version, attributes, vcount, icount, jcount, acount = header[:6]
+    if version != 1 or not attributes & 0x1:
+        raise RuntimeError('unsupported mesh data format')
+
+    stride = sum(size for flag, size in ATTRIBUTES if attributes & flag)
+    offset = HEADER.size
+    if len(data) < offset + vcount * stride + icount * 4:
+        raise RuntimeError('invalid mesh data')
+
+    def vertex_attribute(shape, dtype, attr_offset):
+        itemsize = np.dtype(dtype).itemsize
+        return np.ndarray(
+            (vcount, shape),
+            dtype=dtype,
+            buffer=data,
+            offset=offset + attr_offset,
+            strides=(stride, itemsize))
+
+    mesh = MeshData(
+        vertex_attribute(3, '<f4', 0),
+        np.frombuffer(
+            data,
+            dtype='<u4',
+            count=icount,
+            offset=offset + vcount * stride))
+
+    if attributes & 0x8:
+        joints_offset = stride - 8
+        mesh.joint_ids = vertex_attribute(4, 'u1', joints_offset)
+        mesh.joint_weights = vertex_attribute(4, 'u1', joints_offset + 4)
+
+    offset += vcount * stride + icount * 4
+    if not jcount or geometry_only:
+        return mesh
+
+    try:
+        joint_type = np.dtype([
+            ('id', 'u1'),
+            ('parent', 'u1'),
+            ('inverse_bind', '<f4', (4, 4)),
+        ])
+        joints = np.frombuffer(data, joint_type, jcount, offset)
+        offset += joints.nbytes
+        order = np.argsort(joints['id'])
+        parents = joints['parent'][order].astype('int64')
+        parents[parents == NO_JOINT] = -1
+        mesh.skeleton = Skeleton(
+            parents,
+            joints['inverse_bind'][order].astype('float64'))
+
+        pose_type = np.dtype([
+            ('id', 'u1'),
+            ('translation', '<f4', 3),
+            ('rotation', '<f4', 4),
+            ('scale', '<f4', 3),
+        ])
+        for _ in range(acount):
+            duration, speed, kcount = ANIMATION_HEADER.unpack_from(data, offset)
+            offset += ANIMATION_HEADER.size
+            times = np.frombuffer(data, '<f4', kcount, offset)
+            offset += times.nbytes
+            poses = np.frombuffer(data, pose_type, kcount * jcount, offset)
+            offset += poses.nbytes
+            poses = poses.reshape(kcount, jcount)
+            poses = np.take_along_axis(
+                poses, np.argsort(poses['id'], axis=1), axis=1)
+            mesh.animations.append(AnimationData(
+                duration,
+                speed,
+                times.astype('float64'),
+                poses['translation'].astype('float64'),
+                poses['rotation'].astype('float64'),
+                poses['scale'].astype('float64')))
+    except (struct.error, ValueError):
+        raise RuntimeError('invalid mesh skeleton or animation data')
+
+    return mesh
@@ -0,0 +1,183 @@
+"""Ray picking."""
+from collections import namedtuple
+from renderlib.arrays import require_numpy
+from renderlib.bvh import BVH
+
+#: Ray pick result: scene object, distance along the ray and index of the hit
+#: triangle in mesh index data.
+Hit = namedtuple('Hit', ['object', 'distance', 'triangle'])
+
+
+def intersect_aabbs(origins, directions, mins, maxs):
+    """Intersects rays with axis-aligned boxes, pairwise.
+
+    :param origins: Ray origins, shape (N, 3).
+    :type origins: :class:`numpy.ndarray`
+
+    :param directions: Ray directions, shape (N, 3).
+    :type directions: :class:`numpy.ndarray`
+
+    :param mins: Box minimums, shape (N, 3).
+    :type mins: :class:`numpy.ndarray`
+
+    :param maxs: Box maximums, shape (N, 3).
+    :type maxs: :class:`numpy.ndarray`
+
+    :returns: Ray parameters of box entry and exit points, a ray misses the
+        box if the entry is farther than the exit.
+    :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`)
+    """
+    np = require_numpy('ray picking')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = 1.0 / directions
+        t1 = (mins - origins) * inv
+        t2 = (maxs - origins) * inv
+    # NaNs come from rays parallel to a slab and lying in its plane
+    near = np.where(np.isnan(t1), -np.inf, np.fmin(t1, t2)).max(axis=1)
+    far = np.where(np.isnan(t1), np.inf, np.fmax(t1, t2)).min(axis=1)
+    return near, far
+
+
+def intersect_triangles(origins, directions, v0, v1, v2):
+    """Intersects rays with triangles, pairwise.
+
+    Triangles are double-sided.
+
+    :param origins: Ray origins, shape (N, 3).
+    :type origins: :class:`numpy.ndarray`
+
+    :param directions: Ray directions, shape (N, 3).
+    :type directions: :class:`numpy.ndarray`
+
+    :param v0: First triangle vertices, shape (N, 3).
+    :type v0: :class:`numpy.ndarray`
+
+    :param v1: Second triangle vertices, shape (N, 3).
+    :type v1: :class:`numpy.ndarray`
+
+    :param v2: Third triangle vertices, shape (N, 3).
+    :type v2: :class:`numpy.ndarray`
+
+    :returns: Ray parameters of intersection points, infinity for misses.
+    :rtype: :class:`numpy.ndarray`
+    """
+    np = require_numpy('ray picking')
+    e1 = v1 - v0
+    e2 = v2 - v0
+    p = np.cross(directions, e2)
+    det = (e1 * p).sum(axis=1)
+    s = origins - v0
+    q = np.cross(s, e1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_det = 1.0 / det
+        u = (s * p).sum(axis=1) * inv_det
+        v = (directions * q).sum(axis=1) * inv_det
+        t = (e2 * q).sum(axis=1) * inv_det
+        hit = (det != 0) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+    return np.where(hit, t, np.inf)
+
+
+def closest_hits(count, rays, targets, distances):
+    """Selects the closest hit of each ray.
+
+    :param count: Number of rays.
+    :type count: int
+
+    :param rays: Ray indices of hit candidates.
+    :type rays: :class:`numpy.ndarray`
+
+    :param targets: Hit targets, like triangle indices.
+    :type targets: :class:`numpy.ndarray`
+
+    :param distances: Hit distances, infinity for misses.
+    :type distances: :class:`numpy.ndarray`
+
+    :returns: Distance and target of the closest hit of each ray, infinity and
+        -1 for rays which hit nothing.
+    :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`)
+    """
+    np = require_numpy('ray picking')
+    best = np.full(count, np.inf)
+    best_targets = np.full(count, -1, dtype='int64')
+    hit = np.isfinite(distances)
+    rays, targets, distances = rays[hit], targets[hit], distances[hit]
+    order = np.lexsort((distances, rays))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = rays[order[1:]] != rays[order[:-1]]
+    order = order[first]
+    best[rays[order]] = distances[order]
+    best_targets[rays[order]] = targets[order]
+    return best, best_targets
+
+
+def raycast(bvh, origins, directions, max_distances):
+    """Finds primitives whose boxes are hit by rays.
+
+    :param bvh: Hierarchy of primitive boxes.
+    :type bvh: :class:`renderlib.bvh.BVH`
+
+    :param origins: Ray origins, shape (N, 3).
+    :type origins: :class:`numpy.ndarray`
+
+    :param directions: Ray directions, shape (N, 3).
+    :type directions: :class:`numpy.ndarray`
+
+    :param max_distances: Maximum ray parameters, shape (N,).
+    :type max_distances: :class:`numpy.ndarray`
+
+    :returns: Ray and primitive indices of candidate pairs.
+    :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`)
+    """
+    def test(rays, mins, maxs):
+        near, far = intersect_aabbs(origins[rays], directions[rays], mins, maxs)
+        return (near <= far) & (far >= 0) & (near <= max_distances[rays])
+
+    return bvh.query_many(len(origins), test)
+
+
+class TriangleBVH:
+    """Triangle mesh prepared for ray queries.
+
+    Requires NumPy.
+
+    :param positions: Vertex positions, shape (N, 3).
+    :type positions: :class:`numpy.ndarray`
+
+    :param indices: Triangle vertex indices, shape (M,).
+    :type indices: :class:`numpy.ndarray`
+    """
+
+    def __init__(self, positions, indices):
+        np = require_numpy('ray picking')
+        triangles = np.asarray(indices, dtype='int64').reshape(-1, 3)
+        self.vertices = np.asarray(positions, dtype='float64')[triangles]
+        self.bvh = BVH(self.vertices.min(axis=1), self.vertices.max(axis=1))
+
+    def __len__(self):
+        return len(self.vertices)
+
+    def intersect(self, origins, directions, max_distances=None):
+        """Finds the closest triangle hit by each ray.
+
+        :param origins: Ray origins, shape (N, 3).
+        :type origins: :class:`numpy.ndarray`
+
+        :param directions: Ray directions, shape (N, 3).
+        :type directions: :class:`numpy.ndarray`
+
+        :param max_distances: Maximum ray parameters, shape (N,).
+        :type max_distances: :class:`numpy.ndarray`
+
+        :returns: Ray parameter and triangle index of each hit, infinity and
+            -1 for rays which hit nothing.
+        :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`)
+        """
+        np = require_numpy('ray picking')
+        if max_distances is None:
+            max_distances = np.full(len(origins), np.inf)
+        rays, triangles = raycast(self.bvh, origins, directions, max_distances)
+        v = self.vertices[triangles]
+        distances = intersect_triangles(
+            origins[rays], directions[rays], v[:, 0], v[:, 1], v[:, 2])
+        distances[distances > max_distances[rays]] = np.inf
+        return closest_hits(len(origins), rays, triangles, distances)
@@ -0,0 +1,190 @@
+"""Minimal PNG codec for 8-bit non-interlaced images.
+
+Used to compose images on the Python side (e.g. texture atlases), since decoded
+pixel data of :class:`renderlib.image.Image` is not accessible. Filters are
+reversed with NumPy if it's installed and byte by byte otherwise; anything
+that doesn't need the pixels should use :class:`renderlib.image.Image`.
+"""
+import struct
+import zlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# channel count per color type
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def _chunks(data):
+    if data[:8] != SIGNATURE:
+        raise RuntimeError('not a PNG image')
+    offset = 8
+    while offset + 8 <= len(data):
+        length, ctype = struct.unpack_from('>I4s', data, offset)
+        yield ctype, data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _unfilter_numpy(np, raw, height, stride, bpp):
+    # a pixel depends on its left, upper and upper-left neighbours, so all
+    # pixels of an anti-diagonal are reconstructed at once
+    width = stride // bpp
+    rows = np.frombuffer(raw, dtype='u1', count=height * (stride + 1))
+    rows = rows.reshape(height, stride + 1)
+    ftypes = rows[:, 0]
+    if (ftypes > 4).any():
+        raise RuntimeError('invalid PNG filter type {}'.format(
+            ftypes[ftypes > 4][0]))
+    filtered = rows[:, 1:].reshape(height, width, bpp).astype('i2')
+    # reconstructed pixels with a row of zeros above and a column on the left
+    out = np.zeros((height + 1, width + 1, bpp), dtype='i2')
+    ys = np.arange(height)
+    for d in range(height + width - 1):
+        y = ys[max(0, d - width + 1):min(height, d + 1)]
+        x = d - y
+        a, b, c = out[y + 1, x], out[y, x + 1], out[y, x]
+        p = a + b - c
+        pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+        paeth = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+        f = ftypes[y][:, None]
+        prediction = np.select(
+            [f == 1, f == 2, f == 3, f == 4],
+            [a, b, (a + b) >> 1, paeth])
+        out[y + 1, x + 1] = (filtered[y, x] + prediction) & 0xff
+    return bytearray(out[1:, 1:].astype('u1').tobytes())
+
+
+def _unfilter(raw, height, stride, bpp):
+    if numpy is not None:
+        return _unfilter_numpy(numpy, raw, height, stride, bpp)
+    out = bytearray(height * stride)
+    prev = bytearray(stride)
+    pos = 0
+    for y in range(height):
+        ftype = raw[pos]
+        line = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += stride + 1
+        if ftype == 1:
+            for i in range(bpp, stride):
+                line[i] = (line[i] + line[i - bpp]) & 0xff
+        elif ftype == 2:
+            for i in range(stride):
+                line[i] = (line[i] + prev[i]) & 0xff
+        elif ftype == 3:
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + ((left + prev[i]) >> 1)) & 0xff
+        elif ftype == 4:
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                upleft = prev[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + _paeth(left, prev[i], upleft)) & 0xff
+        elif ftype != 0:
+            raise RuntimeError('invalid PNG filter type {}'.format(ftype))
+        out[y * stride:(y + 1) * stride] = line
+        prev = line
+    return out
+
+
+def decode(data):
+    """Decodes a PNG image into RGBA pixels.
+
+    :param data: Encoded image.
+    :type data: bytes
+
+    :returns: A tuple of image width, height and RGBA pixel data, rows going
+        top to bottom.
+    :rtype: (int, int, bytearray)
+    """
+    header = palette = trns = None
+    idat = []
+    for ctype, chunk in _chunks(data):
+        if ctype == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif ctype == b'PLTE':
+            palette = chunk
+        elif ctype == b'tRNS':
+            trns = chunk
+        elif ctype == b'IDAT':
+            idat.append(chunk)
+        elif ctype == b'IEND':
+            break
+
+    if header is None:
+        raise RuntimeError('PNG header not found')
+    width, height, depth, color, _, _, interlace = header
+    if depth != 8 or interlace or color not in CHANNELS:
+        raise RuntimeError('unsupported PNG format')
+    if color == 3 and palette is None:
+        raise RuntimeError('PNG palette not found')
+
+    channels = CHANNELS[color]
+    stride = width * channels
+    pixels = _unfilter(zlib.decompress(b''.join(idat)), height, stride, channels)
+
+    if color == 6:
+        return width, height, pixels
+
+    rgba = bytearray(width * height * 4)
+    if color == 2:
+        for c in range(3):
+            rgba[c::4] = pixels[c::3]
+        rgba[3::4] = b'\xff' * (width * height)
+    elif color == 0:
+        for c in range(3):
+            rgba[c::4] = pixels
+        rgba[3::4] = b'\xff' * (width * height)
+    elif color == 4:
+        for c in range(3):
+            rgba[c::4] = pixels[0::2]
+        rgba[3::4] = pixels[1::2]
+    else:
+        alpha = bytearray(trns or b'').ljust(len(palette) // 3, b'\xff')
+        lut = [palette[i * 3:i * 3 + 3] + alpha[i:i + 1] for i in range(len(alpha))]
+        rgba = bytearray(b''.join(lut[i] for i in pixels))
+    return width, height, rgba
+
+
+def encode(width, height, rgba):
+    """Encodes RGBA pixels as PNG image.
+
+    :param width: Image width.
+    :type width: int
+
+    :param height: Image height.
+    :type height: int
+
+    :param rgba: RGBA pixel data, rows going top to bottom.
+    :type rgba: bytes
+
+    :returns: Encoded image.
+    :rtype: bytes
+    """
+    stride = width * 4
+    raw = b''.join(
+        b'\x00' + rgba[y * stride:(y + 1) * stride]
+        for y in range(height))
+
+    def chunk(ctype, data):
+        return (
+            struct.pack('>I', len(data)) + ctype + data +
+            struct.pack('>I', zlib.crc32(ctype + data) & 0xffffffff))
+
+    return b''.join([
+        SIGNATURE,
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(bytes(raw))),
+        chunk(b'IEND', b''),
+    ])
@@ -0,0 +1,283 @@
+"""Pre-baked animation poses.
+
+Pose table file layout (version 1, little-endian):
+
+* header: magic `RPOS`, version (u8), quantization flag (u8), joint count
+  (u8), sample count (u32), sample rate (float), duration (float);
+* joint parents (u8 each, 255 for root) and inverse bind matrices (16 floats
+  each, row-major);
+* unquantized tables: skinning matrices, top three rows (12 floats) per
+  sample and joint;
+* quantized tables: per sample and joint, translation (3 floats), rotation
+  quaternion (4 i16, w first, scaled by 32767) and scale (3 half floats).
+"""
+from collections import namedtuple
+from renderlib.arrays import require_numpy
+from renderlib.meshfile import NO_JOINT
+from renderlib.meshfile import Skeleton
+from renderlib.skinning import sample_pose
+from renderlib.skinning import skinning_matrices
+import struct
+import time
+
+HEADER = struct.Struct('<4sBBBIff')
+MAGIC = b'RPOS'
+
+#: Memory and time trade-off of a baked animation: table size in bytes and
+#: average time in seconds to compute one pose by keyframe interpolation and
+#: to look it up in the table.
+BakeReport = namedtuple('BakeReport', [
+    'sample_rate',
+    'quantized',
+    'nbytes',
+    'interpolation_time',
+    'lookup_time',
+])
+
+
+class PoseTable:
+    """Skinning matrices of an animation sampled at a fixed rate.
+
+    Unquantized tables keep matrices ready for use, quantized ones keep joint
+    transforms in about half of the memory and compute matrices on lookup.
+    Requires NumPy.
+
+    :param skeleton: Joint hierarchy.
+    :type skeleton: :class:`renderlib.meshfile.Skeleton`
+
+    :param sample_rate: Samples per unit of animation time.
+    :type sample_rate: float
+
+    :param duration: Animation duration.
+    :type duration: float
+
+    :param matrices: Top three rows of skinning matrices, shape (S, J, 3, 4),
+        for unquantized tables.
+    :type matrices: :class:`numpy.ndarray`
+
+    :param transforms: Joint translations (S, J, 3), quantized rotations
+        (S, J, 4) and scales (S, J, 3), for quantized tables.
+    :type transforms: (:class:`numpy.ndarray`, :class:`numpy.ndarray`,
+        :class:`numpy.ndarray`)
+    """
+
+    def __init__(self, skeleton, sample_rate, duration, matrices=None,
+            transforms=None):
+        if (matrices is None) == (transforms is None):
+            raise RuntimeError('either matrices or transforms are required')
+        self.skeleton = skeleton
+        self.sample_rate = sample_rate
+        self.duration = duration
+        self.matrices = matrices
+        self.transforms = transforms
+
+    @property
+    def quantized(self):
+        return self.transforms is not None
+
+    @property
+    def sample_count(self):
+        if self.quantized:
+            return len(self.transforms[0])
+        return len(self.matrices)
+
+    @property
+    def nbytes(self):
+        """Size of pose data in bytes."""
+        if self.quantized:
+            return sum(a.nbytes for a in self.transforms)
+        return self.matrices.nbytes
+
+    @classmethod
+    def bake(cls, mesh, animation, sample_rate=30.0, quantize=False):
+        """Samples an animation at a fixed rate.
+
+        :param mesh: Skinned mesh data.
+        :type mesh: :class:`renderlib.meshfile.MeshData`
+
+        :param animation: Animation.
+        :type animation: :class:`renderlib.meshfile.AnimationData`
+
+        :param sample_rate: Samples per unit of animation time.
+        :type sample_rate: float
+
+        :param quantize: Whether to store quantized joint transforms.
+        :type quantize: bool
+
+        :rtype: :class:`PoseTable`
+        """
+        np = require_numpy('pose tables')
+        count = max(int(np.ceil(animation.duration * sample_rate)), 1)
+        t, r, s = sample_pose(animation, np.arange(count) / sample_rate)
+        if quantize:
+            return cls(
+                mesh.skeleton,
+                sample_rate,
+                animation.duration,
+                transforms=(
+                    t.astype('<f4'),
+                    np.round(r * 32767).astype('<i2'),
+                    s.astype('<f2')))
+        matrices = skinning_matrices(mesh.skeleton, t, r, s)
+        return cls(
+            mesh.skeleton,
+            sample_rate,
+            animation.duration,
+            matrices=matrices[..., :3, :].astype('<f4'))
+
+    def sample_many(self, times):
+        """Looks up skinning matrices of poses nearest to given times.
+
+        :param times: Animation times, shape (N,).
+        :type times: :class:`numpy.ndarray`
+
+        :returns: Skinning matrices, shape (N, J, 4, 4).
+        :rtype: :class:`numpy.ndarray`
+        """
+        np = require_numpy('pose tables')
+        times = np.asarray(times, dtype='float64')
+        indices = np.round(times * self.sample_rate).astype('int64')
+        indices %= self.sample_count
+        out = np.zeros((len(indices), len(self.skeleton), 4, 4))
+        out[..., 3, 3] = 1.0
+        if self.quantized:
+            t, r, s = (a[indices].astype('float64') for a in self.transforms)
+            r /= np.linalg.norm(r, axis=2, keepdims=True)
+            out[:] = skinning_matrices(self.skeleton, t, r, s)
+        else:
+            out[..., :3, :] = self.matrices[indices]
+        return out
+
+    def sample(self, t):
+        """Looks up skinning matrices of the pose nearest to given time.
+
+        :param t: Animation time.
+        :type t: float
+
+        :returns: Skinning matrices, shape (J, 4, 4).
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self.sample_many([t])[0]
+
+    def report(self, instance, samples=100):
+        """Measures memory used by the table against pose computation time it
+        saves.
+
+        Keyframe interpolation is timed by stepping an instance of the baked
+        animation through its duration, which is the work a table lookup
+        replaces at run time.
+
+        :param instance: An instance of the baked animation.
+        :type instance: :class:`renderlib.animation.AnimationInstance`
+
+        :param samples: Number of poses to time.
+        :type samples: int
+
+        :rtype: :class:`BakeReport`
+        """
+        np = require_numpy('pose tables')
+        times = np.linspace(0, self.duration, samples, endpoint=False)
+
+        dt = self.duration / samples
+        start = time.perf_counter()
+        for _ in range(samples):
+            instance.play(dt)
+        interpolation = (time.perf_counter() - start) / samples
+
+        start = time.perf_counter()
+        self.sample_many(times)
+        lookup = (time.perf_counter() - start) / samples
+
+        return BakeReport(
+            self.sample_rate,
+            self.quantized,
+            self.nbytes,
+            interpolation,
+            lookup)
+
+    def save(self, filename):
+        """Saves the table to a file.
+
+        :param filename: File name.
+        :type filename: str
+        """
+        np = require_numpy('pose tables')
+        parents = self.skeleton.parents.copy()
+        parents[parents < 0] = NO_JOINT
+        with open(filename, 'wb') as fp:
+            fp.write(HEADER.pack(
+                MAGIC,
+                1,
+                int(self.quantized),
+                len(self.skeleton),
+                self.sample_count,
+                self.sample_rate,
+                self.duration))
+            fp.write(parents.astype('u1').tobytes())
+            fp.write(self.skeleton.inverse_binds.astype('<f4').tobytes())
+            if self.quantized:
+                # interleave per-joint transforms into records
+                t, r, s = self.transforms
+                records = np.empty(t.shape[:2], dtype=_transform_type(np))
+                records['translation'] = t
+                records['rotation'] = r
+                records['scale'] = s
+                fp.write(records.tobytes())
+            else:
+                fp.write(self.matrices.astype('<f4').tobytes())
+
+    @classmethod
+    def load(cls, filename):
+        """Loads a table saved by :meth:`save`.
+
+        :param filename: File name.
+        :type filename: str
+
+        :rtype: :class:`PoseTable`
+        """
+        np = require_numpy('pose tables')
+        with open(filename, 'rb') as fp:
+            data = fp.read()
+        try:
+            magic, version, quantized, jcount, scount, rate, duration = (
+                HEADER.unpack_from(data))
+        except struct.error:
+            raise RuntimeError('invalid pose table data')
+        if magic != MAGIC or version != 1:
+            raise RuntimeError('unsupported pose table format')
+
+        try:
+            offset = HEADER.size
+            parents = np.frombuffer(data, 'u1', jcount, offset).astype('int64')
+            parents[parents == NO_JOINT] = -1
+            offset += jcount
+            inverse_binds = np.frombuffer(data, '<f4', jcount * 16, offset)
+            offset += inverse_binds.nbytes
+            skeleton = Skeleton(
+                parents,
+                inverse_binds.reshape(jcount, 4, 4).astype('float64'))
+
+            if quantized:
+                records = np.frombuffer(
+                    data, _transform_type(np), scount * jcount, offset)
+                records = records.reshape(scount, jcount)
+                return cls(skeleton, rate, duration, transforms=(
+                    records['translation'].copy(),
+                    records['rotation'].copy(),
+                    records['scale'].copy()))
+            matrices = np.frombuffer(data, '<f4', scount * jcount * 12, offset)
+            return cls(
+                skeleton,
+                rate,
+                duration,
+                matrices=matrices.reshape(scount, jcount, 3, 4))
+        except ValueError:
+            raise RuntimeError('invalid pose table data')
+
+
+def _transform_type(np):
+    return np.dtype([
+        ('translation', '<f4', 3),
+        ('rotation', '<i2', 4),
+        ('scale', '<f2', 3),
+    ])
@@ -0,0 +1,202 @@
+"""Profiling of calls crossing the FFI boundary.
+
+:class:`FFIProfiler` is a :func:`sys.setprofile` hook which counts calls of
+native library functions and FFI helpers like `ffi.memmove`, and measures
+time spent in them, per calling wrapper method and per frame. It can be
+switched on and off at runtime and costs nothing while off.
+"""
+from _renderlib import ffi
+from _renderlib import lib
+from collections import deque
+from collections import namedtuple
+import sys
+import threading
+import time
+
+#: FFI call totals of a wrapper method: qualified name of the calling
+#: function, name of the native function, number of calls and seconds spent
+#: in them.
+FFICallStats = namedtuple('FFICallStats', [
+    'wrapper',
+    'function',
+    'calls',
+    'time',
+])
+
+#: FFI call totals of a frame: number of calls and seconds spent in them.
+FFIFrameStats = namedtuple('FFIFrameStats', ['calls', 'time'])
+
+
+def _setprofile(func):
+    if hasattr(threading, 'setprofile_all_threads'):
+        threading.setprofile_all_threads(func)
+    else:
+        sys.setprofile(func)
+        threading.setprofile(func)
+
+
+class FFIProfiler:
+    """Counter of FFI boundary crossings.
+
+    The profiler is itself a :func:`sys.setprofile` compatible function, so
+    it can be installed by :meth:`enable` or called from another profile
+    hook. A Python hook installed before :meth:`enable` keeps receiving all
+    events; a :class:`cProfile.Profile` which can't be chained is suspended
+    while the profiler is enabled and resumed by :meth:`disable`. Call
+    :meth:`next_frame` once per frame to collect per-frame totals.
+
+    :param frames: Number of per-frame totals to keep.
+    :type frames: int
+
+    :param targets: Objects whose methods count as FFI calls, by default the
+        native library and the FFI instance.
+    :type targets: sequence
+    """
+
+    def __init__(self, frames=600, targets=None):
+        self._targets = tuple(targets) if targets is not None else (lib, ffi)
+        self._stats = {}
+        self._names = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._frame_calls = 0
+        self._frame_time = 0.0
+        self._chain = None
+        self._previous = None
+        self._enabled = False
+        self.frames = deque(maxlen=frames)
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    def enable(self):
+        """Installs the profiler in the current thread and in threads started
+        afterwards, and in all running threads where Python supports it."""
+        if self._enabled:
+            return
+        previous = sys.getprofile()
+        if previous is self:
+            previous = None
+        self._previous = previous
+        self._chain = previous if callable(previous) else None
+        self._enabled = True
+        _setprofile(self)
+
+    def disable(self):
+        """Uninstalls the profiler, restoring the previous hook.
+
+        Threads which can't be reached keep calling the profiler, which
+        ignores their events until it's enabled again.
+        """
+        if not self._enabled:
+            return
+        self._enabled = False
+        _setprofile(self._chain)
+        previous = self._previous
+        self._chain = self._previous = None
+        if previous is not None and not callable(previous):
+            # a C level profiler like cProfile.Profile
+            previous.enable()
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def __call__(self, frame, event, arg):
+        if not self._enabled:
+            return
+        if event == 'c_call':
+            owner = getattr(arg, '__self__', None)
+            if any(owner is target for target in self._targets):
+                self._stack().append((arg, time.perf_counter()))
+        elif event == 'c_return' or event == 'c_exception':
+            stack = self._stack()
+            if stack and stack[-1][0] is arg:
+                elapsed = time.perf_counter() - stack.pop()[1]
+                self._record(frame.f_code, frame, arg.__name__, elapsed)
+        if self._chain is not None:
+            self._chain(frame, event, arg)
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+            return stack
+
+    def _record(self, code, frame, function, elapsed):
+        wrapper = self._names.get(code)
+        if wrapper is None:
+            wrapper = '{}.{}'.format(
+                frame.f_globals.get('__name__', '?'),
+                getattr(code, 'co_qualname', code.co_name))
+        key = (wrapper, function)
+        with self._lock:
+            self._names[code] = wrapper
+            calls, total = self._stats.get(key, (0, 0.0))
+            self._stats[key] = (calls + 1, total + elapsed)
+            self._frame_calls += 1
+            self._frame_time += elapsed
+
+    def next_frame(self):
+        """Closes per-frame totals of the current frame.
+
+        :returns: Totals of the frame which just ended.
+        :rtype: :class:`FFIFrameStats`
+        """
+        with self._lock:
+            stats = FFIFrameStats(self._frame_calls, self._frame_time)
+            self._frame_calls = 0
+            self._frame_time = 0.0
+        self.frames.append(stats)
+        return stats
+
+    def top(self, n=10, key='time'):
+        """Returns wrapper methods with the most FFI overhead.
+
+        :param n: Number of entries.
+        :type n: int
+
+        :param key: Sort key, `'time'` or `'calls'`.
+        :type key: str
+
+        :rtype: list of :class:`FFICallStats`
+        """
+        if key not in ('time', 'calls'):
+            raise RuntimeError('unknown sort key "{}"'.format(key))
+        with self._lock:
+            items = list(self._stats.items())
+        stats = [
+            FFICallStats(wrapper, function, calls, total)
+            for (wrapper, function), (calls, total) in items
+        ]
+        stats.sort(key=lambda s: getattr(s, key), reverse=True)
+        return stats[:n]
+
+    def report(self, n=10, key='time'):
+        """Formats :meth:`top` entries as a text table.
+
+        :rtype: str
+        """
+        lines = ['{:>8} {:>10} {:>8}  {}'.format(
+            'calls', 'total ms', 'us/call', 'wrapper -> function')]
+        for s in self.top(n, key):
+            lines.append('{:>8} {:>10.3f} {:>8.2f}  {} -> {}'.format(
+                s.calls,
+                s.time * 1e3,
+                s.time * 1e6 / s.calls,
+                s.wrapper,
+                s.function))
+        return '\n'.join(lines)
+
+    def reset(self):
+        """Clears all collected totals."""
+        with self._lock:
+            self._stats.clear()
+            self._frame_calls = 0
+            self._frame_time = 0.0
+        self.frames.clear()
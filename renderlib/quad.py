@@ -1,6 +1,10 @@
 """Quad wrappers"""
 from _renderlib import ffi
+from _renderlib import lib
 from matlib.vec import Vec
+from renderlib.arrays import require_numpy
+from renderlib.arrays import struct_view
+from renderlib.arrays import sync_positions
 
 
 class Quad:
@@ -100,3 +104,134 @@ class QuadProps:
     def texture(self, t):
         self._texture = t
         self._ptr.texture = t._ptr
+
+
+class QuadBatch:
+    """A fixed-capacity set of quads sharing one texture, with their properties
+    stored in contiguous arrays.
+
+    Sizes, colors and opacities are NumPy views on the native structures, so
+    writing to them takes effect immediately. Positions are kept in a separate
+    array and copied to scene objects by :meth:`sync`, which
+    :meth:`renderlib.scene.Scene.render` calls for every batch added to the
+    scene; only rows that changed since the last sync are copied. Only the
+    first :attr:`count` quads are visible.
+
+    Requires NumPy.
+
+    :param capacity: Maximum number of quads.
+    :type capacity: int
+
+    :param texture: Texture shared by all quads.
+    :type texture: :class:`renderlib.texture.Texture`
+    """
+
+    def __init__(self, capacity, texture=None):
+        np = require_numpy('quad batches')
+        self._capacity = capacity
+        self._count = 0
+        self._texture = texture
+        self._objects = None
+        self._scene = None
+
+        self._quads = ffi.new('struct Quad[]', capacity)
+        self._props = ffi.new('struct QuadProps[]', capacity)
+
+        vec_size = ffi.sizeof('Vec') // ffi.sizeof('float')
+        props = struct_view(
+            np,
+            self._props,
+            'struct QuadProps',
+            [('color', vec_size), ('opacity', 1)])
+        self._sizes = np.frombuffer(
+            ffi.buffer(self._quads), dtype='f4').reshape(capacity, 2)
+        self._colors = props['color']
+        self._opacities = props['opacity']
+        self._positions = np.zeros((capacity, 3), dtype='f4')
+        self._synced = np.zeros((capacity, 3), dtype='f4')
+
+        self._colors[:] = 1.0
+        self._opacities[:] = 1.0
+        if texture:
+            for i in range(capacity):
+                self._props[i].texture = texture._ptr
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def count(self):
+        """Number of visible quads."""
+        return self._count
+
+    @count.setter
+    def count(self, n):
+        if not 0 <= n <= self._capacity:
+            raise RuntimeError('quad count out of range')
+        if self._objects:
+            lo, hi = sorted((self._count, n))
+            for i in range(lo, hi):
+                self._objects[i].visible = int(i < n)
+        self._count = n
+
+    @property
+    def texture(self):
+        return self._texture
+
+    @property
+    def positions(self):
+        """Quad positions, array of shape (capacity, 3)."""
+        return self._positions
+
+    @property
+    def sizes(self):
+        """Quad widths and heights, array of shape (capacity, 2)."""
+        return self._sizes
+
+    @property
+    def colors(self):
+        """Quad RGBA colors, array of shape (capacity, 4)."""
+        return self._colors
+
+    @property
+    def opacities(self):
+        """Quad opacities, array of shape (capacity,)."""
+        return self._opacities
+
+    def sync(self):
+        """Copies changed positions to scene objects."""
+        if not self._objects:
+            return
+        sync_positions(
+            require_numpy('quad batches'),
+            self._positions,
+            self._synced,
+            self._objects)
+
+    def _stats(self):
+        """Returns numbers of hidden objects and drawn triangles."""
+        return self._capacity - self._count, 2 * self._count
+
+    def _attach(self, scene):
+        if self._scene is not None:
+            raise RuntimeError('quad batch is already added to a scene')
+        objects = []
+        for i in range(self._capacity):
+            obj = lib.scene_add_quad(
+                scene._ptr, self._quads + i, self._props + i)
+            if not obj:
+                for added in objects:
+                    lib.scene_remove_object(scene._ptr, added)
+                raise RuntimeError('failed to add quad to scene')
+            objects.append(obj)
+        self._objects = objects
+        for i, obj in enumerate(self._objects):
+            obj.visible = int(i < self._count)
+        self._synced[:] = float('nan')
+        self._scene = scene
+
+    def _detach(self):
+        for obj in self._objects:
+            lib.scene_remove_object(self._scene._ptr, obj)
+        self._objects = self._scene = None
@@ -0,0 +1,215 @@
+"""Render queue ordering."""
+from collections import namedtuple
+import itertools
+
+#: Render queue statistics of a frame: number of queued objects, number of
+#: objects moved to restore sort order, state binds needed to draw all queued
+#: objects in sorted order and binds avoided compared to insertion order.
+QueueStats = namedtuple('QueueStats', [
+    'objects',
+    'moved',
+    'binds',
+    'binds_avoided',
+])
+
+#: Shader classes, in draw order.
+SHADER_MESH = 0
+SHADER_SKINNED_MESH = 1
+SHADER_QUAD = 2
+SHADER_TEXT = 3
+
+
+def count_binds(states):
+    """Counts state changes needed to draw objects in given order.
+
+    :param states: Render states as tuples of shader, texture and material;
+        a change of each component counts as one bind.
+    :type states: iterable
+
+    :rtype: int
+    """
+    binds = 0
+    prev = None
+    for state in states:
+        if prev is None:
+            binds += len(state)
+        else:
+            binds += sum(a != b for a, b in zip(state, prev))
+        prev = state
+    return binds
+
+
+def sort_key(state, transparent):
+    """Builds the sort key of a render state.
+
+    Opaque objects go first, grouped by render state, transparent ones after
+    them; :class:`RenderQueue` keeps transparent objects in insertion order,
+    so that blended objects are layered the way they were added.
+
+    :param state: Render state, tuple of shader, texture and material.
+    :type state: tuple
+
+    :param transparent: Whether the object is blended.
+    :type transparent: bool
+
+    :rtype: tuple
+    """
+    return (int(transparent),) + state
+
+
+def _rank(key):
+    """Returns the part of a sort key which orders objects in the queue:
+    transparent objects are ordered only by insertion."""
+    return key[:1] if key[0] else key
+
+
+class RenderQueue:
+    """Draw order of scene objects grouped by render state.
+
+    Objects are registered with a source, the properties they are drawn
+    with, which determines their sort key. Draw order keeps opaque sources
+    sorted by key and objects of a source in insertion order, followed by all
+    transparent objects in insertion order (painter's order). It is rebuilt
+    only when an opaque object is added with a key lower than the last one in
+    the queue, an opaque object is added after transparent ones or a source
+    key changes; appending to the last group, appending transparent objects
+    and removing objects never reorder anything.
+    """
+
+    def __init__(self):
+        self._keys = {}
+        self._members = {}
+        self._sources = {}
+        self._inserted = {}
+        self._counter = itertools.count()
+        self._order = []
+        self._last_key = None
+        self._dirty = False
+        self._removed = False
+        self._changed = False
+        self.stats = QueueStats(0, 0, 0, 0)
+
+    def __len__(self):
+        return len(self._sources)
+
+    @property
+    def objects(self):
+        """Queued objects in current draw order."""
+        if self._removed:
+            self._order = [obj for obj in self._order if obj in self._sources]
+            self._removed = False
+        return self._order
+
+    @property
+    def sources(self):
+        """Sources of queued objects."""
+        return list(self._keys)
+
+    def add(self, obj, source, key):
+        """Appends an object to the queue.
+
+        :param obj: Object.
+        :type obj: object
+
+        :param source: Hashable identity of object properties.
+        :type source: object
+
+        :param key: Sort key of the source, used if the source is new.
+        :type key: tuple
+        """
+        if source not in self._keys:
+            self._keys[source] = key
+            self._members[source] = {}
+        key = _rank(self._keys[source])
+        self._members[source][obj] = None
+        self._sources[obj] = source
+        self._inserted[obj] = next(self._counter)
+        self._order.append(obj)
+        if self._last_key is not None and key < self._last_key:
+            self._dirty = True
+        else:
+            self._last_key = key
+        self._changed = True
+
+    def remove(self, obj):
+        source = self._sources.pop(obj, None)
+        if source is None:
+            return
+        del self._inserted[obj]
+        members = self._members[source]
+        del members[obj]
+        if not members:
+            del self._members[source]
+            del self._keys[source]
+        # dropped from the order list lazily
+        self._removed = True
+        self._changed = True
+
+    def set_key(self, source, key):
+        """Changes sort key of a source.
+
+        :param source: Source of queued objects.
+        :type source: object
+
+        :param key: New sort key.
+        :type key: tuple
+        """
+        if self._keys[source] != key:
+            self._keys[source] = key
+            self._dirty = self._changed = True
+
+    def update(self):
+        """Rebuilds draw order if needed and updates :attr:`stats`.
+
+        :returns: Objects to move to the end of draw order, in that order.
+        :rtype: list
+        """
+        if not self._changed:
+            self.stats = self.stats._replace(moved=0)
+            return []
+
+        current = self.objects
+        moved = []
+        if self._dirty:
+            keys = self._keys
+            order = [
+                obj
+                for source in sorted(keys, key=keys.__getitem__)
+                if not keys[source][0]
+                for obj in self._members[source]
+            ]
+            order += sorted(
+                (
+                    obj
+                    for source in keys
+                    if keys[source][0]
+                    for obj in self._members[source]
+                ),
+                key=self._inserted.__getitem__)
+            positions = {obj: i for i, obj in enumerate(current)}
+            kept = 0
+            last = -1
+            for obj in order:
+                if positions[obj] < last:
+                    break
+                last = positions[obj]
+                kept += 1
+            moved = order[kept:]
+            self._order = current = order
+            self._dirty = False
+        if current:
+            self._last_key = _rank(self._keys[self._sources[current[-1]]])
+
+        def states(objects):
+            return (self._keys[self._sources[obj]][1:] for obj in objects)
+
+        binds = count_binds(states(current))
+        unsorted_binds = count_binds(
+            states(sorted(current, key=self._inserted.__getitem__)))
+        self.stats = QueueStats(
+            len(current),
+            len(moved),
+            binds,
+            unsorted_binds - binds)
+        self._changed = False
+        return moved
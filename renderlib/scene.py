@@ -3,6 +3,63 @@ from _renderlib import ffi
 from _renderlib import lib
 from matlib.qtr import Qtr
 from matlib.vec import Vec
+from renderlib.arrays import as_ndarray
+from renderlib.arrays import require_numpy
+from renderlib.bvh import BVH
+from renderlib.picking import closest_hits
+from renderlib.picking import Hit
+from renderlib.picking import raycast
+from renderlib.renderqueue import RenderQueue
+from renderlib.renderqueue import SHADER_MESH
+from renderlib.renderqueue import SHADER_QUAD
+from renderlib.renderqueue import SHADER_SKINNED_MESH
+from renderlib.renderqueue import SHADER_TEXT
+from renderlib.renderqueue import sort_key
+from renderlib.skinning import matrices_to_quat
+from renderlib.skinning import quat_to_matrices
+from renderlib.stats import FrameStats
+from renderlib.stats import total_uploaded_bytes
+from renderlib.trace import get_tracer
+from array import array
+import time
+
+
+def _object_dtype(np):
+    """NumPy structured type matching `struct Object` layout."""
+    floats = ffi.sizeof('float')
+    return np.dtype({
+        'names': ['position', 'rotation', 'scale', 'visible'],
+        'formats': [
+            ('f4', ffi.sizeof('Vec') // floats),
+            ('f4', ffi.sizeof('Qtr') // floats),
+            ('f4', ffi.sizeof('Vec') // floats),
+            'i4',
+        ],
+        'offsets': [
+            ffi.offsetof('struct Object', 'position'),
+            ffi.offsetof('struct Object', 'rotation'),
+            ffi.offsetof('struct Object', 'scale'),
+            ffi.offsetof('struct Object', 'visible'),
+        ],
+        'itemsize': ffi.sizeof('struct Object'),
+    })
+
+
+def _transform_size():
+    """Size of the transform fields at the start of `struct Object`."""
+    return ffi.offsetof('struct Object', 'scale') + ffi.sizeof('Vec')
+
+
+def _qtr_wxyz():
+    """Indices of `w`, `x`, `y` and `z` quaternion components in `Qtr`."""
+    floats = ffi.sizeof('float')
+    return [ffi.offsetof('Qtr', c) // floats for c in 'wxyz']
+
+
+def _xyz(v):
+    if isinstance(v, Vec):
+        return (v.x, v.y, v.z)
+    return v
 
 
 class Object:
@@ -13,6 +70,14 @@ class Object:
         self._position = Vec(ptr=ffi.addressof(self._ptr, 'position'))
         self._rotation = Qtr(ptr=ffi.addressof(self._ptr, 'rotation'))
         self._scale = Vec(ptr=ffi.addressof(self._ptr, 'scale'))
+        self._visible = self._ptr.visible
+        self._culled = False
+        self._kind = None
+        self._source = None
+        self._native = ptr
+        self._slot = None
+        self._index = None
+        self._triangles = 0
 
     @property
     def position(self):
@@ -20,6 +85,7 @@ class Object:
 
     @position.setter
     def position(self, p):
+        self._check_attached()
         ffi.memmove(self._position._ptr, p._ptr, ffi.sizeof('Vec'))
 
     @property
@@ -28,6 +94,7 @@ class Object:
 
     @rotation.setter
     def rotation(self, r):
+        self._check_attached()
         ffi.memmove(self._rotation._ptr, r._ptr, ffi.sizeof('Qtr'))
 
     @property
@@ -36,52 +103,922 @@ class Object:
 
     @scale.setter
     def scale(self, s):
+        self._check_attached()
         ffi.memmove(self._scale._ptr, s._ptr, ffi.sizeof('Vec'))
 
     @property
     def visible(self):
-        return self._ptr.visible
+        """Visibility flag set by the user; objects culled by the scene stay
+        visible in this sense."""
+        return self._visible
 
     @visible.setter
     def visible(self, v):
-        self._ptr.visible = v
+        self._check_attached()
+        if bool(v) != bool(self._visible):
+            self._scene._visibility_changed(self, bool(v))
+        self._visible = v
+        self._ptr.visible = v and not self._culled
 
     def remove(self):
+        self._check_attached()
         self._scene.remove_object(self)
 
+    def _check_attached(self):
+        if self._scene is None:
+            raise RuntimeError('object is removed from the scene')
+
+
+class _MeshObjects:
+    """Mesh objects of a scene with their meshes, visibility and culling flags
+    and triangle counts, kept in parallel lists and arrays so that culling
+    reads them without per-object Python work. Removal moves the last object
+    into the freed position."""
+
+    def __init__(self):
+        self.objects = []
+        self.meshes = []
+        self.visible = array('B')
+        self.culled = array('B')
+        self.triangles = array('q')
+
+    def __len__(self):
+        return len(self.objects)
+
+    def add(self, obj, mesh):
+        obj._index = len(self.objects)
+        self.objects.append(obj)
+        self.meshes.append(mesh)
+        self.visible.append(bool(obj._visible))
+        self.culled.append(obj._culled)
+        self.triangles.append(obj._triangles)
+
+    def remove(self, obj):
+        """Removes an object, returns whether it was present."""
+        i = obj._index
+        if i is None:
+            return False
+        last = self.objects[-1]
+        for values in (
+                self.objects, self.meshes, self.visible, self.culled,
+                self.triangles):
+            values[i] = values[-1]
+            values.pop()
+        if last is not obj:
+            last._index = i
+        obj._index = None
+        return True
+
+
+class _ShadowBlock:
+    def __init__(self, np, size):
+        self.data = ffi.new('struct Object[]', size)
+        self.raw = np.frombuffer(ffi.buffer(self.data), dtype='u1').reshape(
+            size, -1)
+        self.synced = self.raw.copy()
+        self.natives = [None] * size
+
+
+class _ObjectShadows:
+    """Python-owned copies of native objects of a sorted scene.
+
+    Object wrappers point to these copies, which are copied to native objects
+    before rendering, so wrappers and views of their transforms stay valid
+    when native objects are re-created to change draw order. Copies are
+    allocated in blocks compared against a snapshot taken at the last sync,
+    so only changed objects are copied.
+    """
+
+    BLOCK_SIZE = 256
 
-class Scene:
     def __init__(self):
+        self._blocks = []
+        self._free = []
+        self._size = ffi.sizeof('struct Object')
+
+    def alloc(self, native):
+        """Returns a copy of a native object and its slot."""
+        if not self._free:
+            np = require_numpy('render queue sorting')
+            base = len(self._blocks) * self.BLOCK_SIZE
+            self._blocks.append(_ShadowBlock(np, self.BLOCK_SIZE))
+            self._free = list(range(base + self.BLOCK_SIZE - 1, base - 1, -1))
+        slot = self._free.pop()
+        block, i = divmod(slot, self.BLOCK_SIZE)
+        block = self._blocks[block]
+        ffi.memmove(block.data + i, native, self._size)
+        block.natives[i] = native
+        block.synced[i] = block.raw[i]
+        return block.data + i, slot
+
+    def free(self, slot):
+        block, i = divmod(slot, self.BLOCK_SIZE)
+        self._blocks[block].natives[i] = None
+        self._free.append(slot)
+
+    def set_native(self, slot, native):
+        """Binds a slot to a native object and copies the slot to it."""
+        block, i = divmod(slot, self.BLOCK_SIZE)
+        block = self._blocks[block]
+        block.natives[i] = native
+        ffi.memmove(native, block.data + i, self._size)
+        block.synced[i] = block.raw[i]
+
+    def sync(self):
+        """Copies changed objects to native ones."""
+        np = require_numpy('render queue sorting')
+        for block in self._blocks:
+            changed = np.flatnonzero((block.raw != block.synced).any(axis=1))
+            if not len(changed):
+                continue
+            for i in changed.tolist():
+                if block.natives[i] is not None:
+                    ffi.memmove(block.natives[i], block.data + i, self._size)
+            block.synced[changed] = block.raw[changed]
+
+
+class MeshInstances:
+    """Many objects of the same mesh, created and transformed in bulk.
+
+    Returned by :meth:`Scene.add_mesh_instances`. Each instance is a regular
+    scene object, so it is culled and picked like objects added by
+    :meth:`Scene.add_mesh`. With per-instance colors, every instance gets its
+    own copy of the mesh properties and material, which are stored in
+    contiguous arrays; :attr:`colors` is a NumPy view on material colors, so
+    writing to it takes effect immediately.
+
+    Requires NumPy.
+    """
+
+    def __init__(self, scene, mesh, props, objects, colors=None, refs=()):
+        self._scene = scene
+        self._mesh = mesh
+        self._props = props
+        self._objects = objects
+        self._colors = colors
+        # per-instance native properties referenced by objects
+        self._refs = refs
+
+    def __len__(self):
+        return len(self._objects)
+
+    @property
+    def mesh(self):
+        return self._mesh
+
+    @property
+    def objects(self):
+        """Scene objects of instances, in the order of instance transforms."""
+        return self._objects
+
+    @property
+    def colors(self):
+        """Instance RGBA colors, array of shape (N, 4), or `None` if the
+        instances share one material."""
+        return self._colors
+
+    def get_transforms(self):
+        """Reads instance transforms.
+
+        :returns: Transform matrices, shape (N, 4, 4).
+        :rtype: :class:`numpy.ndarray`
+        """
+        np = require_numpy('mesh instances')
+        self._scene._check_objects(self._objects)
+        data = self._scene._read_objects(np, self._objects)
+        m = np.zeros((len(data), 4, 4))
+        m[:, :3, :3] = (
+            quat_to_matrices(data['rotation'][:, _qtr_wxyz()]) *
+            data['scale'][:, None, :3])
+        m[:, :3, 3] = data['position'][:, :3]
+        m[:, 3, 3] = 1.0
+        return m
+
+    def set_transforms(self, transforms):
+        """Writes instance transforms.
+
+        Matrices are decomposed into object position, rotation and scale, so
+        they must not contain shear or projection.
+
+        :param transforms: Transform matrices, shape (N, 4, 4).
+        :type transforms: :class:`numpy.ndarray`
+        """
+        np = require_numpy('mesh instances')
+        m = np.asarray(transforms, dtype='float64')
+        if m.shape != (len(self._objects), 4, 4):
+            raise RuntimeError('expected {} transforms, got shape {}'.format(
+                len(self._objects), m.shape))
+        scales = np.linalg.norm(m[:, :3, :3], axis=1)
+        # a mirroring transform flips the first axis
+        scales[np.linalg.det(m[:, :3, :3]) < 0, 0] *= -1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rotations = m[:, :3, :3] / scales[:, None, :]
+        rotations[~np.isfinite(rotations)] = 0.0
+        wxyz = matrices_to_quat(rotations)
+        wxyz[~np.isfinite(wxyz)] = (1.0, 0.0, 0.0, 0.0)
+        qtr = np.zeros((len(m), ffi.sizeof('Qtr') // ffi.sizeof('float')))
+        qtr[:, _qtr_wxyz()] = wxyz
+        self._scene.set_transforms(
+            self._objects,
+            positions=m[:, :3, 3].astype('float32'),
+            rotations=qtr.astype('float32'),
+            scales=scales.astype('float32'))
+
+    def set_visible(self, flags):
+        """Sets visibility of instances.
+
+        :param flags: One flag for all instances or one per instance.
+        :type flags: bool or sequence of bool
+        """
+        if isinstance(flags, bool):
+            flags = [flags] * len(self._objects)
+        for obj, flag in zip(self._objects, flags):
+            obj.visible = bool(flag)
+
+
+class Scene:
+    """Scene of renderable objects.
+
+    With culling enabled, mesh objects outside camera frustum are hidden
+    during rendering. Each mesh object is bounded by a sphere around its
+    position enclosing the mesh in any orientation, spheres are kept in a
+    :class:`renderlib.bvh.BVH` which is refitted every frame and rebuilt when
+    objects are added or removed. Objects whose mesh geometry is unknown are
+    never culled. Culling requires NumPy.
+
+    With sorting enabled, objects are drawn in an order which minimizes
+    shader, texture and material changes: opaque objects first, grouped by
+    render state, then transparent ones in the order they were added, so
+    that blended objects like text and translucent quads stay layered. The
+    order is kept in a :class:`renderlib.renderqueue.RenderQueue`; render
+    states are checked once per frame for each distinct set of object
+    properties, and draw order changes only when an opaque object is added
+    to an earlier group or a render state changes. As the native scene draws objects in insertion order,
+    misplaced objects are then re-created at the end of it. Object wrappers
+    of a sorted scene point to Python-owned copies of native objects, which
+    are copied to them before rendering, so wrappers and views of their
+    transforms stay valid. Batches and text lines are not sorted. Sorting
+    requires NumPy and can only be chosen when creating the scene.
+
+    :param culling: Whether to enable frustum culling.
+    :type culling: bool
+
+    :param sorting: Whether to sort objects by render state.
+    :type sorting: bool
+    """
+
+    def __init__(self, culling=False, sorting=False):
         self._ptr = ffi.gc(lib.scene_new(), lib.scene_free)
+        self._quad_batches = []
+        self._text_batches = []
+        self._mesh_objects = _MeshObjects()
+        self._cull_bvh = None
+        self._pick_bvh = None
+        self._pick_cache = None
+        self._has_culled = False
+        self._queue = RenderQueue()
+        self._sorting = sorting
+        self._shadows = _ObjectShadows() if sorting else None
+        self._triangles = 0
+        self._hidden_objects = 0
+        self._hidden_triangles = 0
+        self._culled_objects = 0
+        self._culled_triangles = 0
+        self._frame_stats = None
+        self._uploaded_bytes = total_uploaded_bytes()
+        self.culling = culling
 
     @property
     def object_count(self):
         return lib.scene_object_count(self._ptr)
 
+    @property
+    def sorting(self):
+        """Whether objects are sorted by render state."""
+        return self._sorting
+
+    @property
+    def sort_stats(self):
+        """Render queue statistics of the last sorted frame.
+
+        :rtype: :class:`renderlib.renderqueue.QueueStats`
+        """
+        return self._queue.stats
+
+    def _add_object(self, kind, add, drawable, props, props_ptr=None):
+        if props_ptr is None:
+            props_ptr = props._ptr
+        native = add(self._ptr, drawable._ptr, props_ptr)
+        slot = None
+        ptr = native
+        if self._shadows is not None:
+            ptr, slot = self._shadows.alloc(native)
+        obj = Object(self, ptr, (drawable, props))
+        obj._kind = kind
+        obj._source = (add, drawable._ptr, props_ptr)
+        obj._native = native
+        obj._slot = slot
+        if kind == 'mesh':
+            obj._triangles = drawable.index_count // 3
+        elif kind == 'quad':
+            obj._triangles = 2
+        self._triangles += obj._triangles
+        if not obj._visible:
+            self._visibility_changed(obj, False)
+        if self._sorting:
+            source = (kind, props_ptr)
+            self._queue.add(obj, source, self._sort_key(*source))
+        return obj
+
+    def _remove_native(self, obj):
+        lib.scene_remove_object(self._ptr, obj._native)
+        if obj._slot is not None:
+            self._shadows.free(obj._slot)
+
+    def _forget(self, obj):
+        """Drops bookkeeping of a removed object."""
+        self._queue.remove(obj)
+        self._triangles -= obj._triangles
+        if not obj._visible:
+            self._visibility_changed(obj, True)
+        if self._mesh_objects.remove(obj):
+            self._cull_bvh = self._pick_bvh = self._pick_cache = None
+        obj._scene = None
+
+    def _visibility_changed(self, obj, visible):
+        if obj._index is not None:
+            self._mesh_objects.visible[obj._index] = visible
+            self._pick_cache = None
+        sign = -1 if visible else 1
+        self._hidden_objects += sign
+        self._hidden_triangles += sign * obj._triangles
+
+    def _move_to_end(self, obj):
+        """Re-creates the native object at the end of draw order."""
+        lib.scene_remove_object(self._ptr, obj._native)
+        add, drawable, props = obj._source
+        obj._native = add(self._ptr, drawable, props)
+        self._shadows.set_native(obj._slot, obj._native)
+
     def add_mesh(self, mesh, props):
-        return Object(
-            self,
-            lib.scene_add_mesh(self._ptr, mesh._ptr, props._ptr),
-            (mesh, props))
+        obj = self._add_object('mesh', lib.scene_add_mesh, mesh, props)
+        self._mesh_objects.add(obj, mesh)
+        self._cull_bvh = self._pick_bvh = self._pick_cache = None
+        return obj
+
+    def add_mesh_instances(self, mesh, props, transforms, colors=None):
+        """Adds many instances of a mesh at once.
+
+        :param mesh: Mesh.
+        :type mesh: :class:`renderlib.mesh.Mesh`
+
+        :param props: Properties shared by instances; with per-instance
+            colors they are copied for each instance.
+        :type props: :class:`renderlib.mesh.MeshProps`
+
+        :param transforms: Instance transform matrices, shape (N, 4, 4).
+        :type transforms: :class:`numpy.ndarray`
+
+        :param colors: Optional per-instance RGBA material colors, shape
+            (N, 4).
+        :type colors: :class:`numpy.ndarray`
+
+        :rtype: :class:`MeshInstances`
+        """
+        np = require_numpy('mesh instances')
+        count = len(transforms)
+        instance_colors = None
+        refs = ()
+        if colors is None:
+            ptrs = [props._ptr] * count
+        else:
+            colors = as_ndarray('float32', 4, colors)
+            if len(colors) != count:
+                raise RuntimeError('expected {} colors, got {}'.format(
+                    count, len(colors)))
+            materials, instance_colors = self._instance_materials(
+                np, props, colors)
+            mesh_props = ffi.new('struct MeshProps[]', count)
+            ffi.memmove(
+                mesh_props,
+                bytes(ffi.buffer(props._ptr)) * count,
+                ffi.sizeof('struct MeshProps') * count)
+            for i in range(count):
+                mesh_props[i].material = materials + i
+            ptrs = [mesh_props + i for i in range(count)]
+            refs = (materials, mesh_props)
+
+        objects = []
+        for ptr in ptrs:
+            obj = self._add_object(
+                'mesh', lib.scene_add_mesh, mesh, props, ptr)
+            self._mesh_objects.add(obj, mesh)
+            objects.append(obj)
+        self._cull_bvh = self._pick_bvh = self._pick_cache = None
+
+        instances = MeshInstances(
+            self, mesh, props, objects, instance_colors, refs)
+        if count:
+            instances.set_transforms(transforms)
+        return instances
+
+    @staticmethod
+    def _instance_materials(np, props, colors):
+        """Creates copies of props material with given colors."""
+        count = len(colors)
+        size = ffi.sizeof('struct Material')
+        template = ffi.new('struct Material*')
+        if props.material is not None:
+            ffi.memmove(template, props.material._ptr, size)
+        materials = ffi.new('struct Material[]', count)
+        ffi.memmove(
+            materials,
+            bytes(ffi.buffer(template)) * count,
+            size * count)
+        data = np.frombuffer(ffi.buffer(materials), dtype=np.dtype({
+            'names': ['color'],
+            'formats': [('f4', ffi.sizeof('Vec') // ffi.sizeof('float'))],
+            'offsets': [ffi.offsetof('struct Material', 'color')],
+            'itemsize': size,
+        }))
+        instance_colors = data['color']
+        instance_colors[:, :4] = colors
+        return materials, instance_colors
+
+    def remove_mesh_instances(self, instances):
+        for obj in instances.objects:
+            # skip instances removed individually
+            if obj._scene is self:
+                self._remove_native(obj)
+                self._forget(obj)
 
     def add_text(self, text, props):
-        return Object(
-            self,
-            lib.scene_add_text(self._ptr, text._ptr, props._ptr),
-            (text, props))
+        return self._add_object('text', lib.scene_add_text, text, props)
 
     def add_quad(self, quad, props):
-        return Object(
-            self,
-            lib.scene_add_quad(self._ptr, quad._ptr, props._ptr),
-            (quad, props))
+        return self._add_object('quad', lib.scene_add_quad, quad, props)
+
+    def add_quad_batch(self, batch):
+        """Adds all quads of a batch to the scene.
+
+        :param batch: Quad batch.
+        :type batch: :class:`renderlib.quad.QuadBatch`
+
+        :returns: The batch.
+        :rtype: :class:`renderlib.quad.QuadBatch`
+        """
+        batch._attach(self)
+        self._quad_batches.append(batch)
+        return batch
+
+    def remove_quad_batch(self, batch):
+        if batch not in self._quad_batches:
+            raise RuntimeError('quad batch is not in the scene')
+        self._quad_batches.remove(batch)
+        batch._detach()
+
+    def add_text_batch(self, batch):
+        """Adds all labels of a text batch to the scene.
+
+        :param batch: Text batch.
+        :type batch: :class:`renderlib.text.TextBatch`
+
+        :returns: The batch.
+        :rtype: :class:`renderlib.text.TextBatch`
+        """
+        batch._attach(self)
+        self._text_batches.append(batch)
+        return batch
+
+    def remove_text_batch(self, batch):
+        if batch not in self._text_batches:
+            raise RuntimeError('text batch is not in the scene')
+        self._text_batches.remove(batch)
+        batch._detach()
+
+    def add_text_line(self, line):
+        """Adds a text line to the scene.
+
+        :param line: Text line.
+        :type line: :class:`renderlib.text.TextLine`
+
+        :returns: The line.
+        :rtype: :class:`renderlib.text.TextLine`
+        """
+        line._attach(self)
+        return line
+
+    def remove_text_line(self, line):
+        line._detach()
 
     def remove_object(self, obj):
-        lib.scene_remove_object(self._ptr, obj._ptr)
+        if obj._scene is not self:
+            raise RuntimeError('object is not in the scene')
+        self._remove_native(obj)
+        self._forget(obj)
+
+    def get_transforms(self, objects):
+        """Reads transforms of many objects at once.
+
+        :param objects: Scene objects.
+        :type objects: sequence of :class:`Object`
+
+        :returns: Arrays of positions (N, 3), rotations (N, 4) in
+            :class:`matlib.qtr.Qtr` component order and scales (N, 3).
+        :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`,
+            :class:`numpy.ndarray`)
+        """
+        np = require_numpy('bulk transforms')
+        self._check_objects(objects)
+        data = self._read_objects(np, objects)
+        return (
+            data['position'][:, :3].copy(),
+            data['rotation'].copy(),
+            data['scale'][:, :3].copy())
+
+    def set_transforms(self, objects, positions=None, rotations=None,
+            scales=None):
+        """Writes transforms of many objects at once.
+
+        Each array must have one row per object and can be a NumPy array of
+        any float type and layout, any other typed buffer or a list of
+        tuples. Omitted components are left unchanged.
+
+        :param objects: Scene objects.
+        :type objects: sequence of :class:`Object`
+
+        :param positions: Object positions, shape (N, 3).
+        :type positions: buffer
+
+        :param rotations: Object rotations in :class:`matlib.qtr.Qtr`
+            component order, shape (N, 4).
+        :type rotations: buffer
+
+        :param scales: Object scales, shape (N, 3).
+        :type scales: buffer
+        """
+        np = require_numpy('bulk transforms')
+        self._check_objects(objects)
+        data = self._read_objects(np, objects)
+        for name, values, width in (
+                ('position', positions, 3),
+                ('rotation', rotations, data['rotation'].shape[1]),
+                ('scale', scales, 3)):
+            if values is None:
+                continue
+            if isinstance(values, np.ndarray):
+                values = np.ascontiguousarray(values, dtype=np.float32)
+                if values.ndim != 2:
+                    values = values.reshape(-1, width)
+            else:
+                values = as_ndarray('float32', width, values)
+            if values.shape != (len(objects), width):
+                raise RuntimeError('expected {} {} values, got {}'.format(
+                    (len(objects), width), name, values.shape))
+            data[name][:, :width] = values
+
+        # copy only the transform fields, which precede the flags
+        src = ffi.from_buffer(data.view(np.uint8))
+        stride = data.itemsize
+        size = _transform_size()
+        for i, obj in enumerate(objects):
+            ffi.memmove(obj._ptr, src + i * stride, size)
+
+    def _check_objects(self, objects):
+        for obj in objects:
+            if obj._scene is not self:
+                raise RuntimeError('object is not in the scene')
+
+    def _read_objects(self, np, objects):
+        size = ffi.sizeof('struct Object')
+        raw = b''.join(ffi.buffer(obj._ptr, size) for obj in objects)
+        return np.frombuffer(raw, dtype=_object_dtype(np)).copy()
+
+    def _set_culled(self, np, culled):
+        mesh_objects = self._mesh_objects
+        changed = np.flatnonzero(
+            culled != np.array(mesh_objects.culled, dtype=bool))
+        for i in changed.tolist():
+            obj = mesh_objects.objects[i]
+            obj._culled = bool(culled[i])
+            obj._ptr.visible = obj._visible and not obj._culled
+        mesh_objects.culled = array('B', culled.astype('u1').tobytes())
+
+    def _cull(self, camera):
+        np = require_numpy('frustum culling')
+        mesh_objects = self._mesh_objects
+        if not mesh_objects:
+            return
+
+        mesh_radii = {}
+        for mesh in mesh_objects.meshes:
+            if mesh not in mesh_radii:
+                radius = mesh._bounding_radius()
+                mesh_radii[mesh] = np.nan if radius is None else radius
+        local_radii = np.array([mesh_radii[m] for m in mesh_objects.meshes])
+
+        data = self._read_objects(np, mesh_objects.objects)
+        centers = data['position'][:, :3].astype('float64')
+        radii = local_radii * np.abs(data['scale'][:, :3]).max(axis=1)
+        known = np.flatnonzero(np.isfinite(radii))
+        centers, radii = centers[known], radii[known]
+        mins = centers - radii[:, None]
+        maxs = centers + radii[:, None]
+        if self._cull_bvh is None or len(self._cull_bvh) != len(known):
+            self._cull_bvh = BVH(mins, maxs)
+        else:
+            self._cull_bvh.refit(mins, maxs)
+
+        frustum = camera.frustum
+        inside, candidates = self._cull_bvh.query(frustum.classify_aabbs)
+        in_view = np.zeros(len(known), dtype=bool)
+        in_view[inside] = True
+        in_view[candidates] = frustum.test_spheres(
+            centers[candidates],
+            radii[candidates])
+
+        culled = np.zeros(len(mesh_objects), dtype=bool)
+        culled[known] = ~in_view
+        self._set_culled(np, culled)
+
+        culled &= np.array(mesh_objects.visible, dtype=bool)
+        triangles = np.array(mesh_objects.triangles, dtype='int64')
+        self._culled_objects = int(culled.sum())
+        self._culled_triangles = int(triangles[culled].sum())
+
+    def _model_matrices(self, np, data, meshes):
+        """Computes `T * R * S * mesh.transform` model matrices of objects."""
+        m = np.zeros((len(data), 4, 4))
+        m[:, :3, :3] = (
+            quat_to_matrices(data['rotation'][:, _qtr_wxyz()]) *
+            data['scale'][:, None, :3])
+        m[:, :3, 3] = data['position'][:, :3]
+        m[:, 3, 3] = 1.0
+        return m @ np.array([mesh._transform_matrix() for mesh in meshes])
+
+    def _pick_objects(self, np):
+        """Returns objects with known mesh geometry, their meshes, inverse model
+        matrices, a mask of pickable ones and a BVH over their world boxes.
+
+        The result is cached until objects, their visibility or mesh
+        transforms change. Object transforms are compared by raw data, so
+        in-place changes through position, rotation or scale views are
+        detected as well as assignments."""
+        size = _transform_size()
+        key = b''.join(
+            ffi.buffer(obj._ptr, size) for obj in self._mesh_objects.objects)
+        cache = self._pick_cache
+        if cache is not None and cache[2] == key and all(
+                mesh._transform_matrix() is matrix
+                for mesh, matrix in cache[1].items()):
+            return cache[0]
+
+        objects, meshes, boxes = [], [], []
+        for obj, mesh in zip(
+                self._mesh_objects.objects, self._mesh_objects.meshes):
+            try:
+                boxes.append(mesh._raw_bounds()[:2])
+            except RuntimeError:
+                continue
+            objects.append(obj)
+            meshes.append(mesh)
+        transforms = {mesh: mesh._transform_matrix() for mesh in meshes}
+        if not objects:
+            result = objects, meshes, None, None, None
+            self._pick_cache = result, transforms, key
+            return result
+
+        models = self._model_matrices(
+            np, self._read_objects(np, objects), meshes)
+        lo = np.array([box[0] for box in boxes])
+        hi = np.array([box[1] for box in boxes])
+        centers = (
+            np.einsum('nij,nj->ni', models[:, :3, :3], (lo + hi) * 0.5) +
+            models[:, :3, 3])
+        extents = np.einsum(
+            'nij,nj->ni', np.abs(models[:, :3, :3]), (hi - lo) * 0.5)
+        mins, maxs = centers - extents, centers + extents
+        if self._pick_bvh is None or len(self._pick_bvh) != len(objects):
+            self._pick_bvh = BVH(mins, maxs)
+        else:
+            self._pick_bvh.refit(mins, maxs)
+
+        invertible = np.linalg.det(models) != 0
+        inverses = np.zeros_like(models)
+        inverses[invertible] = np.linalg.inv(models[invertible])
+        pickable = invertible & np.array([obj._visible for obj in objects])
+        result = objects, meshes, inverses, pickable, self._pick_bvh
+        self._pick_cache = result, transforms, key
+        return result
+
+    def pick_many(self, origins, directions, max_distance=None):
+        """Finds the closest mesh objects hit by rays.
+
+        Rays are tested against a BVH over object bounding boxes first, then
+        against triangles of candidate objects using per-mesh triangle BVHs,
+        which are built on first use from mesh source data. Meshes are tested
+        in bind pose. Hidden objects and objects whose mesh source data is not
+        available can't be picked. Object volumes and inverse transforms are
+        cached between calls while object transforms stay the same. Requires
+        NumPy.
+
+        :param origins: Ray origins, shape (N, 3).
+        :type origins: :class:`numpy.ndarray` or sequence
+
+        :param directions: Ray directions, shape (N, 3).
+        :type directions: :class:`numpy.ndarray` or sequence
+
+        :param max_distance: Maximum hit distance.
+        :type max_distance: float
+
+        :returns: The closest hit of each ray or `None` for rays which hit
+            nothing.
+        :rtype: list of :class:`renderlib.picking.Hit`
+        """
+        np = require_numpy('picking')
+        origins = np.asarray(origins, dtype='float64').reshape(-1, 3)
+        directions = np.asarray(directions, dtype='float64').reshape(-1, 3)
+        directions = directions / np.linalg.norm(directions, axis=1)[:, None]
+        count = len(origins)
+        max_distances = np.full(
+            count, np.inf if max_distance is None else float(max_distance))
+
+        objects, meshes, inverses, pickable, bvh = self._pick_objects(np)
+        if not objects:
+            return [None] * count
+        rays, candidates = raycast(bvh, origins, directions, max_distances)
+        keep = pickable[candidates]
+        rays, candidates = rays[keep], candidates[keep]
+
+        # transform rays into mesh space, keeping ray parameters equal to
+        # world distances, and test objects of each mesh at once
+        mesh_ids = {}
+        mesh_index = np.array([
+            mesh_ids.setdefault(mesh, len(mesh_ids)) for mesh in meshes])
+        pairs = ([], [], [], [])
+        for mesh, index in mesh_ids.items():
+            group = mesh_index[candidates] == index
+            if not group.any():
+                continue
+            r, inv = rays[group], inverses[candidates[group]]
+            local_origins = (
+                np.einsum('nij,nj->ni', inv[:, :3, :3], origins[r]) +
+                inv[:, :3, 3])
+            local_directions = np.einsum(
+                'nij,nj->ni', inv[:, :3, :3], directions[r])
+            distances, triangles = mesh._triangle_bvh().intersect(
+                local_origins, local_directions, max_distances[r])
+            chunks = (r, candidates[group], distances, triangles)
+            for values, chunk in zip(pairs, chunks):
+                values.append(chunk)
+
+        if not pairs[0]:
+            return [None] * count
+        pair_rays, pair_objects, pair_distances, pair_triangles = (
+            np.concatenate(values) for values in pairs)
+        distances, best = closest_hits(
+            count, pair_rays, np.arange(len(pair_rays)), pair_distances)
+        return [
+            Hit(objects[pair_objects[i]], float(d), int(pair_triangles[i]))
+            if i >= 0 else None
+            for d, i in zip(distances.tolist(), best.tolist())
+        ]
+
+    def pick(self, origin, direction, max_distance=None):
+        """Finds the closest mesh object hit by a ray.
+
+        See :meth:`pick_many`.
+
+        :param origin: Ray origin.
+        :type origin: :class:`matlib.vec.Vec` or sequence
+
+        :param direction: Ray direction.
+        :type direction: :class:`matlib.vec.Vec` or sequence
+
+        :param max_distance: Maximum hit distance.
+        :type max_distance: float
+
+        :returns: The closest hit or `None`.
+        :rtype: :class:`renderlib.picking.Hit`
+        """
+        return self.pick_many(
+            [_xyz(origin)],
+            [_xyz(direction)],
+            max_distance)[0]
+
+    @staticmethod
+    def _sort_key(kind, props):
+        """Returns sort key of objects drawn with given properties.
+
+        Quad and text properties are per-object uniforms rather than bound
+        state, so only their shader and texture are part of the key.
+        """
+        material = ffi.NULL
+        if kind == 'mesh':
+            # meshes are drawn without blending
+            material = props.material
+            shader = SHADER_SKINNED_MESH if props.animation else SHADER_MESH
+            transparent = False
+            texture = material.texture if material else ffi.NULL
+        elif kind == 'quad':
+            shader = SHADER_QUAD
+            texture = props.texture
+            transparent = props.opacity < 1.0 or props.color.w < 1.0
+        else:
+            # glyph edges are always blended
+            shader = SHADER_TEXT
+            texture = ffi.NULL
+            transparent = True
+        return sort_key((
+            shader,
+            int(ffi.cast('uintptr_t', texture)),
+            int(ffi.cast('uintptr_t', material)),
+        ), transparent)
+
+    def _sort(self):
+        for source in self._queue.sources:
+            self._queue.set_key(source, self._sort_key(*source))
+        for obj in self._queue.update():
+            self._move_to_end(obj)
+        self._shadows.sync()
+
+    @property
+    def frame_stats(self):
+        """Statistics of the last rendered frame, `None` before the first one.
+
+        :rtype: :class:`renderlib.stats.FrameStats`
+        """
+        return self._frame_stats
 
     def render(self, render_target, camera, light=None):
+        t0 = time.perf_counter()
+        for batch in self._quad_batches + self._text_batches:
+            batch.sync()
+        t1 = time.perf_counter()
+        self._culled_objects = self._culled_triangles = 0
+        if self.culling:
+            self._cull(camera)
+            self._has_culled = True
+        elif self._has_culled:
+            np = require_numpy('frustum culling')
+            self._set_culled(
+                np, np.zeros(len(self._mesh_objects), dtype=bool))
+            self._has_culled = False
+        t2 = time.perf_counter()
+        if self._sorting:
+            self._sort()
+        t3 = time.perf_counter()
         lib.scene_render(
             self._ptr,
             render_target.value,
             camera._ptr,
             light._ptr if light else ffi.NULL)
+        t4 = time.perf_counter()
+        self._frame_stats = self._collect_stats({
+            'sync': t1 - t0,
+            'cull': t2 - t1,
+            'sort': t3 - t2,
+            'render': t4 - t3,
+        })
+        tracer = get_tracer()
+        if tracer is not None:
+            self._trace_frame(tracer, t0, t4)
+
+    def _trace_frame(self, tracer, start, end):
+        stats = self._frame_stats
+        tracer.complete('Scene.render', 'scene', start, end - start)
+        t = start
+        for phase, duration in stats.phase_times.items():
+            tracer.complete(phase, 'scene', t, duration)
+            t += duration
+        tracer.counter('scene', {
+            'objects': stats.objects,
+            'drawn': stats.drawn,
+            'culled': stats.culled,
+            'triangles': stats.triangles,
+        })
+        tracer.counter('memory', {
+            'uploaded_bytes': total_uploaded_bytes(),
+        })
+
+    def _collect_stats(self, phase_times):
+        objects = self.object_count
+        hidden = self._hidden_objects
+        triangles = self._triangles - self._hidden_triangles
+        for batch in self._quad_batches + self._text_batches:
+            batch_hidden, batch_triangles = batch._stats()
+            hidden += batch_hidden
+            triangles += batch_triangles
+        drawn = objects - hidden - self._culled_objects
+        uploaded = total_uploaded_bytes()
+        uploaded_bytes = uploaded - self._uploaded_bytes
+        self._uploaded_bytes = uploaded
+        return FrameStats(
+            objects,
+            self._culled_objects,
+            drawn,
+            drawn,
+            triangles - self._culled_triangles,
+            self._queue.stats.binds if self._sorting else None,
+            uploaded_bytes,
+            phase_times)
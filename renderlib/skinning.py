@@ -0,0 +1,238 @@
+"""Skeletal pose evaluation.
+
+Pose math follows the C library: joint local transform is `T * R * S`, global
+transform is `parent_global * local` and the skinning matrix of a joint is
+`global * inverse_bind`. Matrices are row-major and act on column vectors.
+"""
+from renderlib.arrays import require_numpy
+
+
+def quat_to_matrices(q):
+    """Converts `(w, x, y, z)` quaternions to rotation matrices.
+
+    :param q: Quaternions, shape (..., 4).
+    :type q: :class:`numpy.ndarray`
+
+    :returns: Rotation matrices, shape (..., 3, 3).
+    :rtype: :class:`numpy.ndarray`
+    """
+    np = require_numpy('skinning')
+    w, x, y, z = np.moveaxis(np.asarray(q, dtype='float64'), -1, 0)
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], -1),
+        np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], -1),
+        np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], -1),
+    ], -2)
+
+
+def matrices_to_quat(m):
+    """Converts rotation matrices to `(w, x, y, z)` unit quaternions.
+
+    :param m: Rotation matrices, shape (..., 3, 3).
+    :type m: :class:`numpy.ndarray`
+
+    :returns: Quaternions, shape (..., 4).
+    :rtype: :class:`numpy.ndarray`
+    """
+    np = require_numpy('skinning')
+    m = np.asarray(m, dtype='float64')
+    m00, m11, m22 = m[..., 0, 0], m[..., 1, 1], m[..., 2, 2]
+    a = m[..., 2, 1] - m[..., 1, 2]
+    b = m[..., 0, 2] - m[..., 2, 0]
+    c = m[..., 1, 0] - m[..., 0, 1]
+    d = m[..., 0, 1] + m[..., 1, 0]
+    e = m[..., 0, 2] + m[..., 2, 0]
+    f = m[..., 1, 2] + m[..., 2, 1]
+    # unnormalized candidates, each accurate when its diagonal term is largest
+    candidates = np.stack([
+        np.stack([1 + m00 + m11 + m22, a, b, c], -1),
+        np.stack([a, 1 + m00 - m11 - m22, d, e], -1),
+        np.stack([b, d, 1 - m00 + m11 - m22, f], -1),
+        np.stack([c, e, f, 1 - m00 - m11 + m22], -1),
+    ], -2)
+    best = np.argmax(np.diagonal(candidates, axis1=-2, axis2=-1), axis=-1)
+    q = np.take_along_axis(candidates, best[..., None, None], -2)[..., 0, :]
+    q /= np.linalg.norm(q, axis=-1, keepdims=True)
+    # keep w non-negative
+    return q * np.where(q[..., :1] < 0, -1.0, 1.0)
+
+
+def joint_order(parents):
+    """Returns joint indices ordered so that parents go before children.
+
+    :param parents: Parent joint indices, -1 for roots.
+    :type parents: :class:`numpy.ndarray`
+
+    :rtype: list
+    """
+    order = []
+    done = set()
+    pending = list(range(len(parents)))
+    while pending:
+        left = []
+        for j in pending:
+            parent = int(parents[j])
+            if parent < 0 or parent in done:
+                order.append(j)
+                done.add(j)
+            else:
+                left.append(j)
+        if len(left) == len(pending):
+            raise RuntimeError('cyclic joint hierarchy')
+        pending = left
+    return order
+
+
+def skinning_matrices(skeleton, translations, rotations, scales):
+    """Computes joint skinning matrices for a batch of poses.
+
+    :param skeleton: Joint hierarchy.
+    :type skeleton: :class:`renderlib.meshfile.Skeleton`
+
+    :param translations: Joint translations, shape (K, J, 3).
+    :type translations: :class:`numpy.ndarray`
+
+    :param rotations: Joint `(w, x, y, z)` rotations, shape (K, J, 4).
+    :type rotations: :class:`numpy.ndarray`
+
+    :param scales: Joint scales, shape (K, J, 3).
+    :type scales: :class:`numpy.ndarray`
+
+    :returns: Skinning matrices, shape (K, J, 4, 4).
+    :rtype: :class:`numpy.ndarray`
+    """
+    np = require_numpy('skinning')
+    k, j = translations.shape[:2]
+    local = np.zeros((k, j, 4, 4))
+    local[..., :3, :3] = quat_to_matrices(rotations) * scales[..., None, :]
+    local[..., :3, 3] = translations
+    local[..., 3, 3] = 1.0
+
+    world = np.empty_like(local)
+    for joint in joint_order(skeleton.parents):
+        parent = skeleton.parents[joint]
+        if parent < 0:
+            world[:, joint] = local[:, joint]
+        else:
+            world[:, joint] = world[:, parent] @ local[:, joint]
+    return world @ skeleton.inverse_binds
+
+
+def joint_boxes(mesh):
+    """Computes bind pose bounding boxes of vertices influenced by each joint.
+
+    :param mesh: Skinned mesh data.
+    :type mesh: :class:`renderlib.meshfile.MeshData`
+
+    :returns: Box minimums and maximums, shape (J, 3) each, and a mask of
+        joints influencing at least one vertex.
+    :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`,
+        :class:`numpy.ndarray`)
+    """
+    np = require_numpy('skinning')
+    count = len(mesh.skeleton)
+    mins = np.full((count, 3), np.inf)
+    maxs = np.full((count, 3), -np.inf)
+    positions = np.asarray(mesh.positions, dtype='float64')
+    for slot in range(4):
+        used = mesh.joint_weights[:, slot] > 0
+        ids = mesh.joint_ids[used, slot].astype('int64')
+        np.minimum.at(mins, ids, positions[used])
+        np.maximum.at(maxs, ids, positions[used])
+    return mins, maxs, np.isfinite(mins).all(axis=1)
+
+
+def animated_aabb(mesh, animation):
+    """Computes a bounding box enclosing the mesh in every keyframe of an
+    animation.
+
+    Skinned vertices are convex combinations of vertices transformed by
+    influencing joints, thus transformed per-joint boxes enclose them and the
+    result is conservative for keyframe poses. In-between poses are
+    interpolated and stay close to the keyframes. The box is padded to account
+    for joint weights not summing up to exactly 255.
+
+    :param mesh: Skinned mesh data.
+    :type mesh: :class:`renderlib.meshfile.MeshData`
+
+    :param animation: Animation.
+    :type animation: :class:`renderlib.meshfile.AnimationData`
+
+    :returns: Box minimum and maximum.
+    :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`)
+    """
+    np = require_numpy('skinning')
+    mins, maxs, used = joint_boxes(mesh)
+    mins, maxs = mins[used], maxs[used]
+    corners = np.stack([
+        np.stack([
+            mins[:, 0] if x else maxs[:, 0],
+            mins[:, 1] if y else maxs[:, 1],
+            mins[:, 2] if z else maxs[:, 2],
+            np.ones(len(mins)),
+        ], -1)
+        for x in (0, 1) for y in (0, 1) for z in (0, 1)
+    ], 1)
+
+    matrices = skinning_matrices(
+        mesh.skeleton,
+        animation.translations,
+        animation.rotations,
+        animation.scales)[:, used]
+    # (K, J, 4, 4) x (J, 8, 4) -> (K, J, 8, 4)
+    transformed = np.einsum('kjab,jcb->kjca', matrices, corners)[..., :3]
+    points = transformed.reshape(-1, 3)
+    lo, hi = points.min(axis=0), points.max(axis=0)
+
+    # exported weights may sum up to 255 +/- rounding error, which scales
+    # skinned vertices relative to the origin
+    sums = mesh.joint_weights.sum(axis=1)
+    error = max(abs(int(sums.min()) - 255), abs(int(sums.max()) - 255)) / 255
+    pad = error * np.maximum(np.abs(lo), np.abs(hi))
+    return lo - pad, hi + pad
+
+
+def sample_pose(animation, times):
+    """Interpolates joint transforms of an animation at given times.
+
+    Translations and scales are interpolated linearly, rotations with
+    normalized linear interpolation. Times are wrapped around animation
+    duration.
+
+    :param animation: Animation.
+    :type animation: :class:`renderlib.meshfile.AnimationData`
+
+    :param times: Animation times, shape (N,).
+    :type times: :class:`numpy.ndarray`
+
+    :returns: Joint translations (N, J, 3), rotations (N, J, 4) and scales
+        (N, J, 3).
+    :rtype: (:class:`numpy.ndarray`, :class:`numpy.ndarray`,
+        :class:`numpy.ndarray`)
+    """
+    np = require_numpy('skinning')
+    keys = animation.times
+    times = np.asarray(times, dtype='float64')
+    if animation.duration > 0:
+        times = np.mod(times, animation.duration)
+    i = np.searchsorted(keys, times, side='right') - 1
+    i = np.clip(i, 0, len(keys) - 1)
+    j = np.minimum(i + 1, len(keys) - 1)
+    span = keys[j] - keys[i]
+    f = np.zeros(len(times))
+    np.divide(times - keys[i], span, out=f, where=span > 0)
+    f = np.clip(f, 0, 1)[:, None, None]
+
+    def lerp(a, b):
+        return a * (1 - f) + b * f
+
+    q0 = animation.rotations[i]
+    q1 = animation.rotations[j]
+    # interpolate along the shorter arc
+    q1 = np.where((q0 * q1).sum(axis=2, keepdims=True) < 0, -q1, q1)
+    rotations = lerp(q0, q1)
+    rotations /= np.linalg.norm(rotations, axis=2, keepdims=True)
+    return (
+        lerp(animation.translations[i], animation.translations[j]),
+        rotations,
+        lerp(animation.scales[i], animation.scales[j]))
@@ -0,0 +1,54 @@
+"""Frame statistics."""
+from collections import namedtuple
+
+#: Statistics of a rendered scene frame, see :attr:`renderlib.scene.Scene.
+#: frame_stats`.
+#:
+#: * `objects`: objects in the scene;
+#: * `culled`: visible objects hidden by frustum culling;
+#: * `drawn`: objects submitted for drawing;
+#: * `draw_calls`: draw calls, one per drawn object;
+#: * `triangles`: triangles of drawn meshes and quads;
+#: * `binds`: shader, material and texture binds, `None` unless the scene
+#:   sorts its objects;
+#: * `uploaded_bytes`: bytes of mesh and texture data uploaded to the GPU
+#:   since the previous frame of the scene, or since its creation for the
+#:   first frame; uploads aren't tied to scenes, so every scene counts all
+#:   of them;
+#: * `phase_times`: seconds spent in each phase of
+#:   :meth:`renderlib.scene.Scene.render`: `sync` of batches, `cull`, `sort`
+#:   and native `render`; all but the last are Python overhead.
+FrameStats = namedtuple('FrameStats', [
+    'objects',
+    'culled',
+    'drawn',
+    'draw_calls',
+    'triangles',
+    'binds',
+    'uploaded_bytes',
+    'phase_times',
+])
+
+#: Estimated GPU size of a mesh vertex: position, normal, UV, joint indices
+#: and weights.
+MESH_VERTEX_SIZE = 3 * 4 + 3 * 4 + 2 * 4 + 4 + 4
+
+_total_uploaded_bytes = 0
+
+
+def record_upload(nbytes):
+    """Adds bytes uploaded to the GPU to the process-wide count.
+
+    :param nbytes: Number of bytes.
+    :type nbytes: int
+    """
+    global _total_uploaded_bytes
+    _total_uploaded_bytes += nbytes
+
+
+def total_uploaded_bytes():
+    """Returns bytes uploaded to the GPU since the start of the process.
+
+    :rtype: int
+    """
+    return _total_uploaded_bytes
@@ -1,7 +1,14 @@
 """Text wrappers."""
 from _renderlib import ffi
 from _renderlib import lib
+from collections import OrderedDict
 from matlib.vec import Vec
+from renderlib.arrays import require_numpy
+from renderlib.arrays import struct_view
+from renderlib.arrays import sync_positions
+from renderlib.trace import span
+import re
+import weakref
 
 
 class Text:
@@ -23,7 +30,9 @@ class Text:
     def string(self, s):
         if self._string != s:
             self._string = s
-            if not lib.text_set_string(self._ptr, s.encode('utf8')):
+            with span('Text.string', 'text', length=len(s)):
+                ok = lib.text_set_string(self._ptr, s.encode('utf8'))
+            if not ok:
                 raise RuntimeError('failed to set text string')
 
     @property
@@ -57,3 +66,401 @@ class TextProps:
     @opacity.setter
     def opacity(self, value):
         self._ptr.opacity = value
+
+
+class TextLayoutCache:
+    """Cache of laid out strings of one font.
+
+    Entries are :class:`Text` objects which are never modified after creation,
+    so any number of scene objects can display them. Least recently used
+    entries beyond capacity are dropped from the cache; those still displayed
+    stay alive through scene object references.
+
+    Text users of a font share one cache by default, see :meth:`shared`. The
+    cache refers to its font weakly, so shared caches don't keep fonts alive
+    and are dropped along with them.
+
+    :param font: Font of cached strings.
+    :type font: :class:`renderlib.font.Font`
+
+    :param capacity: Maximum number of entries.
+    :type capacity: int
+    """
+
+    def __init__(self, font, capacity=256):
+        self._font = weakref.ref(font)
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def font(self):
+        """Font of cached strings, `None` once it's freed."""
+        return self._font()
+
+    @classmethod
+    def shared(cls, font):
+        """Returns the cache shared by text users of a font.
+
+        :param font: Font.
+        :type font: :class:`renderlib.font.Font`
+
+        :rtype: :class:`TextLayoutCache`
+        """
+        cache = _shared_caches.get(font)
+        if cache is None:
+            cache = _shared_caches[font] = cls(font)
+        return cache
+
+    def get(self, string):
+        """Returns a text object displaying given string.
+
+        :param string: String.
+        :type string: str
+
+        :rtype: :class:`Text`
+        """
+        text = self._entries.get(string)
+        if text is None:
+            font = self.font
+            if font is None:
+                raise RuntimeError('font of the layout cache was freed')
+            self.misses += 1
+            text = Text(font, string)
+            self._entries[string] = text
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(string)
+        return text
+
+    def clear(self):
+        self._entries.clear()
+
+
+#: Layout caches shared by text users, keyed by font.
+_shared_caches = weakref.WeakKeyDictionary()
+
+
+def _layout_cache(font, cache):
+    if cache is None:
+        return TextLayoutCache.shared(font)
+    if cache.font is not font:
+        raise RuntimeError('layout cache is for a different font')
+    return cache
+
+
+class _Run:
+    def __init__(self, string, text, owned=False):
+        self.string = string
+        self.text = text
+        self.owned = owned
+        self.changed = False
+        self.obj = None
+        self.x = None
+
+
+class TextLine:
+    """A line of text split into runs which are updated independently.
+
+    The string is split into words with their trailing spaces, each displayed
+    by a separate scene object using a laid out string from a
+    :class:`TextLayoutCache`. When the string changes only objects of changed
+    runs are replaced and strings seen before are not laid out again, which
+    makes strings with a few characters changing every frame, like statistics
+    lines, cheap to update. A run which changes on consecutive updates gets
+    its own text which is laid out again in place instead, so values which
+    never repeat don't churn the cache. Kerning between runs is not applied.
+
+    :param font: Font.
+    :type font: :class:`renderlib.font.Font`
+
+    :param props: Text properties shared by all runs.
+    :type props: :class:`TextProps`
+
+    :param string: Initial string.
+    :type string: str
+
+    :param cache: Layout cache of the font, by default the one shared by
+        users of the font.
+    :type cache: :class:`TextLayoutCache`
+    """
+
+    def __init__(self, font, props, string='', cache=None):
+        self.font = font
+        self.props = props
+        self._cache = _layout_cache(font, cache)
+        self._scene = None
+        self._position = (0.0, 0.0, 0.0)
+        self._runs = []
+        self._string = None
+        self.string = string
+
+    @property
+    def string(self):
+        return self._string
+
+    @string.setter
+    def string(self, s):
+        if self._string == s:
+            return
+        self._string = s
+
+        runs = []
+        for i, string in enumerate(re.findall(r'\S+\s*|\s+', s)):
+            prev = self._runs[i] if i < len(self._runs) else None
+            if prev is None:
+                run = _Run(string, self._cache.get(string))
+            elif prev.string == string:
+                run = prev
+                run.changed = False
+                runs.append(run)
+                continue
+            elif prev.owned:
+                run = prev
+                run.text.string = string
+                run.string = string
+            elif prev.changed:
+                run = _Run(string, Text(self.font, string), owned=True)
+            else:
+                run = _Run(string, self._cache.get(string))
+            run.changed = prev is not None
+            runs.append(run)
+        for run in self._runs[len(runs):] + [
+                r for r, new in zip(self._runs, runs) if r is not new]:
+            if run.obj:
+                run.obj.remove()
+        self._runs = runs
+        self._place()
+
+    @property
+    def position(self):
+        """Position of the line start as `(x, y, z)` tuple."""
+        return self._position
+
+    @position.setter
+    def position(self, p):
+        self._position = tuple(p)
+        for run in self._runs:
+            run.x = None
+        self._place()
+
+    @property
+    def width(self):
+        return sum(run.text.width for run in self._runs)
+
+    @property
+    def height(self):
+        return max((run.text.height for run in self._runs), default=0)
+
+    def _place(self):
+        if not self._scene:
+            return
+        x, y, z = self._position
+        for run in self._runs:
+            if not run.obj:
+                run.obj = self._scene.add_text(run.text, self.props)
+            if run.x != x:
+                run.obj.position = Vec(x, y, z)
+                run.x = x
+            x += run.text.width
+
+    def _attach(self, scene):
+        if self._scene:
+            raise RuntimeError('text line is already added to a scene')
+        self._scene = scene
+        self._place()
+
+    def _detach(self):
+        for run in self._runs:
+            if run.obj:
+                run.obj.remove()
+            run.obj = run.x = None
+        self._scene = None
+
+
+class TextBatch:
+    """A fixed-capacity set of text labels sharing one font, with their
+    properties stored in contiguous arrays.
+
+    Labels displaying the same string share one laid out text from a
+    :class:`TextLayoutCache`, so the batch holds one native text per distinct
+    string instead of one per label. Colors and opacities are NumPy views on
+    the native properties, so writing to them takes effect immediately.
+    Positions are kept in a separate array and copied to scene objects by
+    :meth:`sync`, which :meth:`renderlib.scene.Scene.render` calls for every
+    batch added to the scene. Adding, changing and removing a label only
+    touches the scene object of that label. A label whose string changes in
+    consecutive frames gets its own text which is laid out again in place,
+    like runs of :class:`TextLine`.
+
+    Requires NumPy.
+
+    :param font: Font shared by all labels.
+    :type font: :class:`renderlib.font.Font`
+
+    :param capacity: Maximum number of labels.
+    :type capacity: int
+
+    :param cache: Layout cache of the font, by default the one shared by
+        users of the font.
+    :type cache: :class:`TextLayoutCache`
+    """
+
+    def __init__(self, font, capacity, cache=None):
+        np = require_numpy('text batches')
+        self.font = font
+        self._cache = _layout_cache(font, cache)
+        self._capacity = capacity
+        self._scene = None
+        self._frame = 0
+        self._texts = [None] * capacity
+        self._owned = [False] * capacity
+        self._changed = [-2] * capacity
+        self._objects = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+
+        self._props = ffi.new('struct TextProps[]', capacity)
+        vec_size = ffi.sizeof('Vec') // ffi.sizeof('float')
+        props = struct_view(
+            np,
+            self._props,
+            'struct TextProps',
+            [('color', vec_size), ('opacity', 1)])
+        self._colors = props['color']
+        self._opacities = props['opacity']
+        self._positions = np.zeros((capacity, 3), dtype='f4')
+        self._synced = np.zeros((capacity, 3), dtype='f4')
+
+        self._colors[:] = 1.0
+        self._opacities[:] = 1.0
+
+    def __len__(self):
+        return self._capacity - len(self._free)
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def positions(self):
+        """Label positions, array of shape (capacity, 3)."""
+        return self._positions
+
+    @property
+    def colors(self):
+        """Label RGBA colors, array of shape (capacity, 4)."""
+        return self._colors
+
+    @property
+    def opacities(self):
+        """Label opacities, array of shape (capacity,)."""
+        return self._opacities
+
+    def add(self, string, position=(0, 0, 0)):
+        """Adds a label.
+
+        :param string: Label string.
+        :type string: str
+
+        :param position: Label position.
+        :type position: (float, float, float)
+
+        :returns: Label index into property arrays.
+        :rtype: int
+        """
+        if not self._free:
+            raise RuntimeError('text batch is full')
+        i = self._free.pop()
+        self._positions[i] = position
+        self._colors[i] = 1.0
+        self._opacities[i] = 1.0
+        self._set_text(i, self._cache.get(string))
+        return i
+
+    def remove(self, label):
+        self._check(label)
+        self._remove_object(label)
+        self._texts[label] = None
+        self._owned[label] = False
+        self._changed[label] = -2
+        self._free.append(label)
+
+    def get_string(self, label):
+        self._check(label)
+        return self._texts[label].string
+
+    def set_string(self, label, string):
+        self._check(label)
+        if self._texts[label].string == string:
+            return
+        if self._owned[label]:
+            self._texts[label].string = string
+        elif self._changed[label] >= self._frame - 1:
+            self._owned[label] = True
+            self._set_text(label, Text(self.font, string))
+        else:
+            self._set_text(label, self._cache.get(string))
+        self._changed[label] = self._frame
+
+    def size(self, label):
+        """Returns width and height of a label.
+
+        :rtype: (int, int)
+        """
+        self._check(label)
+        text = self._texts[label]
+        return text.width, text.height
+
+    def sync(self):
+        """Copies changed positions to scene objects."""
+        self._frame += 1
+        if not self._scene:
+            return
+        sync_positions(
+            require_numpy('text batches'),
+            self._positions,
+            self._synced,
+            self._objects)
+
+    def _check(self, label):
+        if not 0 <= label < self._capacity or self._texts[label] is None:
+            raise RuntimeError('invalid text label')
+
+    def _set_text(self, i, text):
+        self._texts[i] = text
+        if self._scene:
+            self._remove_object(i)
+            self._add_object(i)
+
+    def _add_object(self, i):
+        self._objects[i] = lib.scene_add_text(
+            self._scene._ptr, self._texts[i]._ptr, self._props + i)
+        self._synced[i] = float('nan')
+
+    def _remove_object(self, i):
+        if self._objects[i] is not None:
+            lib.scene_remove_object(self._scene._ptr, self._objects[i])
+            self._objects[i] = None
+
+    def _stats(self):
+        """Returns numbers of hidden objects and drawn triangles."""
+        return 0, 0
+
+    def _attach(self, scene):
+        if self._scene is not None:
+            raise RuntimeError('text batch is already added to a scene')
+        self._scene = scene
+        for i, text in enumerate(self._texts):
+            if text is not None:
+                self._add_object(i)
+
+    def _detach(self):
+        for i in range(self._capacity):
+            self._remove_object(i)
+        self._scene = None
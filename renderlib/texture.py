@@ -1,6 +1,12 @@
 """Texture wrappers"""
 from _renderlib import lib
+from collections import deque
+from renderlib.stats import record_upload
+from renderlib.trace import traced
+from concurrent.futures import Future
 from enum import IntEnum
+import asyncio
+import threading
 
 class Texture:
 
@@ -15,8 +21,95 @@ class Texture:
         lib.texture_free(self._ptr)
 
     @classmethod
+    @traced('Texture.from_image', 'texture')
     def from_image(cls, img, tex_type):
         ptr = lib.texture_from_image(img._ptr, tex_type)
         if not ptr:
             raise RuntimeError('failed to create texture from image')
-        return Texture(ptr)
\ No newline at end of file
+        record_upload(img.nbytes)
+        return Texture(ptr)
+
+
+class TextureUploadQueue:
+    """Queue of images waiting to be turned into textures.
+
+    Images can be pushed from any thread, while :meth:`process` must be called
+    once per frame from the thread owning the OpenGL context. Each call creates
+    textures until the byte budget is spent, so streaming in lots of images
+    is spread over several frames instead of stalling a single one.
+
+    :param budget: Maximum number of image bytes to upload per frame. At least
+        one image is uploaded per frame regardless of its size.
+    :type budget: int
+    """
+
+    def __init__(self, budget=4 * 1024 * 1024):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._pending_bytes = 0
+
+    def __len__(self):
+        return len(self._queue)
+
+    @property
+    def pending_bytes(self):
+        """Total size of queued images in bytes."""
+        return self._pending_bytes
+
+    def push(self, img, tex_type):
+        """Queues an image for uploading.
+
+        :param img: Image to create the texture from.
+        :type img: :class:`renderlib.image.Image`
+
+        :param tex_type: Texture type.
+        :type tex_type: :class:`Texture.TextureType`
+
+        :returns: Future of the texture.
+        :rtype: :class:`concurrent.futures.Future`
+        """
+        future = Future()
+        with self._lock:
+            self._queue.append((img, tex_type, future))
+            self._pending_bytes += img.nbytes
+        return future
+
+    async def upload(self, img, tex_type):
+        """Queues an image and waits until its texture is created.
+
+        :param img: Image to create the texture from.
+        :type img: :class:`renderlib.image.Image`
+
+        :param tex_type: Texture type.
+        :type tex_type: :class:`Texture.TextureType`
+
+        :rtype: :class:`Texture`
+        """
+        return await asyncio.wrap_future(self.push(img, tex_type))
+
+    def process(self):
+        """Creates textures for queued images within the byte budget.
+
+        :returns: Number of bytes uploaded.
+        :rtype: int
+        """
+        uploaded = 0
+        while True:
+            with self._lock:
+                if not self._queue:
+                    break
+                img, tex_type, future = self._queue[0]
+                if uploaded and uploaded + img.nbytes > self.budget:
+                    break
+                self._queue.popleft()
+                self._pending_bytes -= img.nbytes
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            uploaded += img.nbytes
+            try:
+                future.set_result(Texture.from_image(img, tex_type))
+            except RuntimeError as err:
+                future.set_exception(err)
+        return uploaded
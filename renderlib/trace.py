@@ -0,0 +1,228 @@
+"""Opt-in tracing of renderlib calls.
+
+Spans of scene renders, animation playback, text updates, texture creation
+and asset loads, as well as scene and memory counters, are recorded into a
+ring buffer while tracing is enabled. Recorded events are exported in Chrome
+trace event format, which can be opened in `chrome://tracing` or Perfetto.
+
+When tracing is disabled, instrumented calls only check a module global.
+"""
+from collections import deque
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+_tracer = None
+_null_span = contextlib.nullcontext()
+
+
+class Tracer:
+    """Ring buffer of trace events.
+
+    :param capacity: Maximum number of events kept; the oldest events are
+        dropped first.
+    :type capacity: int
+    """
+
+    def __init__(self, capacity=65536):
+        self._events = deque(maxlen=capacity)
+        self._pid = os.getpid()
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def capacity(self):
+        return self._events.maxlen
+
+    def complete(self, name, category, start, duration, args=None):
+        """Records a span.
+
+        :param name: Span name.
+        :type name: str
+
+        :param category: Span category.
+        :type category: str
+
+        :param start: Start time as returned by :func:`time.perf_counter`.
+        :type start: float
+
+        :param duration: Duration in seconds.
+        :type duration: float
+
+        :param args: Extra span data.
+        :type args: dict
+        """
+        self._events.append((
+            'X',
+            name,
+            category,
+            start,
+            duration,
+            threading.get_ident(),
+            args))
+
+    def counter(self, name, values):
+        """Records counter values.
+
+        :param name: Counter name.
+        :type name: str
+
+        :param values: Values keyed by series name.
+        :type values: dict
+        """
+        self._events.append((
+            'C',
+            name,
+            'counters',
+            time.perf_counter(),
+            None,
+            threading.get_ident(),
+            values))
+
+    def clear(self):
+        self._events.clear()
+
+    def events(self):
+        """Returns recorded events in Chrome trace event format.
+
+        :rtype: list
+        """
+        events = []
+        for phase, name, category, start, duration, tid, args in (
+                list(self._events)):
+            event = {
+                'ph': phase,
+                'name': name,
+                'cat': category,
+                'ts': start * 1e6,
+                'pid': self._pid,
+                'tid': tid,
+            }
+            if duration is not None:
+                event['dur'] = duration * 1e6
+            if args:
+                event['args'] = args
+            events.append(event)
+        return events
+
+    def save(self, filename):
+        """Saves recorded events to a Chrome trace JSON file.
+
+        :param filename: File name.
+        :type filename: str
+        """
+        with open(filename, 'w') as fp:
+            json.dump({
+                'traceEvents': self.events(),
+                'displayTimeUnit': 'ms',
+            }, fp)
+
+
+class _Span:
+    __slots__ = ('_tracer', '_name', '_category', '_args', '_start')
+
+    def __init__(self, tracer, name, category, args):
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._args = args
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._tracer.complete(
+            self._name,
+            self._category,
+            self._start,
+            time.perf_counter() - self._start,
+            self._args)
+
+
+def start_tracing(capacity=65536):
+    """Enables tracing into a new ring buffer.
+
+    :param capacity: Maximum number of events kept.
+    :type capacity: int
+
+    :rtype: :class:`Tracer`
+    """
+    global _tracer
+    _tracer = Tracer(capacity)
+    return _tracer
+
+
+def stop_tracing():
+    """Disables tracing.
+
+    :returns: The tracer which recorded events so far, if any.
+    :rtype: :class:`Tracer`
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def get_tracer():
+    """Returns the active tracer or `None` if tracing is disabled.
+
+    :rtype: :class:`Tracer`
+    """
+    return _tracer
+
+
+def span(name, category='renderlib', **args):
+    """Returns a context manager recording a span while tracing is enabled.
+
+    :param name: Span name.
+    :type name: str
+
+    :param category: Span category.
+    :type category: str
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _null_span
+    return _Span(tracer, name, category, args or None)
+
+
+def traced(name, category='renderlib'):
+    """Decorator recording a span for every call of a function while tracing
+    is enabled.
+
+    :param name: Span name.
+    :type name: str
+
+    :param category: Span category.
+    :type category: str
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.complete(
+                    name, category, start, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def counter(name, **values):
+    """Records counter values while tracing is enabled.
+
+    :param name: Counter name.
+    :type name: str
+    """
+    tracer = _tracer
+    if tracer is not None:
+        tracer.counter(name, values)
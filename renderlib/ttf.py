@@ -0,0 +1,184 @@
+"""TrueType font metrics reader.
+
+Reads only what's needed to measure text: units per em and vertical metrics
+from `head` and `hhea` tables, glyph advances from `hmtx`, character to glyph
+mapping from `cmap` (formats 4 and 12) and, if present, kerning pairs from
+`kern` (format 0).
+"""
+import struct
+
+
+class FontMetrics:
+    """Horizontal metrics of a TrueType font scaled to a point size.
+
+    Pixel sizes assume one pixel per point. Advances and kerning are kept
+    unrounded and line widths are rounded once, as the native text layout
+    does. Missing characters measure as the font's missing glyph.
+
+    :param data: Font file contents.
+    :type data: buffer
+
+    :param ptsize: Point size.
+    :type ptsize: int
+    """
+
+    def __init__(self, data, ptsize):
+        data = memoryview(data).cast('B')
+        try:
+            tables = self._read_tables(data)
+            head = tables[b'head']
+            hhea = tables[b'hhea']
+            units_per_em, = struct.unpack_from('>H', data, head + 18)
+            ascender, descender, line_gap = struct.unpack_from(
+                '>hhh', data, hhea + 4)
+            metric_count, = struct.unpack_from('>H', data, hhea + 34)
+            self._advances = [
+                struct.unpack_from('>H', data, tables[b'hmtx'] + 4 * i)[0]
+                for i in range(metric_count)
+            ]
+            self._glyphs = self._read_cmap(data, tables[b'cmap'])
+            self._kerning = {}
+            if b'kern' in tables:
+                self._kerning = self._read_kern(data, tables[b'kern'])
+        except (KeyError, struct.error):
+            raise RuntimeError('invalid or unsupported font data')
+
+        self.ptsize = ptsize
+        self.scale = ptsize / units_per_em
+        self.ascent = round(ascender * self.scale)
+        self.descent = round(descender * self.scale)
+        self.line_height = round(
+            (ascender - descender + line_gap) * self.scale)
+        self._pixel_advances = {}
+
+    @staticmethod
+    def _read_tables(data):
+        count, = struct.unpack_from('>H', data, 4)
+        tables = {}
+        for i in range(count):
+            tag, _, offset, _ = struct.unpack_from('>4sIII', data, 12 + 16 * i)
+            tables[tag] = offset
+        return tables
+
+    @staticmethod
+    def _read_cmap(data, cmap):
+        count, = struct.unpack_from('>H', data, cmap + 2)
+        subtables = {}
+        for i in range(count):
+            platform, encoding, offset = struct.unpack_from(
+                '>HHI', data, cmap + 4 + 8 * i)
+            fmt, = struct.unpack_from('>H', data, cmap + offset)
+            subtables[(platform, encoding, fmt)] = cmap + offset
+
+        glyphs = {}
+        for key in ((3, 10, 12), (0, 4, 12), (0, 6, 12)):
+            if key in subtables:
+                offset = subtables[key]
+                groups, = struct.unpack_from('>I', data, offset + 12)
+                for i in range(groups):
+                    start, end, glyph = struct.unpack_from(
+                        '>III', data, offset + 16 + 12 * i)
+                    for c in range(start, end + 1):
+                        glyphs[c] = glyph + c - start
+                return glyphs
+
+        for key in ((3, 1, 4), (0, 3, 4), (0, 0, 4), (0, 1, 4), (3, 0, 4)):
+            if key in subtables:
+                offset = subtables[key]
+                segments = struct.unpack_from('>H', data, offset + 6)[0] // 2
+                ends = offset + 14
+                starts = ends + 2 * segments + 2
+                deltas = starts + 2 * segments
+                range_offsets = deltas + 2 * segments
+                for i in range(segments):
+                    end, = struct.unpack_from('>H', data, ends + 2 * i)
+                    start, = struct.unpack_from('>H', data, starts + 2 * i)
+                    delta, = struct.unpack_from('>h', data, deltas + 2 * i)
+                    address = range_offsets + 2 * i
+                    range_offset, = struct.unpack_from('>H', data, address)
+                    # glyph index array address of the segment start
+                    base = address + range_offset - 2 * start
+                    for c in range(start, min(end, 0xFFFE) + 1):
+                        if range_offset:
+                            glyph, = struct.unpack_from('>H', data, base + 2 * c)
+                            if glyph:
+                                glyph = (glyph + delta) & 0xFFFF
+                        else:
+                            glyph = (c + delta) & 0xFFFF
+                        if glyph:
+                            glyphs[c] = glyph
+                return glyphs
+
+        raise RuntimeError('font has no supported character map')
+
+    @staticmethod
+    def _read_kern(data, kern):
+        pairs = {}
+        version, count = struct.unpack_from('>HH', data, kern)
+        if version != 0:
+            return pairs
+        offset = kern + 4
+        for _ in range(count):
+            _, length, coverage = struct.unpack_from('>HHH', data, offset)
+            # format 0 with horizontal kerning values
+            if coverage >> 8 == 0 and coverage & 0x7 == 0x1:
+                n, = struct.unpack_from('>H', data, offset + 6)
+                for i in range(n):
+                    left, right, value = struct.unpack_from(
+                        '>HHh', data, offset + 14 + 6 * i)
+                    pairs[(left, right)] = value
+            offset += length
+        return pairs
+
+    def glyph(self, char):
+        """Returns glyph index of a character, 0 for missing ones."""
+        return self._glyphs.get(ord(char), 0)
+
+    def advance(self, char):
+        """Returns unrounded pen advance of a character in pixels.
+
+        :rtype: float
+        """
+        advance = self._pixel_advances.get(char)
+        if advance is None:
+            glyph = self.glyph(char)
+            units = self._advances[min(glyph, len(self._advances) - 1)]
+            advance = self._pixel_advances[char] = units * self.scale
+        return advance
+
+    def kerning(self, left, right):
+        """Returns unrounded kerning adjustment of a character pair in pixels.
+
+        :rtype: float
+        """
+        if not self._kerning:
+            return 0
+        value = self._kerning.get((self.glyph(left), self.glyph(right)), 0)
+        return value * self.scale
+
+    def prefix_widths(self, line):
+        """Returns widths of all prefixes of a single line string, starting
+        with the empty one.
+
+        :rtype: list
+        """
+        widths = [0]
+        x = 0
+        prev = None
+        for char in line:
+            if prev is not None:
+                x += self.kerning(prev, char)
+            x += self.advance(char)
+            widths.append(round(x))
+            prev = char
+        return widths
+
+    def width(self, line):
+        """Returns width of a single line string in pixels.
+
+        :rtype: int
+        """
+        if not self._kerning:
+            advance = self.advance
+            return round(sum(advance(char) for char in line))
+        return self.prefix_widths(line)[-1]
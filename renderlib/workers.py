@@ -0,0 +1,35 @@
+"""Shared worker thread pool."""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+_lock = threading.Lock()
+_executor = None
+
+
+def get_executor():
+    """Returns the process-wide thread pool used for background work.
+
+    The pool is created on first use with the default number of workers. The
+    C library calls release the GIL, so file reading and decoding running in
+    the pool is done in parallel.
+
+    :rtype: :class:`concurrent.futures.Executor`
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix='renderlib')
+        return _executor
+
+
+def set_executor(executor):
+    """Replaces the process-wide thread pool.
+
+    The previous pool, if any, is not shut down.
+
+    :param executor: Executor to use for background work.
+    :type executor: :class:`concurrent.futures.Executor`
+    """
+    global _executor
+    with _lock:
+        _executor = executor
@@ -4,9 +4,10 @@ setup(
     name='renderlib',
     version='0.1.8',
     packages=['renderlib'],
-    setup_requires=['cffi>=1.0.0', 'matlib>=0.1.7'],
+    setup_requires=['cffi>=1.12.0', 'matlib>=0.1.7'],
     cffi_modules=['build.py:ffi'],
-    install_requires=['cffi>=1.0.0', 'matlib>=0.1.7'],
+    install_requires=['cffi>=1.12.0', 'matlib>=0.1.7'],
+    extras_require={'numpy': ['numpy']},
 
     # metadata for PyPI
     author='Ivan Nikolaev',
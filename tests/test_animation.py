@@ -1,9 +1,104 @@
+from renderlib.animation import AnimationGroup
 from renderlib.animation import AnimationInstance
+from renderlib.animation import AnimationLOD
+from renderlib.animation import AnimationScheduler
 from renderlib.mesh import Mesh
+from renderlib.mesh import MeshProps
+from renderlib.posetable import PoseTable
+import os
+import pytest
+import shutil
 
 def test_animation_play(context):
     mesh = Mesh.from_file('tests/data/zombie.mesh')
     assert len(mesh.animations) > 0
 
     inst = AnimationInstance(mesh.animations[0])
-    inst.play(1.234)
\ No newline at end of file
+    inst.play(1.234)
+
+
+def test_animation_group_play(context):
+    mesh = Mesh.from_file('tests/data/zombie.mesh')
+    instances = [AnimationInstance(mesh.animations[0]) for _ in range(10)]
+
+    group = AnimationGroup(threaded=True, chunk_size=3)
+    for i, inst in enumerate(instances):
+        group.add(inst, time_scale=1 + i * 0.1)
+    assert len(group) == 10
+    assert group.get_time_scale(instances[2]) == 1.2
+    group.play(0.5)
+
+    group.remove(instances[0])
+    group.set_time_scale(instances[1], 2)
+    assert len(group) == 9
+    group.threaded = False
+    group.play(0.5)
+
+
+def test_animation_scheduler(context):
+    mesh = Mesh.from_file('tests/data/zombie.mesh')
+    animation = mesh.animations[0]
+    props = [MeshProps() for _ in range(4)]
+
+    scheduler = AnimationScheduler(lod=AnimationLOD([(50, 10)]))
+    near = scheduler.add(animation, props[:2])
+    also_near = scheduler.add(animation, props[2:3])
+    far = scheduler.add(animation, props[3:], time=0.5)
+    far.distance = 100
+    assert scheduler.instance_count == 2
+    assert props[0].animation is props[2].animation
+    assert props[3].animation is not props[0].animation
+
+    assert scheduler.update(0.05) == 1
+    assert scheduler.update(0.05) == 2
+    assert far.time == pytest.approx(0.6)
+
+    scheduler.set_time_scale(also_near, 2)
+    assert scheduler.instance_count == 3
+    assert props[2].animation is not props[0].animation
+    scheduler.remove(near)
+    assert scheduler.instance_count == 2
+
+
+def test_animation_bake(context, tmpdir):
+    pytest.importorskip('numpy')
+    filename = str(tmpdir.join('zombie.mesh'))
+    shutil.copy('tests/data/zombie.mesh', filename)
+    mesh = Mesh.from_file(filename)
+
+    table = mesh.animations[0].bake(sample_rate=15)
+    assert not tmpdir.listdir(lambda p: p.ext == '.poses')
+
+    quantized = mesh.animations[0].bake(sample_rate=15, quantize=True)
+    assert quantized.quantized
+    assert quantized.nbytes < table.nbytes
+
+
+def test_animation_bake_cache(context, tmpdir, monkeypatch):
+    pytest.importorskip('numpy')
+    filename = str(tmpdir.join('zombie.mesh'))
+    shutil.copy('tests/data/zombie.mesh', filename)
+    cache_dir = tmpdir.mkdir('cache')
+    mesh = Mesh.from_file(filename)
+    animation = mesh.animations[0]
+
+    table = animation.bake(sample_rate=15, cache=True)
+    assert os.path.exists(filename + '.0.15hz.poses')
+    animation.bake(sample_rate=15, quantize=True, cache=True,
+        cache_dir=str(cache_dir))
+    assert cache_dir.join('zombie.mesh.0.15hz.q.poses').exists()
+
+    def bake(*args):
+        raise AssertionError('pose table was baked again')
+
+    monkeypatch.setattr(PoseTable, 'bake', bake)
+    cached = animation.bake(sample_rate=15, cache=True)
+    assert cached.sample_count == table.sample_count
+    assert not cached.quantized
+    cached = animation.bake(sample_rate=15, quantize=True, cache=True,
+        cache_dir=str(cache_dir))
+    assert cached.quantized
+
+    reports = mesh.animations[0].bake_report(sample_rates=[10])
+    assert [r.quantized for r in reports] == [False, True]
+    assert all(r.interpolation_time > 0 and r.lookup_time > 0 for r in reports)
@@ -0,0 +1,37 @@
+from array import array
+from renderlib.arrays import as_ndarray
+import pytest
+
+np = pytest.importorskip('numpy')
+
+
+def test_as_ndarray_converts_typed_data():
+    data = np.arange(15, dtype='float64').reshape(5, 3)
+    arr = as_ndarray('float32', 3, data)
+    assert arr.dtype == np.float32
+    assert arr.shape == (5, 3)
+    assert (arr == data).all()
+
+    strided = np.arange(30, dtype='float32').reshape(5, 6)[:, ::2]
+    arr = as_ndarray('float32', 3, strided)
+    assert arr.shape == (5, 3)
+    assert (arr == strided).all()
+
+    arr = as_ndarray('uint32', 1, array('i', [1, 2, 3]))
+    assert arr.ravel().tolist() == [1, 2, 3]
+
+    arr = as_ndarray('float32', 2, [(1, 2), (3, 4)])
+    assert arr.tolist() == [[1, 2], [3, 4]]
+
+
+def test_as_ndarray_reinterprets_bytes():
+    data = np.arange(6, dtype='float32')
+    arr = as_ndarray('float32', 3, data.tobytes())
+    assert (arr.ravel() == data).all()
+
+
+def test_as_ndarray_invalid():
+    with pytest.raises(RuntimeError):
+        as_ndarray('float32', 3, np.zeros(4))
+    with pytest.raises(RuntimeError):
+        as_ndarray('float32', 3, object())
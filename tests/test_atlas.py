@@ -0,0 +1,71 @@
+from renderlib import png
+from renderlib.atlas import Atlas
+from renderlib.atlas import AtlasLayout
+from renderlib.texture import Texture
+import pytest
+import random
+
+ICONS = {
+    'star': 'tests/data/star.png',
+    'close_btn': 'tests/data/close_btn.png',
+}
+
+
+def test_png_roundtrip():
+    with open('tests/data/star.png', 'rb') as fp:
+        w, h, pixels = png.decode(fp.read())
+    assert (w, h) == (31, 30)
+    assert png.decode(png.encode(w, h, pixels)) == (w, h, pixels)
+
+
+def test_png_unfilter(monkeypatch):
+    numpy = pytest.importorskip('numpy')
+    rnd = random.Random(7)
+    height, stride, bpp = 9, 4 * 11, 4
+    raw = bytearray()
+    for row in range(height):
+        raw.append(row % 5)
+        raw.extend(rnd.randrange(256) for _ in range(stride))
+    raw = bytes(raw)
+    expected = png._unfilter_numpy(numpy, raw, height, stride, bpp)
+    monkeypatch.setattr(png, 'numpy', None)
+    assert png._unfilter(raw, height, stride, bpp) == expected
+
+
+def test_atlas_layout_pack():
+    rnd = random.Random(0)
+    sizes = {
+        str(i): (rnd.randint(8, 64), rnd.randint(8, 64))
+        for i in range(300)
+    }
+    layout = AtlasLayout.pack(sizes, (512, 512), padding=1)
+    assert layout.page_count == 2
+
+    regions = list(layout.regions.values())
+    for i, a in enumerate(regions):
+        assert a.x + a.width <= 512 and a.y + a.height <= 512
+        for b in regions[i + 1:]:
+            assert a.page != b.page or \
+                a.x + a.width <= b.x or b.x + b.width <= a.x or \
+                a.y + a.height <= b.y or b.y + b.height <= a.y
+
+    restored = AtlasLayout.from_dict(layout.to_dict())
+    assert restored.regions == layout.regions
+    assert restored.uv('0') == layout.uv('0')
+
+
+def test_atlas(context, tmpdir):
+    atlas = Atlas.build(ICONS, page_size=(128, 128))
+    assert atlas.layout.page_count == 1
+
+    region = atlas.region('close_btn')
+    assert isinstance(region.texture, Texture)
+    assert (region.width, region.height) == (38, 36)
+    left, top, right, bottom = region.uv
+    assert 0 <= left < right <= 1 and 0 <= top < bottom <= 1
+
+    filename = str(tmpdir.join('icons.json'))
+    atlas.save(filename)
+    loaded = Atlas.load(filename)
+    assert loaded.layout.regions == atlas.layout.regions
+    assert loaded.region('star').uv == atlas.region('star').uv
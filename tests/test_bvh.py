@@ -0,0 +1,51 @@
+from renderlib.bvh import BVH
+from renderlib.frustum import Frustum
+from renderlib.frustum import INSIDE
+from renderlib.frustum import INTERSECTING
+from renderlib.frustum import OUTSIDE
+import pytest
+
+np = pytest.importorskip('numpy')
+
+
+def perspective(fovy, aspect, near, far):
+    f = 1 / np.tan(np.radians(fovy) / 2)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ])
+
+
+def test_frustum_classify():
+    frustum = Frustum.from_matrix(perspective(60, 1, 1, 100))
+    mins = np.array([(-1, -1, -12), (-1, -1, 5), (-1, -1, -101), (-36, -1, -60)])
+    maxs = mins + 2
+    assert list(frustum.classify_aabbs(mins, maxs)) == [
+        INSIDE, OUTSIDE, INTERSECTING, INTERSECTING]
+    assert list(frustum.test_spheres(mins + 1, [1, 1, 1, 1])) == [
+        True, False, True, True]
+    assert list(frustum.classify_aabbs(mins - 50, maxs - 50)) == [OUTSIDE] * 4
+
+
+@pytest.mark.parametrize('count', [0, 1, 5, 1000])
+def test_bvh_query(count):
+    rnd = np.random.default_rng(count)
+    centers = rnd.uniform(-200, 200, (count, 3))
+    radii = rnd.uniform(0.5, 3, count)
+    bvh = BVH(centers - radii[:, None], centers + radii[:, None])
+    assert len(bvh) == count
+
+    frustum = Frustum.from_matrix(perspective(60, 4 / 3, 1, 150))
+    for _ in range(2):
+        inside, candidates = bvh.query(frustum.classify_aabbs)
+        visible = np.zeros(count, dtype=bool)
+        visible[inside] = True
+        visible[candidates] = frustum.test_spheres(
+            centers[candidates],
+            radii[candidates])
+        assert (visible == frustum.test_spheres(centers, radii)).all()
+
+        centers += 10
+        bvh.refit(centers - radii[:, None], centers + radii[:, None])
@@ -0,0 +1,61 @@
+from renderlib.cache import FontCache
+from renderlib.cache import MeshCache
+import gc
+import os
+import pytest
+
+
+def test_mesh_cache(context):
+    cache = MeshCache()
+    mesh = cache.get('tests/data/zombie.mesh')
+    assert mesh
+    assert cache.get('tests/data/../data/zombie.mesh') is mesh
+
+    stats = cache.stats
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert stats.bytes_read == os.path.getsize('tests/data/zombie.mesh')
+    assert stats.entries == 1
+
+    del mesh
+    gc.collect()
+    assert cache.stats.entries == 0
+
+
+def test_mesh_cache_error(context, tmpdir):
+    cache = MeshCache()
+    filename = tmpdir.join('broken.mesh')
+    filename.write(b'broken')
+    with pytest.raises(RuntimeError):
+        cache.get(str(filename))
+    with pytest.raises(RuntimeError):
+        cache.get('tests/data/missing.mesh')
+    assert (cache.stats.misses, cache.stats.bytes_read) == (0, 0)
+
+
+def test_font_cache(context):
+    cache = FontCache(budget=95 * 16 * 16 + 95 * 20 * 20)
+    font = cache.get('tests/data/courier.ttf', 16)
+    assert font.ptsize == 16
+    assert cache.get('tests/data/../data/courier.ttf', 16) is font
+    large = cache.get('tests/data/courier.ttf', 20)
+    assert large is not font
+
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.entries, stats.files) == (1, 2, 2, 1)
+    assert stats.bytes_read == os.path.getsize('tests/data/courier.ttf')
+    assert stats.texture_bytes == cache.budget
+
+    path = os.path.realpath('tests/data/courier.ttf')
+    cache.get('tests/data/courier.ttf', 12)
+    assert cache.evicted() == [(path, 16)]
+    assert cache.evicted() == []
+
+    # evicted fonts stay cached while in use
+    assert cache.get('tests/data/courier.ttf', 16) is font
+    del font, large
+    gc.collect()
+    assert cache.stats.entries == 2
+
+    cache.prewarm('tests/data/courier.ttf', 12, 'äöü')
+    assert cache.stats.texture_bytes > 98 * 12 * 12
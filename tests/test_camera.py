@@ -0,0 +1,47 @@
+from matlib.vec import Vec
+from renderlib.camera import PerspectiveCamera
+import pytest
+
+
+def test_camera_unproject_many():
+    np = pytest.importorskip('numpy')
+    camera = PerspectiveCamera(60.0, 4 / 3, 1, 100)
+    camera.look_at(Vec(0, 0, 10), Vec(0, 0, 0), Vec(0, 1, 0))
+
+    points = [(0, 0, 0), (400, 300, 0.5), (800, 600, 1)]
+    unprojected = camera.unproject_many(points, 800, 600)
+    for p, expected in zip(points, unprojected):
+        v = camera.unproject(p[0], p[1], p[2], 800, 600)
+        assert (v.x, v.y, v.z) == pytest.approx(tuple(expected), abs=1e-3)
+
+    origins, directions = camera.trace_rays([(400, 300), (10, 20)], 800, 600)
+    origin, direction = camera.trace_ray(10, 20, 800, 600)
+    assert (origin.x, origin.y, origin.z) == pytest.approx(
+        tuple(origins[1]), abs=1e-3)
+    assert (direction.x, direction.y, direction.z) == pytest.approx(
+        tuple(directions[1]), abs=1e-3)
+    assert tuple(directions[0]) == pytest.approx((0, 0, -1), abs=1e-4)
+
+    # in-place view changes invalidate cached matrices
+    camera.look_at(Vec(0, 0, -10), Vec(0, 0, 0), Vec(0, 1, 0))
+    origins, directions = camera.trace_rays([(400, 300)], 800, 600)
+    assert tuple(directions[0]) == pytest.approx((0, 0, 1), abs=1e-4)
+
+
+def test_camera_frustum():
+    np = pytest.importorskip('numpy')
+    camera = PerspectiveCamera(60.0, 1, 1, 100)
+    camera.look_at(Vec(0, 0, 10), Vec(0, 0, 0), Vec(0, 1, 0))
+    frustum = camera.frustum
+    assert camera.frustum is frustum
+
+    centers = np.array([(0, 0, 0), (0, 0, 20), (0, 0, -95)])
+    assert list(frustum.test_spheres(centers, [1, 1, 10])) == [
+        True, False, True]
+    assert list(frustum.test_aabbs(centers - 1, centers + 1)) == [
+        True, False, False]
+
+    camera.look_at(Vec(0, 0, -10), Vec(0, 0, 0), Vec(0, 1, 0))
+    assert camera.frustum is not frustum
+    assert list(camera.frustum.test_spheres(centers, [1, 1, 1])) == [
+        True, True, False]
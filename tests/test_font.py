@@ -1,4 +1,6 @@
 from renderlib.font import Font
+from renderlib.text import Text
+import pytest
 
 def test_font_from_file(context):
     font = Font.from_file('tests/data/courier.ttf', 16)
@@ -8,4 +10,26 @@ def test_font_from_buffer(context):
     with open('tests/data/courier.ttf', 'rb') as fp:
         font_data = fp.read()
         font = Font.from_buffer(font_data, 16)
-        assert font
\ No newline at end of file
+        assert font
+
+
+@pytest.mark.parametrize('string', [
+    'hello',
+    'Hello, world!',
+    'iiii WWWW',
+    'FPS: 60, time: 1.00ms',
+])
+def test_font_measure_matches_text(context, string):
+    # the layout accumulates unrounded advances and rounds the line once
+    font = Font.from_file('tests/data/courier.ttf', 18)
+    metrics = font.metrics
+    x = 0.0
+    for i, char in enumerate(string):
+        if i:
+            x += metrics.kerning(string[i - 1], char)
+        x += metrics.advance(char)
+    width, height = font.measure(string)
+    assert width == round(x)
+    text = Text(font, string)
+    assert abs(width - text.width) <= 1
+    assert abs(height - text.height) <= 1
@@ -1,4 +1,5 @@
 from renderlib.image import Image
+import asyncio
 import pytest
 
 TEST_IMAGE_INFO = [
@@ -18,4 +19,19 @@ def test_image_from_buffer(context, filename, size, codec):
         image_data = fp.read()
         image = Image.from_buffer(image_data, codec)
         assert image.width == size[0]
-        assert image.height == size[1]
\ No newline at end of file
+        assert image.height == size[1]
+
+
+@pytest.mark.parametrize('filename,size,codec', TEST_IMAGE_INFO)
+def test_image_load_async(context, filename, size, codec):
+    async def load():
+        with open(filename, 'rb') as fp:
+            decoded = await Image.decode_async(fp.read(), codec)
+        loaded = await Image.load_async(filename)
+        return loaded, decoded
+
+    for image in asyncio.run(load()):
+        assert image.width == size[0]
+        assert image.height == size[1]
+        assert image.nbytes == size[0] * size[1] * (
+            4 if image.format == Image.Format.RGBA else 3)
@@ -0,0 +1,37 @@
+from renderlib.cache import MeshCache
+from renderlib.font import Font
+from renderlib.image import Image
+from renderlib.loader import AssetLoader
+from renderlib.mesh import Mesh
+from renderlib.texture import Texture
+import pytest
+
+
+def test_asset_loader(context):
+    cache = MeshCache()
+    loader = AssetLoader(mesh_cache=cache)
+    batch = loader.load({
+        'mesh': ('mesh', 'tests/data/zombie.mesh'),
+        'mesh_again': ('mesh', 'tests/data/zombie.mesh'),
+        'image': ('image', 'tests/data/star.png'),
+        'font': ('font', 'tests/data/courier.ttf', 16),
+        'texture': ('texture', 'tests/data/zombie.jpg', Texture.TextureType.texture_2d),
+    })
+    assets = batch.result()
+    assert batch.done()
+    assert batch.progress == (5, 5)
+    assert isinstance(assets['mesh'], Mesh)
+    assert assets['mesh_again'] is assets['mesh']
+    assert isinstance(assets['image'], Image)
+    assert isinstance(assets['font'], Font)
+    assert isinstance(assets['texture'], Texture)
+
+
+def test_asset_loader_errors(context):
+    loader = AssetLoader()
+    with pytest.raises(RuntimeError):
+        loader.submit('sound', 'tests/data/star.png')
+
+    batch = loader.load({'mesh': ('mesh', 'tests/data/missing.mesh')})
+    with pytest.raises(RuntimeError):
+        batch.result()
@@ -1,9 +1,16 @@
+from array import array
 from renderlib.mesh import Mesh
+from renderlib.mesh import validate_mesh_data
+from renderlib.meshfile import read_mesh_file
+import pytest
 
 def test_mesh_from_file(context):
     mesh = Mesh.from_file('tests/data/zombie.mesh')
     assert mesh
 
+    with pytest.raises(RuntimeError):
+        Mesh.from_file('tests/data/missing.mesh')
+
 
 def test_mesh_from_buffer(context):
     with open('tests/data/zombie.mesh', 'rb') as fp:
@@ -50,4 +57,98 @@ def test_mesh_new(context):
         joint_ids,
         joint_weights)
     assert mesh.vertex_count == 3
-    assert mesh.index_count == 3
\ No newline at end of file
+    assert mesh.index_count == 3
+
+
+def test_mesh_new_from_buffers(context):
+    vertices = memoryview(array('f', [
+        -1, -1, 0,
+        1, -1, 0,
+        0, 1, 0,
+    ])).cast('B').cast('f', (3, 3))
+    indices = array('I', [0, 1, 2])
+    uvs = array('f', [0, 0, 1, 0, 0.5, 1])
+    joint_ids = bytes(12)
+    joint_weights = bytearray(12)
+    mesh = Mesh(
+        vertices,
+        indices,
+        uvs=uvs,
+        joint_ids=joint_ids,
+        joint_weights=joint_weights)
+    assert mesh.vertex_count == 3
+    assert mesh.index_count == 3
+
+
+@pytest.mark.parametrize('vertices,indices', [
+    (array('d', [-1, -1, 0, 1, -1, 0, 0, 1, 0]), array('I', [0, 1, 2])),
+    (array('f', [-1, -1, 0, 1, -1, 0, 0, 1]), array('I', [0, 1, 2])),
+    (array('f', [-1, -1, 0, 1, -1, 0, 0, 1, 0]), array('h', [0, 1, 2])),
+])
+def test_mesh_new_invalid_buffers(context, vertices, indices):
+    with pytest.raises(RuntimeError):
+        Mesh(vertices, indices)
+
+
+@pytest.mark.parametrize('data', [
+    dict(vertices=[(0, 0, float('nan')), (1, 0, 0), (0, 1, 0)]),
+    dict(indices=[0, 1, 3]),
+    dict(normals=[(0, 0, 1), (0, 0, 1), (0, 0, 2)]),
+    dict(joint_weights=[(255, 0, 0, 0), (128, 127, 0, 0), (1, 2, 3, 4)]),
+    dict(joint_weights=[(255, 0, 0, 0), (128, 127, 2, 0), (85, 85, 85, 0)]),
+])
+def test_validate_mesh_data(data):
+    pytest.importorskip('numpy')
+    mesh_data = dict(
+        vertices=[(0, 0, 0), (1, 0, 0), (0, 1, 0)],
+        indices=[0, 1, 2],
+        normals=[(0, 0, 1), (0, 0, 1), (0, 0, 1)],
+        joint_weights=[(255, 0, 0, 0), (128, 127, 1, 0), (85, 85, 84, 0)])
+    validate_mesh_data(**mesh_data)
+
+    mesh_data.update(data)
+    with pytest.raises(RuntimeError):
+        validate_mesh_data(**mesh_data)
+
+
+def test_mesh_bounds(context):
+    pytest.importorskip('numpy')
+    vertices = array('f', [-1, -1, 0, 1, -1, 2, 0, 3, 0])
+    mesh = Mesh(vertices, [0, 1, 2])
+    # later changes to source data don't affect the mesh
+    vertices[0] = -10
+    bounds = mesh.bounds
+    assert tuple(bounds.min) == (-1, -1, 0)
+    assert tuple(bounds.max) == (1, 3, 2)
+    assert tuple(bounds.center) == (0, 1, 1)
+    assert bounds.radius == pytest.approx(6 ** 0.5)
+
+
+def test_mesh_animation_bounds(context):
+    pytest.importorskip('numpy')
+    mesh = Mesh.from_file('tests/data/zombie.mesh')
+    bounds = mesh.animations[0].bounds
+    assert (bounds.min < bounds.max).all()
+    assert bounds.radius > 0
+    assert (mesh.animation_bounds(0).max == bounds.max).all()
+
+    with pytest.raises(RuntimeError):
+        mesh.animation_bounds(1)
+
+
+def test_mesh_bounds_unavailable(context):
+    pytest.importorskip('numpy')
+    with open('tests/data/plane.mesh', 'rb') as fp:
+        mesh = Mesh.from_buffer(bytearray(fp.read()))
+    with pytest.raises(RuntimeError):
+        mesh.bounds
+
+
+def test_validate_mesh_file_data():
+    pytest.importorskip('numpy')
+    with open('tests/data/zombie.mesh', 'rb') as fp:
+        data = read_mesh_file(fp.read())
+    validate_mesh_data(
+        data.positions,
+        data.indices,
+        joint_weights=data.joint_weights)
@@ -0,0 +1,64 @@
+from renderlib.meshfile import read_mesh_file
+from renderlib.skinning import animated_aabb
+from renderlib.skinning import skinning_matrices
+import pytest
+
+np = pytest.importorskip('numpy')
+
+
+def read(filename):
+    with open(filename, 'rb') as fp:
+        return read_mesh_file(fp.read())
+
+
+def test_read_static_mesh():
+    mesh = read('tests/data/plane.mesh')
+    assert mesh.positions.shape == (6, 3)
+    assert list(mesh.indices) == [0, 1, 2, 3, 4, 5]
+    assert mesh.skeleton is None
+    assert mesh.animations == []
+
+
+def test_read_mesh_geometry_only():
+    with open('tests/data/zombie.mesh', 'rb') as fp:
+        mesh = read_mesh_file(fp.read(), geometry_only=True)
+    assert mesh.positions.shape == (37368, 3)
+    assert mesh.joint_weights is not None
+    assert mesh.skeleton is None
+    assert mesh.animations == []
+
+
+def test_read_skinned_mesh():
+    mesh = read('tests/data/zombie.mesh')
+    assert mesh.positions.shape == (37368, 3)
+    assert (abs(mesh.joint_weights.sum(axis=1).astype(int) - 255) <= 1).all()
+    assert len(mesh.skeleton) == 27
+    assert mesh.skeleton.parents[0] == -1
+    assert len(mesh.animations) == 1
+
+    anim = mesh.animations[0]
+    assert anim.times[-1] == pytest.approx(anim.duration)
+    assert np.allclose(np.linalg.norm(anim.rotations, axis=2), 1, atol=1e-3)
+
+
+def test_animated_aabb():
+    mesh = read('tests/data/zombie.mesh')
+    anim = mesh.animations[0]
+    lo, hi = animated_aabb(mesh, anim)
+
+    # skin every vertex in a few keyframes and compare
+    matrices = skinning_matrices(
+        mesh.skeleton,
+        anim.translations,
+        anim.rotations,
+        anim.scales)
+    positions = np.c_[mesh.positions, np.ones(len(mesh.positions))]
+    ids = np.where(mesh.joint_weights > 0, mesh.joint_ids, 0)
+    weights = mesh.joint_weights / 255.0
+    for k in range(0, len(anim.times), 100):
+        skinned = sum(
+            weights[:, i, None] * np.einsum(
+                'nab,nb->na', matrices[k][ids[:, i]], positions)
+            for i in range(4))[:, :3]
+        assert (skinned.min(axis=0) >= lo - 1e-6).all()
+        assert (skinned.max(axis=0) <= hi + 1e-6).all()
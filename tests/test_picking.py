@@ -0,0 +1,35 @@
+from renderlib.picking import intersect_triangles
+from renderlib.picking import TriangleBVH
+import pytest
+
+np = pytest.importorskip('numpy')
+
+
+def test_triangle_bvh_intersect():
+    rnd = np.random.default_rng(0)
+    positions = rnd.uniform(-10, 10, (600, 3))
+    indices = np.arange(600)
+    triangles = TriangleBVH(positions, indices)
+    assert len(triangles) == 200
+
+    origins = rnd.uniform(-12, 12, (100, 3))
+    directions = rnd.normal(size=(100, 3))
+    distances, hits = triangles.intersect(origins, directions)
+
+    v = triangles.vertices
+    for i in range(100):
+        expected = intersect_triangles(
+            np.repeat(origins[i:i + 1], len(v), axis=0),
+            np.repeat(directions[i:i + 1], len(v), axis=0),
+            v[:, 0],
+            v[:, 1],
+            v[:, 2])
+        if np.isfinite(expected.min()):
+            assert hits[i] == expected.argmin()
+            assert distances[i] == pytest.approx(expected.min())
+        else:
+            assert hits[i] == -1 and distances[i] == np.inf
+
+    near = np.full(100, 2.0)
+    distances, hits = triangles.intersect(origins, directions, near)
+    assert (distances[hits >= 0] <= 2).all()
@@ -0,0 +1,38 @@
+from renderlib.meshfile import read_mesh_file
+from renderlib.posetable import PoseTable
+from renderlib.skinning import skinning_matrices
+import pytest
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def zombie():
+    with open('tests/data/zombie.mesh', 'rb') as fp:
+        mesh = read_mesh_file(fp.read())
+    animation = mesh.animations[0]
+    keyframes = skinning_matrices(
+        mesh.skeleton,
+        animation.translations,
+        animation.rotations,
+        animation.scales)
+    return mesh, animation, keyframes
+
+
+@pytest.mark.parametrize('quantize,tolerance', [(False, 1e-3), (True, 0.05)])
+def test_pose_table(zombie, quantize, tolerance, tmpdir):
+    mesh, animation, keyframes = zombie
+    table = PoseTable.bake(mesh, animation, 30, quantize)
+    assert table.quantized == quantize
+    assert table.sample_count == int(np.ceil(animation.duration * 30))
+
+    times = animation.times[:20]
+    assert np.allclose(table.sample_many(times), keyframes[:20], atol=tolerance)
+    assert np.allclose(table.sample(times[5]), keyframes[5], atol=tolerance)
+
+    filename = str(tmpdir.join('zombie.poses'))
+    table.save(filename)
+    loaded = PoseTable.load(filename)
+    assert loaded.quantized == quantize
+    assert loaded.nbytes == table.nbytes
+    assert np.allclose(loaded.sample_many(times), table.sample_many(times))
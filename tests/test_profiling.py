@@ -0,0 +1,80 @@
+from renderlib.profiling import FFIProfiler
+import cProfile
+import pstats
+import pytest
+import sys
+import threading
+
+
+class Native:
+    def __init__(self):
+        self.values = []
+
+
+def wrapper(native):
+    native.values.append(1)
+    native.values.append(2)
+
+
+def test_ffi_profiler():
+    native = Native()
+    profiler = FFIProfiler(targets=[native.values])
+    previous = sys.getprofile()
+    with profiler:
+        assert profiler.enabled
+        wrapper(native)
+        assert profiler.next_frame().calls == 2
+        wrapper(native)
+        [].append(3)
+    assert not profiler.enabled
+    assert sys.getprofile() is previous
+
+    top = profiler.top()
+    assert len(top) == 1
+    assert top[0].wrapper.endswith('wrapper')
+    assert top[0].function == 'append'
+    assert top[0].calls == 4
+    assert profiler.next_frame().calls == 2
+    assert [f.calls for f in profiler.frames] == [2, 2]
+    assert 'append' in profiler.report()
+    with pytest.raises(RuntimeError):
+        profiler.top(key='size')
+
+    profiler.reset()
+    assert profiler.top() == []
+
+
+def test_ffi_profiler_under_cprofile():
+    native = Native()
+    profiler = FFIProfiler(targets=[native.values])
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        with profiler:
+            wrapper(native)
+        wrapper(native)
+    finally:
+        profile.disable()
+    assert profiler.top()[0].calls == 2
+    stats = pstats.Stats(profile)
+    assert any(name == 'wrapper' for _, _, name in stats.stats)
+
+
+def test_ffi_profiler_threads():
+    native = Native()
+    profiler = FFIProfiler(targets=[native.values])
+    started = threading.Event()
+    resume = threading.Event()
+
+    def worker():
+        started.set()
+        resume.wait()
+        wrapper(native)
+
+    with profiler:
+        thread = threading.Thread(target=worker)
+        thread.start()
+        started.wait()
+    resume.set()
+    thread.join()
+    assert profiler.top() == []
@@ -2,6 +2,7 @@ from matlib.vec import Vec
 from renderlib.animation import AnimationInstance
 from renderlib.camera import OrthographicCamera
 from renderlib.camera import PerspectiveCamera
+from renderlib.core import RenderTarget
 from renderlib.core import renderer_present
 from renderlib.font import Font
 from renderlib.image import Image
@@ -10,11 +11,13 @@ from renderlib.material import Material
 from renderlib.mesh import Mesh
 from renderlib.mesh import MeshProps
 from renderlib.quad import Quad
+from renderlib.quad import QuadBatch
 from renderlib.quad import QuadProps
 from renderlib.scene import Scene
 from renderlib.text import Text
 from renderlib.text import TextProps
 from renderlib.texture import Texture
+import pytest
 
 
 def test_render_mesh(context):
@@ -124,4 +127,38 @@ def test_render_textured_quad(context):
 
     # do actual rendering
     scene.render(camera, None)
-    renderer_present()
\ No newline at end of file
+    renderer_present()
+
+
+def test_render_quad_batch(context):
+    np = pytest.importorskip('numpy')
+
+    img = Image.from_file('tests/data/star.png')
+    texture = Texture.from_image(img, Texture.TextureType.texture_rectangle)
+
+    # create a batch and fill it with quads placed on a grid
+    batch = QuadBatch(1000, texture)
+    batch.count = 800
+    grid = np.mgrid[0:40, 0:20].reshape(2, -1).T * 20 - 300
+    batch.positions[:800, :2] = grid
+    batch.sizes[:] = (16, 16)
+    batch.colors[:] = (0.3, 0.9, 0.3, 1.0)
+    batch.opacities[::2] = 0.5
+
+    # create a scene and add the batch to it
+    scene = Scene()
+    scene.add_quad_batch(batch)
+    assert scene.object_count == batch.capacity
+
+    # create an orthographic camera
+    camera = OrthographicCamera(-400, 400, 300, -300, 0, 1)
+
+    # do actual rendering
+    scene.render(RenderTarget.overlay, camera, None)
+    batch.positions[0] = (10, 10, 0)
+    batch.count = 900
+    scene.render(RenderTarget.overlay, camera, None)
+    renderer_present()
+
+    scene.remove_quad_batch(batch)
+    assert scene.object_count == 0
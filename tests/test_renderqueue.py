@@ -0,0 +1,70 @@
+from renderlib.renderqueue import count_binds
+from renderlib.renderqueue import RenderQueue
+from renderlib.renderqueue import sort_key
+
+
+def test_count_binds():
+    assert count_binds([]) == 0
+    assert count_binds([(0, 1, 2), (0, 1, 2), (0, 2, 2), (1, 1, 3)]) == 7
+
+
+def test_sort_key():
+    assert sort_key((0, 1, 0), False) < sort_key((0, 2, 0), False)
+    assert sort_key((1, 2, 0), False) < sort_key((0, 1, 0), True)
+
+
+def test_render_queue():
+    queue = RenderQueue()
+    keys = {source: sort_key((0, source, 0), False) for source in (1, 2)}
+    for i, obj in enumerate('abcdef'):
+        queue.add(obj, i % 2 + 1, keys[i % 2 + 1])
+
+    moved = queue.update()
+    assert queue.objects == list('acebdf')
+    assert moved == list('bdf')
+    assert queue.stats.objects == 6
+    assert queue.stats.moved == 3
+    assert queue.stats.binds == 4
+    assert queue.stats.binds_avoided == 4
+
+    # nothing changed
+    assert queue.update() == []
+    assert queue.stats.moved == 0
+
+    # appending to the last group and removing never reorders
+    queue.add('g', 2, keys[2])
+    queue.remove('c')
+    assert queue.update() == []
+    assert queue.objects == list('aebdfg')
+    assert len(queue) == 6
+
+    # adding to an earlier group moves the groups after it
+    queue.add('h', 1, keys[1])
+    assert queue.update() == list('bdfg')
+    assert queue.objects == list('aehbdfg')
+
+    # a key change moves the source
+    queue.set_key(1, sort_key((0, 3, 0), False))
+    assert queue.update() == list('aeh')
+    assert queue.objects == list('bdfgaeh')
+    assert queue.sources == [1, 2]
+
+
+def test_render_queue_transparent():
+    queue = RenderQueue()
+    keys = {
+        1: sort_key((2, 5, 0), True),
+        2: sort_key((0, 1, 0), False),
+        3: sort_key((2, 3, 0), True),
+    }
+    for obj, source in zip('abcd', (1, 2, 3, 1)):
+        queue.add(obj, source, keys[source])
+
+    # opaque objects go first, transparent ones stay in insertion order
+    assert queue.update() == list('acd')
+    assert queue.objects == list('bacd')
+
+    # appending transparent objects never reorders
+    queue.add('e', 3, keys[3])
+    assert queue.update() == []
+    assert queue.objects == list('bacde')
@@ -0,0 +1,308 @@
+from matlib.vec import Vec
+from renderlib import trace
+from renderlib.camera import PerspectiveCamera
+from renderlib.core import RenderTarget
+from renderlib.image import Image
+from renderlib.material import Material
+from renderlib.mesh import Mesh
+from renderlib.mesh import MeshProps
+from renderlib.quad import Quad
+from renderlib.quad import QuadProps
+from renderlib.scene import Scene
+from renderlib.texture import Texture
+import pytest
+
+
+@pytest.fixture
+def mesh_objects(context):
+    mesh = Mesh.from_file('tests/data/plane.mesh')
+    props = MeshProps()
+    scene = Scene()
+    return scene, [scene.add_mesh(mesh, props) for _ in range(10)]
+
+
+def test_scene_bulk_transforms(mesh_objects):
+    np = pytest.importorskip('numpy')
+    scene, objects = mesh_objects
+    objects[0].position = Vec(1, 2, 3)
+
+    positions, rotations, scales = scene.get_transforms(objects)
+    assert positions.shape == (10, 3)
+    assert rotations.shape == (10, 4)
+    assert scales.shape == (10, 3)
+    assert tuple(positions[0]) == (1, 2, 3)
+
+    positions = np.arange(30, dtype='float32').reshape(10, 3)
+    scales = np.full((10, 3), 2, dtype='float32')
+    scene.set_transforms(objects, positions=positions, scales=scales)
+
+    new_positions, new_rotations, new_scales = scene.get_transforms(objects)
+    assert (new_positions == positions).all()
+    assert (new_rotations == rotations).all()
+    assert (new_scales == scales).all()
+    assert objects[3].position.y == 10
+
+    with pytest.raises(RuntimeError):
+        scene.set_transforms(objects, positions=positions[:5])
+    with pytest.raises(RuntimeError):
+        scene.set_transforms(objects, scales=np.ones((10, 4)))
+
+    positions = np.arange(30, dtype='float64').reshape(10, 3) * 0.5
+    scene.set_transforms(objects, positions=positions)
+    assert (scene.get_transforms(objects)[0] == positions).all()
+    assert objects[3].position.y == 5
+
+    # flags are left alone and removed objects are rejected
+    objects[1].visible = False
+    scene.set_transforms(objects, positions=positions)
+    assert not objects[1].visible and not objects[1]._ptr.visible
+    objects[2].remove()
+    with pytest.raises(RuntimeError):
+        scene.get_transforms(objects)
+    with pytest.raises(RuntimeError):
+        scene.set_transforms(objects, positions=positions)
+
+
+def test_scene_culling(context):
+    pytest.importorskip('numpy')
+    mesh = Mesh.from_file('tests/data/plane.mesh')
+    props = MeshProps()
+    scene = Scene(culling=True)
+    front = scene.add_mesh(mesh, props)
+    front.position = Vec(0, 0, -10)
+    behind = scene.add_mesh(mesh, props)
+    behind.position = Vec(0, 0, 10)
+    hidden = scene.add_mesh(mesh, props)
+    hidden.position = Vec(0, 0, -20)
+    hidden.visible = False
+
+    camera = PerspectiveCamera(60.0, 4 / 3, 1, 100)
+    scene.render(RenderTarget.framebuffer, camera)
+    assert front._ptr.visible and front.visible
+    assert not behind._ptr.visible and behind.visible
+    assert not hidden._ptr.visible and not hidden.visible
+
+    behind.position = Vec(0, 0, -30)
+    scene.render(RenderTarget.framebuffer, camera)
+    assert behind._ptr.visible
+
+    scene.culling = False
+    behind.position = Vec(0, 0, 10)
+    scene.render(RenderTarget.framebuffer, camera)
+    assert behind._ptr.visible
+
+
+def test_scene_pick(context):
+    pytest.importorskip('numpy')
+    vertices = [(-1, -1, 0), (1, -1, 0), (1, 1, 0), (-1, 1, 0)]
+    indices = [0, 1, 2, 0, 2, 3]
+    mesh = Mesh(vertices, indices, pickable=True)
+    props = MeshProps()
+    scene = Scene()
+    near = scene.add_mesh(mesh, props)
+    near.position = Vec(0, 0, -5)
+    far = scene.add_mesh(mesh, props)
+    far.position = Vec(3, 0, -10)
+    far.scale = Vec(2, 2, 2)
+
+    hit = scene.pick(Vec(0, 0, 0), Vec(0, 0, -1))
+    assert hit.object is near
+    assert hit.distance == pytest.approx(5)
+    assert hit.triangle in (0, 1)
+
+    assert scene.pick(Vec(0, 0, 0), Vec(0, 0, -1), max_distance=4) is None
+
+    hits = scene.pick_many(
+        [(0, 0, 0), (4.5, 0, 0), (0, 0, 0)],
+        [(0, 0, -1), (0, 0, -1), (0, 0, 1)])
+    assert hits[0].object is near
+    assert hits[1].object is far
+    assert hits[1].distance == pytest.approx(10)
+    assert hits[2] is None
+
+    near.visible = False
+    assert scene.pick(Vec(0, 0, 0), Vec(0, 0, -1)) is None
+
+    # meshes don't keep vertex data for picking by default
+    other = Scene()
+    other.add_mesh(Mesh(vertices, indices), props).position = Vec(0, 0, -5)
+    assert other.pick(Vec(0, 0, 0), Vec(0, 0, -1)) is None
+
+    near.visible = True
+    near.position = Vec(0, 0, -2)
+    assert scene.pick(Vec(0, 0, 0), Vec(0, 0, -1)).distance == pytest.approx(2)
+
+    scene.set_transforms([near], positions=[(0, 0, -4)])
+    assert scene.pick(Vec(0, 0, 0), Vec(0, 0, -1)).distance == pytest.approx(4)
+
+    # in-place changes through views are detected too
+    near.position.z = -3
+    assert scene.pick(Vec(0, 0, 0), Vec(0, 0, -1)).distance == pytest.approx(3)
+
+
+def test_scene_mesh_instances(context):
+    np = pytest.importorskip('numpy')
+    mesh = Mesh.from_file('tests/data/plane.mesh')
+    props = MeshProps()
+    scene = Scene()
+
+    transforms = np.tile(np.eye(4), (100, 1, 1))
+    transforms[:, 0, 3] = np.arange(100)
+    c, s = np.cos(0.5), np.sin(0.5)
+    transforms[1, :3, :3] = [[c, -s, 0], [s, c, 0], [0, 0, 1]]
+    transforms[2, :3, :3] *= 2
+    colors = np.tile([1.0, 0.0, 0.0, 1.0], (100, 1))
+    instances = scene.add_mesh_instances(mesh, props, transforms, colors)
+    assert len(instances) == 100 and scene.object_count == 100
+    assert instances.objects[5].position.x == 5
+    assert np.allclose(instances.get_transforms(), transforms, atol=1e-5)
+    assert instances.objects[2].scale.x == 2
+
+    instances.colors[3] = (0, 1, 0, 1)
+    assert instances._refs[0][3].color.y == 1
+    assert instances._refs[0][4].color.x == 1
+
+    transforms[:, 1, 3] = 7
+    instances.set_transforms(transforms)
+    assert instances.objects[9].position.y == 7
+    with pytest.raises(RuntimeError):
+        instances.set_transforms(transforms[:10])
+
+    instances.set_visible(False)
+    assert not any(obj.visible for obj in instances.objects)
+
+    instances.objects[0].remove()
+    assert scene.object_count == 99
+    with pytest.raises(RuntimeError):
+        instances.get_transforms()
+    with pytest.raises(RuntimeError):
+        instances.set_transforms(transforms)
+    scene.remove_mesh_instances(instances)
+    assert scene.object_count == 0
+
+
+def test_scene_sorting(context):
+    pytest.importorskip('numpy')
+    mesh = Mesh.from_file('tests/data/plane.mesh')
+    materials = [Material(), Material()]
+    props = []
+    for material in materials:
+        props.append(MeshProps())
+        props[-1].material = material
+    scene = Scene(sorting=True)
+    objects = [scene.add_mesh(mesh, props[i % 2]) for i in range(6)]
+    for i, obj in enumerate(objects):
+        obj.position = Vec(i, 0, -10)
+
+    position = objects[1].position
+    camera = PerspectiveCamera(60.0, 4 / 3, 1, 100)
+    scene.render(RenderTarget.framebuffer, camera)
+    stats = scene.sort_stats
+    assert stats.objects == 6
+    assert stats.moved == 3
+    assert stats.binds_avoided == 4
+    assert scene.object_count == 6
+
+    # views taken before reordering stay valid
+    position.x = 7
+    assert objects[1].position.x == 7
+    scene.render(RenderTarget.framebuffer, camera)
+    assert scene.sort_stats.moved == 0
+    assert objects[1]._native.position.x == 7
+
+    # render state changes are picked up
+    props[1].material = materials[0]
+    scene.render(RenderTarget.framebuffer, camera)
+    assert scene.sort_stats.binds == 3
+    objects[0].remove()
+    scene.render(RenderTarget.framebuffer, camera)
+    assert scene.sort_stats.objects == 5
+
+
+def test_scene_sorting_quads(context):
+    pytest.importorskip('numpy')
+    img = Image.from_file('tests/data/star.png')
+    textures = [
+        Texture.from_image(img, Texture.TextureType.texture_rectangle)
+        for _ in range(2)
+    ]
+    scene = Scene(sorting=True)
+    quad = Quad(16, 16)
+    for i in range(4):
+        props = QuadProps()
+        props.texture = textures[i % 2]
+        scene.add_quad(quad, props)
+
+    # quads sharing a texture are drawn together despite separate props
+    camera = PerspectiveCamera(60.0, 4 / 3, 1, 100)
+    scene.render(RenderTarget.framebuffer, camera)
+    assert scene.sort_stats.binds == 4
+    assert scene.sort_stats.binds_avoided == 2
+
+
+def test_scene_frame_stats(context):
+    pytest.importorskip('numpy')
+    scene = Scene(culling=True)
+    other = Scene()
+    mesh = Mesh.from_file('tests/data/plane.mesh')
+    props = MeshProps()
+    assert scene.frame_stats is None
+    front = scene.add_mesh(mesh, props)
+    front.position = Vec(0, 0, -10)
+    behind = scene.add_mesh(mesh, props)
+    behind.position = Vec(0, 0, 10)
+    hidden = scene.add_mesh(mesh, props)
+    hidden.visible = False
+
+    camera = PerspectiveCamera(60.0, 4 / 3, 1, 100)
+    scene.render(RenderTarget.framebuffer, camera)
+    stats = scene.frame_stats
+    assert stats.objects == 3
+    assert stats.culled == 1
+    assert stats.drawn == stats.draw_calls == 1
+    assert stats.triangles == mesh.index_count // 3
+    assert stats.binds is None
+    assert stats.uploaded_bytes > 0
+    assert set(stats.phase_times) == {'sync', 'cull', 'sort', 'render'}
+
+    # uploads are counted since the previous frame of each scene
+    other.render(RenderTarget.framebuffer, camera)
+    assert other.frame_stats.uploaded_bytes == stats.uploaded_bytes
+
+    hidden.visible = True
+    hidden.position = Vec(0, 0, -20)
+    scene.render(RenderTarget.framebuffer, camera)
+    assert scene.frame_stats.drawn == 2
+    assert scene.frame_stats.uploaded_bytes == 0
+    assert scene.frame_stats._asdict()['culled'] == 1
+
+    # removed objects can't corrupt the counters
+    hidden.visible = False
+    hidden.remove()
+    with pytest.raises(RuntimeError):
+        hidden.remove()
+    with pytest.raises(RuntimeError):
+        hidden.visible = True
+    with pytest.raises(RuntimeError):
+        scene.remove_object(hidden)
+    front.remove()
+    scene.render(RenderTarget.framebuffer, camera)
+    stats = scene.frame_stats
+    assert stats.objects == 1
+    assert stats.culled == 1
+    assert stats.drawn == stats.triangles == 0
+
+
+def test_scene_trace(context):
+    mesh = Mesh.from_file('tests/data/plane.mesh')
+    scene = Scene()
+    scene.add_mesh(mesh, MeshProps())
+    camera = PerspectiveCamera(60.0, 4 / 3, 1, 100)
+    tracer = trace.start_tracing()
+    try:
+        scene.render(RenderTarget.framebuffer, camera)
+    finally:
+        trace.stop_tracing()
+    names = [e['name'] for e in tracer.events()]
+    assert names[:2] == ['Scene.render', 'sync']
+    assert 'scene' in names and 'memory' in names
@@ -0,0 +1,9 @@
+from renderlib.stats import record_upload
+from renderlib.stats import total_uploaded_bytes
+
+
+def test_uploaded_bytes():
+    start = total_uploaded_bytes()
+    record_upload(100)
+    record_upload(20)
+    assert total_uploaded_bytes() - start == 120
@@ -1,5 +1,13 @@
-from renderlib.text import Text
 from renderlib.font import Font
+from renderlib.scene import Scene
+from renderlib.text import Text
+from renderlib.text import TextBatch
+from renderlib.text import TextLayoutCache
+from renderlib.text import TextLine
+from renderlib.text import TextProps
+import gc
+import pytest
+import weakref
 
 def test_text(context):
     font = Font.from_file('tests/data/courier.ttf', 18)
@@ -8,3 +16,114 @@ def test_text(context):
     assert text.string == 'hello world'
     assert text.width > 0
     assert text.height > 0
+
+
+def test_text_layout_cache(context):
+    font = Font.from_file('tests/data/courier.ttf', 18)
+    cache = TextLayoutCache(font, capacity=2)
+    text = cache.get('hello')
+    assert cache.get('hello') is text
+    assert text.string == 'hello'
+    cache.get('world')
+    cache.get('!')
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    other = Font.from_file('tests/data/courier.ttf', 12)
+    with pytest.raises(RuntimeError):
+        TextLine(other, TextProps(), cache=cache)
+
+
+def test_text_layout_cache_shared(context):
+    font = Font.from_file('tests/data/courier.ttf', 18)
+    first = TextLine(font, TextProps(), 'hello')
+    second = TextLine(font, TextProps(), 'hello')
+    assert first._cache is second._cache is TextLayoutCache.shared(font)
+    assert first._cache.hits == 1
+
+    own = TextLayoutCache(font)
+    assert TextLine(font, TextProps(), cache=own)._cache is own
+
+    # shared caches don't keep fonts alive
+    ref = weakref.ref(font)
+    del first, second, font
+    gc.collect()
+    assert ref() is None
+    with pytest.raises(RuntimeError):
+        own.get('hello')
+
+
+def test_text_line(context):
+    font = Font.from_file('tests/data/courier.ttf', 18)
+    scene = Scene()
+    line = scene.add_text_line(
+        TextLine(font, TextProps(), 'FPS: 60, time: 1.00ms'))
+    line.position = (10, 20, 0)
+    assert scene.object_count == 4
+    assert line.width > 0 and line.height > 0
+
+    objects = [run.obj for run in line._runs]
+    line.string = 'FPS: 59, time: 1.00ms'
+    assert [run.obj for run in line._runs][::2] == objects[::2]
+    assert line._runs[1].obj is not objects[1]
+    assert line._runs[1].obj.position.x == 10 + line._runs[0].text.width
+    assert scene.object_count == 4
+
+    # a run changing on consecutive updates is laid out in place
+    line.string = 'FPS: 58, time: 1.00ms'
+    owned = line._runs[1]
+    assert owned.owned
+    for fps in range(57, 50, -1):
+        line.string = 'FPS: {}, time: 1.00ms'.format(fps)
+        assert line._runs[1] is owned and owned.obj is not None
+    assert owned.text.string == '51, '
+    assert line._cache.misses == 5
+
+    line.string = 'FPS: 59'
+    assert scene.object_count == 2
+    scene.remove_text_line(line)
+    assert scene.object_count == 0
+
+
+def test_text_batch(context):
+    pytest.importorskip('numpy')
+    font = Font.from_file('tests/data/courier.ttf', 18)
+    batch = TextBatch(font, 4)
+    first = batch.add('label', (10, 20, 0))
+    second = batch.add('label', (30, 40, 0))
+    assert batch._texts[first] is batch._texts[second]
+
+    scene = Scene()
+    scene.add_text_batch(batch)
+    assert scene.object_count == 2
+    third = batch.add('other')
+    batch.colors[third] = (1, 0, 0, 1)
+    batch.opacities[third] = 0.5
+    assert len(batch) == 3 and scene.object_count == 3
+
+    batch.sync()
+    assert batch._objects[second].position.y == 40
+    batch.positions[second] = (50, 60, 0)
+    batch.sync()
+    assert batch._objects[second].position.x == 50
+
+    batch.set_string(first, 'changed')
+    assert batch.get_string(first) == 'changed'
+    assert batch.size(first)[0] > 0
+    batch.remove(second)
+    assert len(batch) == 2 and scene.object_count == 2
+    with pytest.raises(RuntimeError):
+        batch.remove(second)
+
+    # a label changing in consecutive frames is laid out in place
+    for frame in range(5):
+        batch.set_string(third, 'frame {}'.format(frame))
+        batch.sync()
+    assert batch._owned[third]
+    assert batch.get_string(third) == 'frame 4'
+    assert batch._texts[third] is not batch._cache.get('frame 4')
+
+    with pytest.raises(RuntimeError):
+        scene.remove_quad_batch(batch)
+    scene.remove_text_batch(batch)
+    assert scene.object_count == 0
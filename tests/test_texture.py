@@ -1,4 +1,5 @@
 from renderlib.texture import Texture
+from renderlib.texture import TextureUploadQueue
 from renderlib.image import Image
 import pytest
 
@@ -11,4 +12,26 @@ def test_texture_from_image(context, filename, tex_type):
     assert img
 
     tex = Texture.from_image(img, tex_type)
-    assert tex
\ No newline at end of file
+    assert tex
+
+
+def test_texture_upload_queue(context):
+    img = Image.from_file('tests/data/star.png')
+    queue = TextureUploadQueue(budget=img.nbytes)
+    futures = [
+        queue.push(img, Texture.TextureType.texture_rectangle)
+        for _ in range(3)
+    ]
+    assert len(queue) == 3
+    assert queue.pending_bytes == 3 * img.nbytes
+
+    assert queue.process() == img.nbytes
+    assert futures[0].done() and not futures[1].done()
+
+    queue.budget = 0
+    assert queue.process() == img.nbytes
+
+    queue.budget = 10 * img.nbytes
+    assert queue.process() == img.nbytes
+    assert len(queue) == 0
+    assert all(isinstance(f.result(), Texture) for f in futures)
@@ -0,0 +1,50 @@
+from renderlib import trace
+import json
+
+
+def test_trace_disabled():
+    trace.stop_tracing()
+    calls = []
+
+    @trace.traced('f')
+    def f(x):
+        calls.append(x)
+        return x * 2
+
+    assert f(2) == 4 and calls == [2]
+    with trace.span('noop'):
+        pass
+    trace.counter('noop', value=1)
+    assert trace.get_tracer() is None
+
+
+def test_trace_events(tmpdir):
+    tracer = trace.start_tracing(capacity=4)
+    try:
+        @trace.traced('f', 'test')
+        def f():
+            pass
+
+        f()
+        with trace.span('block', size=3):
+            pass
+        trace.counter('objects', count=10)
+    finally:
+        assert trace.stop_tracing() is tracer
+
+    events = tracer.events()
+    assert [e['ph'] for e in events] == ['X', 'X', 'C']
+    assert events[0]['name'] == 'f' and events[0]['cat'] == 'test'
+    assert events[0]['dur'] >= 0
+    assert events[1]['args'] == {'size': 3}
+    assert events[2]['args'] == {'count': 10}
+
+    for _ in range(10):
+        tracer.counter('objects', {'count': 1})
+    assert len(tracer) == tracer.capacity == 4
+
+    filename = str(tmpdir.join('trace.json'))
+    tracer.save(filename)
+    with open(filename) as fp:
+        data = json.load(fp)
+    assert len(data['traceEvents']) == 4
@@ -0,0 +1,41 @@
+from renderlib.font import Font
+from renderlib.ttf import FontMetrics
+import pytest
+
+
+@pytest.fixture
+def metrics():
+    with open('tests/data/courier.ttf', 'rb') as fp:
+        return FontMetrics(fp.read(), 16)
+
+
+def test_font_metrics(metrics):
+    assert metrics.line_height > 0
+    assert metrics.ascent > 0 > metrics.descent
+    assert metrics.advance('W') > 0
+    assert metrics.glyph('a') != 0
+    assert metrics.glyph('\uffff') == 0
+    assert metrics.width('hello') == round(
+        sum(metrics.advance(c) for c in 'hello'))
+    assert metrics.prefix_widths('ab') == [
+        0, round(metrics.advance('a')), metrics.width('ab')]
+
+
+def test_font_measure(context):
+    font = Font.from_file('tests/data/courier.ttf', 16)
+    metrics = font.metrics
+    width = metrics.width
+    assert font.measure('hello') == (width('hello'), metrics.line_height)
+    assert font.measure('a\nbbb') == (width('bbb'), 2 * metrics.line_height)
+    assert font.measure_many(['a', 'bb']) == [
+        (width('a'), metrics.line_height),
+        (width('bb'), metrics.line_height)]
+
+    assert font.wrap('the quick brown fox', width('the quick')) == [
+        'the quick', 'brown fox']
+    assert font.wrap('abcdefgh ij', width('abc')) == ['abc', 'def', 'gh', 'ij']
+    assert font.wrap('one\n\ntwo', width('one two')) == ['one', '', 'two']
+
+    assert font.truncate('hello', width('hello')) == 'hello'
+    assert font.truncate('hello world', width('hello...')) == 'hello...'
+    assert font.truncate('hello', width('..')) == ''